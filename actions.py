@@ -0,0 +1,318 @@
+"""
+Aktionen nach der Aufnahme für den Snipping Tool Clone
+------------------------------------------------------
+Nach jeder Aufnahme startet ActionPipeline die eingestellten Aktionen
+gleichzeitig in einem eigenen Thread-Pool, während der Editor schon offen ist:
+
+- save: als Datei im Zielverzeichnis speichern (Namensvorlage, Voreinstellung)
+- copy: in die Zwischenablage legen und PNG im Hintergrund vorkodieren
+- scale: verkleinerte Kopie neben der Datei ablegen
+- command: Bild als PNG über stdin an einen lokalen Befehl geben
+
+Eingestellt wird über Umgebungsvariablen (Aktionen lassen sich zusätzlich im
+Menü Optionen an- und abschalten):
+
+    SNIPPING_TOOL_ACTIONS=save,copy,scale,command
+    SNIPPING_TOOL_SAVE_DIR=~/Bilder/Screenshots
+    SNIPPING_TOOL_SAVE_NAME="Screenshot_{time:%Y%m%d_%H%M%S}"    # {mode}, {width}, {height}, {n}
+    SNIPPING_TOOL_SAVE_PRESET=png-fast                           # siehe encoders.PRESETS
+    SNIPPING_TOOL_SCALE=640                                      # längste Kante der Kopie
+    SNIPPING_TOOL_COMMAND="curl -sF file=@- https://example.invalid/upload"
+
+Damit schnell wiederholte Aufnahmen (Strg+Shift+S gedrückt halten) keinen
+Speicher anhäufen, sind höchstens MAX_PENDING_CAPTURES Aufnahmen bzw.
+MAX_PENDING_BYTES Bildpixel in Arbeit; weitere Aufnahmen landen nur im Editor.
+Dauer und Fehler jeder Aktion erscheinen in der Statusleiste.
+"""
+import functools
+import itertools
+import os
+import shlex
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+
+from clipboard import copy_image
+from encoders import PRESETS, encode
+from latency import tracer
+
+ACTIONS_ENV = "SNIPPING_TOOL_ACTIONS"
+
+# Aktion -> Bezeichnung in Menü und Statusleiste
+ACTIONS = {
+    "save": "Speichern",
+    "copy": "Kopieren",
+    "scale": "Verkleinern",
+    "command": "Befehl",
+}
+
+# Standardwerte der Einstellungen
+DEFAULT_NAME_TEMPLATE = "Screenshot_{time:%Y%m%d_%H%M%S}"
+DEFAULT_PRESET = "png-fast"
+DEFAULT_SCALE = 640
+
+# PNG für Zwischenablage und Befehl: schnell statt klein, die Bytes bleiben nicht liegen
+PNG_PRESET = "png-fast"
+
+# Zeit (s), die ein Befehl laufen darf
+COMMAND_TIMEOUT = 30
+
+# Obergrenze für gleichzeitig bearbeitete Aufnahmen und deren Pixel; darüber wird abgewiesen
+MAX_PENDING_CAPTURES = 4
+MAX_PENDING_BYTES = 512 * 1024 * 1024
+
+# Threads für die Aktionen (eigener Pool, damit Export und Auslagern nicht warten)
+ACTION_THREADS = 4
+
+ActionSettings = namedtuple("ActionSettings", "actions directory template preset scale command")
+
+
+class ActionError(Exception):
+    """Eine Aktion nach der Aufnahme ist fehlgeschlagen"""
+
+
+def pictures_directory():
+    """Standard-Zielverzeichnis ~/Pictures/Screenshots"""
+    return os.path.join(os.path.expanduser("~"), "Pictures", "Screenshots")
+
+
+def action_settings():
+    """Einstellungen aus den Umgebungsvariablen; ungültige Werte werden auf stderr gemeldet"""
+    names = [name.strip() for name in os.environ.get(ACTIONS_ENV, "").split(",") if name.strip()]
+    for name in names:
+        if name not in ACTIONS:
+            print(f"{ACTIONS_ENV}: unbekannte Aktion {name} ({', '.join(ACTIONS)})", file=sys.stderr)
+
+    preset = os.environ.get("SNIPPING_TOOL_SAVE_PRESET", DEFAULT_PRESET)
+    if preset not in PRESETS:
+        print(f"SNIPPING_TOOL_SAVE_PRESET: unbekannte Voreinstellung {preset}", file=sys.stderr)
+        preset = DEFAULT_PRESET
+    try:
+        scale = max(1, int(os.environ.get("SNIPPING_TOOL_SCALE", DEFAULT_SCALE)))
+    except ValueError:
+        scale = DEFAULT_SCALE
+    command = os.environ.get("SNIPPING_TOOL_COMMAND", "").strip()
+
+    return ActionSettings(
+        actions={name for name in names if name in ACTIONS and (name != "command" or command)},
+        directory=os.path.expanduser(os.environ.get("SNIPPING_TOOL_SAVE_DIR") or pictures_directory()),
+        template=os.environ.get("SNIPPING_TOOL_SAVE_NAME") or DEFAULT_NAME_TEMPLATE,
+        preset=preset,
+        scale=scale,
+        command=command,
+    )
+
+
+def write_new(path, data):
+    """Schreibt eine Datei, ohne eine vorhandene zu überschreiben"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "xb") as f:
+        f.write(data)
+
+
+def run_command(command, data):
+    """Gibt data über stdin an einen Befehl; liefert dessen erste Ausgabezeile"""
+    try:
+        result = subprocess.run(shlex.split(command), input=data, capture_output=True,
+                                timeout=COMMAND_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise ActionError(f"nach {COMMAND_TIMEOUT} s abgebrochen")
+    if result.returncode != 0:
+        detail = result.stderr.decode(errors="replace").strip().splitlines()
+        raise ActionError(f"Status {result.returncode}" + (f": {detail[-1]}" if detail else ""))
+    output = result.stdout.decode(errors="replace").strip().splitlines()
+    return output[0] if output else ""
+
+
+class _ActionSignals(QObject):
+    finished = pyqtSignal(int, str, float, object)
+    failed = pyqtSignal(int, str, float, str)
+
+
+class ActionTask(QRunnable):
+    """Führt eine Aktion für eine Aufnahme im Worker-Thread aus"""
+
+    def __init__(self, job_id, name, func):
+        super().__init__()
+        self.job_id = job_id
+        self.name = name
+        self.func = func
+        self.signals = _ActionSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            with tracer.stage(f"action.{self.name}"):
+                result = self.func()
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, self.name, time.perf_counter() - start, str(e))
+            return
+        self.signals.finished.emit(self.job_id, self.name, time.perf_counter() - start, result)
+
+
+class _Job:
+    """Eine Aufnahme mit ihren laufenden Aktionen"""
+
+    def __init__(self, image, mode):
+        self.image = image
+        self.mode = mode
+        self.size = image.sizeInBytes()
+        self.time = datetime.now()
+        self.paths = []
+        self.tasks = {}
+        self.results = []
+        self.mime_data = None
+
+
+class ActionPipeline(QObject):
+    """Startet die Aktionen nach jeder Aufnahme parallel und meldet das Ergebnis"""
+
+    # Meldung für die Statusleiste
+    message = pyqtSignal(str)
+    # Alle Aktionen einer Aufnahme sind fertig: [(Aktion, Dauer in s, Fehler oder None, Ergebnis), ...]
+    finished = pyqtSignal(object)
+
+    _ids = itertools.count(1)
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings or action_settings()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(ACTION_THREADS)
+        self.jobs = {}
+        self.pending_bytes = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return bool(self.settings.actions)
+
+    def set_enabled(self, name, enabled):
+        """Schaltet eine Aktion an oder ab"""
+        actions = set(self.settings.actions)
+        if enabled:
+            actions.add(name)
+        else:
+            actions.discard(name)
+        self.settings = self.settings._replace(actions=actions)
+
+    def submit(self, image, mode=""):
+        """Startet die eingestellten Aktionen für ein Bild; False, wenn abgewiesen oder nichts zu tun"""
+        if not self.enabled:
+            return False
+        size = image.sizeInBytes()
+        # Eine einzelne Aufnahme wird immer angenommen, auch wenn sie allein über der Grenze liegt
+        over_budget = self.jobs and self.pending_bytes + size > MAX_PENDING_BYTES
+        if len(self.jobs) >= MAX_PENDING_CAPTURES or over_budget:
+            self.rejected += 1
+            self.message.emit(f"Aktionen übersprungen: noch {len(self.jobs)} Aufnahmen in Arbeit "
+                              f"({self.rejected} übersprungen)")
+            return False
+
+        job_id = next(self._ids)
+        job = _Job(image, mode)
+        settings = self.settings
+        steps = {}
+        if "save" in settings.actions or "scale" in settings.actions:
+            try:
+                name = settings.template.format(time=job.time, mode=mode, width=image.width(),
+                                                height=image.height(), n=job_id)
+            except (KeyError, IndexError, ValueError) as e:
+                self.message.emit(f"Ungültige Namensvorlage ({str(e)}), verwende {DEFAULT_NAME_TEMPLATE}")
+                name = DEFAULT_NAME_TEMPLATE.format(time=job.time)
+            base = os.path.join(settings.directory, name)
+            extension = PRESETS[settings.preset].extension
+            if "save" in settings.actions:
+                path = self._reserve(base, extension)
+                job.paths.append(path)
+                steps["save"] = functools.partial(self.save, image, settings.preset, path)
+            if "scale" in settings.actions:
+                path = self._reserve(base + "_klein", extension)
+                job.paths.append(path)
+                steps["scale"] = functools.partial(self.save_scaled, image, settings.preset, settings.scale, path)
+        if "copy" in settings.actions:
+            # Die Zwischenablage gehört dem GUI-Thread, kodiert wird im Worker
+            job.mime_data = copy_image(image)
+            steps["copy"] = functools.partial(encode, image, PNG_PRESET)
+        if "command" in settings.actions:
+            steps["command"] = functools.partial(self.pipe, image, settings.command)
+
+        self.jobs[job_id] = job
+        self.pending_bytes += job.size
+        for name in ACTIONS:
+            if name not in steps:
+                continue
+            task = ActionTask(job_id, name, steps[name])
+            task.signals.finished.connect(self._finished)
+            task.signals.failed.connect(self._failed)
+            job.tasks[name] = task
+            self.pool.start(task)
+        return True
+
+    def _reserve(self, base, extension):
+        """Freier Dateiname; auch Namen laufender Aufnahmen gelten als belegt"""
+        taken = {path for job in self.jobs.values() for path in job.paths}
+        path = base + extension
+        for counter in itertools.count(2):
+            if path not in taken and not os.path.exists(path):
+                return path
+            path = f"{base}-{counter}{extension}"
+
+    @staticmethod
+    def save(image, preset, path):
+        data = encode(image, preset)
+        write_new(path, data)
+        return path
+
+    @staticmethod
+    def pipe(image, command):
+        return run_command(command, encode(image, PNG_PRESET))
+
+    @staticmethod
+    def save_scaled(image, preset, edge, path):
+        if max(image.width(), image.height()) > edge:
+            image = image.scaled(edge, edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return ActionPipeline.save(image, preset, path)
+
+    def _finished(self, job_id, name, duration, result):
+        job = self.jobs[job_id]
+        if name == "copy":
+            job.mime_data.set_encoded("image/png", result)
+            result = None
+        job.results.append((name, duration, None, result))
+        self._task_done(job_id, name)
+
+    def _failed(self, job_id, name, duration, message):
+        print(f"Aktion {ACTIONS[name]} fehlgeschlagen: {message}", file=sys.stderr)
+        self.jobs[job_id].results.append((name, duration, message, None))
+        self._task_done(job_id, name)
+
+    def _task_done(self, job_id, name):
+        job = self.jobs[job_id]
+        del job.tasks[name]
+        if job.tasks:
+            return
+        del self.jobs[job_id]
+        self.pending_bytes -= job.size
+        self.finished.emit(job.results)
+        self.message.emit(self.summary(job))
+
+    @staticmethod
+    def summary(job):
+        """Statuszeile mit Dauer bzw. Fehler jeder Aktion einer Aufnahme"""
+        parts = []
+        for name, duration, error, result in sorted(job.results, key=lambda r: list(ACTIONS).index(r[0])):
+            if error is not None:
+                parts.append(f"{ACTIONS[name]} fehlgeschlagen ({error})")
+            else:
+                detail = os.path.basename(result) if name in ("save", "scale") else result
+                parts.append(f"{ACTIONS[name]} {duration * 1000:.0f} ms" + (f" ({detail})" if detail else ""))
+        return "Nach der Aufnahme: " + ", ".join(parts)
+
+    def wait(self, msecs=-1):
+        """Wartet auf laufende Aktionen (z. B. vor dem Beenden)"""
+        return self.pool.waitForDone(msecs)
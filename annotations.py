@@ -0,0 +1,573 @@
+"""
+Annotationen für den Snipping Tool Clone
+----------------------------------------
+Grafik-Items für Zeichnungen im Editor. Strichzüge werden inkrementell
+aufgebaut: neue Punkte werden angehängt, ohne den gesamten Pfad neu zu erzeugen,
+und nur der Bereich des neuen Segments wird neu gezeichnet.
+
+Für den Radiergummi werden alle Annotationen als Polylinien in einem
+Raster-Index geführt. Radiert wird entlang der überstrichenen Strecke zwischen
+zwei Mauspositionen; getroffene Striche und Formen werden dort aufgetrennt.
+
+Ältere Annotationen wandern in eine RasterAnnotationLayer: Sie werden einmal
+in Kacheln gezeichnet und danach nur noch als Bild dargestellt. Die Items
+bleiben im Index, beim Entfernen werden nur die betroffenen Kacheln neu
+gezeichnet.
+"""
+import math
+from array import array
+from collections import defaultdict, namedtuple
+
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QBrush, QColor, QImage, QPainter, QPainterPath, QPainterPathStroker, QPen
+from PyQt5.QtWidgets import (
+    QGraphicsItem, QGraphicsEllipseItem, QGraphicsRectItem, QStyleOptionGraphicsItem
+)
+
+from redaction import BLUR, PIXELATE, RedactionItem
+
+# Punkte pro Teilpfad; beim Zeichnen werden nur sichtbare Teilpfade gestrichen
+CHUNK_SIZE = 128
+
+# Minimaler Abstand (Pixel), ab dem ein neuer Punkt übernommen wird
+MIN_POINT_DISTANCE = 0.75
+
+# Reserve (Pixel), um die die Begrenzung beim Wachsen erweitert wird. Jede
+# Änderung der Begrenzung zeichnet das ganze Item neu, daher nur selten.
+BOUNDS_PADDING = 64
+
+# Toleranz (Pixel) für die Vereinfachung nach Ramer-Douglas-Peucker
+SIMPLIFY_TOLERANCE = 0.5
+
+# Kantenlänge (Pixel) einer Zelle im Annotations-Index
+INDEX_CELL_SIZE = 64
+
+# Mindestradius (Pixel) des Radiergummis
+ERASER_RADIUS = 6
+
+# Kantenlänge (Pixel) einer Kachel der Rasterebene
+LAYER_TILE_SIZE = 256
+
+
+def simplify_polyline(points, tolerance=SIMPLIFY_TOLERANCE):
+    """Vereinfacht eine Punktliste [(x, y), ...] nach Ramer-Douglas-Peucker"""
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, len(points) - 1)]
+
+    # Iterativ statt rekursiv, damit lange Striche kein Rekursionslimit erreichen
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[first]
+        x2, y2 = points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+
+        max_dist_sq = 0.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq == 0:
+                dist_sq = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                dist_sq = cross * cross / length_sq
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                index = i
+
+        if max_dist_sq > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class StrokeItem(QGraphicsItem):
+    """Freihand-Strich (Stift oder Marker), der Punkte an Ort und Stelle anhängt"""
+
+    def __init__(self, pen, start_point, parent=None):
+        super().__init__(parent)
+        self._pen = pen
+        self.points = [(start_point.x(), start_point.y())]
+        self._pending = []
+        self._bounds = QRectF(start_point, start_point)
+        self._chunks = []  # [[QPainterPath, QRectF, Punktanzahl], ...]
+        self._rebuild_chunks()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    @classmethod
+    def from_points(cls, pen, points):
+        """Erzeugt einen abgeschlossenen Strich aus einer Punktliste [(x, y), ...]"""
+        item = cls(pen, QPointF(*points[0]))
+        item.points = list(points)
+        item._rebuild_chunks()
+        item._update_bounds()
+        return item
+
+    def pen(self):
+        return self._pen
+
+    def _update_bounds(self):
+        self.prepareGeometryChange()
+        xs = [x for x, _ in self.points]
+        ys = [y for _, y in self.points]
+        self._bounds = QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+    def _margin(self):
+        return self._pen.widthF() / 2 + 1
+
+    def _rebuild_chunks(self):
+        """Teilt die Punktliste in Teilpfade mit eigener Begrenzung auf"""
+        self._chunks = []
+        step = CHUNK_SIZE
+        for start in range(0, max(1, len(self.points) - 1), step):
+            # Teilpfade überlappen um einen Punkt, damit keine Lücken entstehen
+            chunk_points = self.points[start:start + step + 1]
+            path = QPainterPath(QPointF(*chunk_points[0]))
+            for x, y in chunk_points[1:]:
+                path.lineTo(x, y)
+            self._chunks.append([path, path.controlPointRect(), len(chunk_points)])
+
+    def add_point(self, point):
+        """Merkt einen Punkt vor; übernommen wird er beim nächsten flush()"""
+        last_x, last_y = self._pending[-1] if self._pending else self.points[-1]
+        if abs(point.x() - last_x) + abs(point.y() - last_y) < MIN_POINT_DISTANCE:
+            return
+        self._pending.append((point.x(), point.y()))
+
+    def flush(self):
+        """Hängt alle vorgemerkten Punkte an und invalidiert nur deren Bereich"""
+        if not self._pending:
+            return
+
+        new_points = self._pending
+        self._pending = []
+        xs = [x for x, _ in new_points] + [self.points[-1][0]]
+        ys = [y for _, y in new_points] + [self.points[-1][1]]
+        dirty = QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+        if not self._bounds.contains(dirty):
+            self.prepareGeometryChange()
+            pad = BOUNDS_PADDING
+            self._bounds = self._bounds.united(dirty.adjusted(-pad, -pad, pad, pad))
+
+        touched = []
+        for x, y in new_points:
+            chunk = self._chunks[-1]
+            if chunk[2] > CHUNK_SIZE:
+                # Neuer Teilpfad beginnt am letzten Punkt des vorherigen
+                chunk = [QPainterPath(QPointF(*self.points[-1])), QRectF(), 1]
+                self._chunks.append(chunk)
+            if not touched or touched[-1] is not chunk:
+                touched.append(chunk)
+            chunk[0].lineTo(x, y)
+            chunk[2] += 1
+            self.points.append((x, y))
+        for chunk in touched:
+            chunk[1] = chunk[0].controlPointRect()
+
+        margin = self._margin()
+        self.update(dirty.adjusted(-margin, -margin, margin, margin))
+
+    def finish(self):
+        """Schließt den Strich ab und vereinfacht die gespeicherten Punkte"""
+        self.flush()
+        simplified = simplify_polyline(self.points)
+        if len(simplified) < len(self.points):
+            self.points = simplified
+            self._rebuild_chunks()
+
+        # Reserve wieder auf die tatsächliche Begrenzung reduzieren
+        self._update_bounds()
+
+    def path(self):
+        """Der gesamte Strich als QPainterPath"""
+        path = QPainterPath(QPointF(*self.points[0]))
+        for x, y in self.points[1:]:
+            path.lineTo(x, y)
+        return path
+
+    def boundingRect(self):
+        margin = self._margin()
+        return self._bounds.adjusted(-margin, -margin, margin, margin)
+
+    def shape(self):
+        stroker = QPainterPathStroker()
+        stroker.setWidth(max(self._pen.widthF(), 1.0))
+        return stroker.createStroke(self.path())
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self._pen)
+        painter.setBrush(Qt.NoBrush)
+
+        if len(self.points) == 1:
+            painter.drawPoint(QPointF(*self.points[0]))
+            return
+
+        # Nur Teilpfade streichen, die den freigelegten Bereich berühren.
+        # Aufeinanderfolgende Teilpfade werden zusammengefügt, damit sich
+        # halbtransparente Marker an den Übergängen nicht doppelt überlagern.
+        margin = self._margin()
+        exposed = option.exposedRect
+        run = None
+        for path, rect, _ in self._chunks:
+            if rect.adjusted(-margin, -margin, margin, margin).intersects(exposed):
+                if run is None:
+                    run = QPainterPath(path)
+                else:
+                    run.connectPath(path)
+            elif run is not None:
+                painter.drawPath(run)
+                run = None
+        if run is not None:
+            painter.drawPath(run)
+
+
+def is_annotation(item):
+    """Wird das Item vom Radiergummi und vom Annotations-Index erfasst?"""
+    return isinstance(item, (StrokeItem, QGraphicsRectItem, QGraphicsEllipseItem, RedactionItem))
+
+
+def annotation_polyline(item):
+    """Geometrie einer Annotation als (Punktliste, geschlossen) in Szenenkoordinaten"""
+    if isinstance(item, StrokeItem):
+        return item.points, False
+    if isinstance(item, RedactionItem):
+        return item.points, True
+
+    rect = item.rect()
+    if isinstance(item, QGraphicsRectItem):
+        return [(rect.left(), rect.top()), (rect.right(), rect.top()),
+                (rect.right(), rect.bottom()), (rect.left(), rect.bottom())], True
+
+    # Ellipse: Umfang mit etwa 4 Pixel langen Segmenten annähern
+    rx, ry = rect.width() / 2, rect.height() / 2
+    cx, cy = rect.center().x(), rect.center().y()
+    count = min(256, max(16, int(math.pi * (rx + ry) / 4)))
+    return [(cx + rx * math.cos(2 * math.pi * i / count),
+             cy + ry * math.sin(2 * math.pi * i / count)) for i in range(count)], True
+
+
+def point_segment_distance_sq(px, py, ax, ay, bx, by):
+    """Quadrierter Abstand des Punktes p von der Strecke a-b"""
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    qx, qy = ax + t * dx, ay + t * dy
+    return (px - qx) ** 2 + (py - qy) ** 2
+
+
+def segment_distance_sq(a, b, c, d):
+    """Quadrierter Abstand zwischen den Strecken a-b und c-d"""
+    def orient(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    # Echte Schnittpunkte haben Abstand 0
+    if (orient(a, b, c) * orient(a, b, d) < 0) and (orient(c, d, a) * orient(c, d, b) < 0):
+        return 0.0
+    return min(point_segment_distance_sq(*a, *c, *d), point_segment_distance_sq(*b, *c, *d),
+               point_segment_distance_sq(*c, *a, *b), point_segment_distance_sq(*d, *a, *b))
+
+
+def split_polyline(points, closed, a, b, reach):
+    """Entfernt den von der Strecke a-b (Radius reach) überstrichenen Teil einer Polylinie.
+
+    Liefert die verbleibenden Teilstücke oder None, wenn nichts getroffen wurde.
+    """
+    reach_sq = reach * reach
+    min_x, max_x = min(a[0], b[0]) - reach, max(a[0], b[0]) + reach
+    min_y, max_y = min(a[1], b[1]) - reach, max(a[1], b[1]) + reach
+    pts = list(points) + [points[0]] if closed else points
+
+    hit = False
+    runs = []
+    run = []
+    for i in range(len(pts) - 1):
+        p, q = pts[i], pts[i + 1]
+        if (max(p[0], q[0]) < min_x or min(p[0], q[0]) > max_x
+                or max(p[1], q[1]) < min_y or min(p[1], q[1]) > max_y
+                or segment_distance_sq(p, q, a, b) > reach_sq):
+            # Segment unberührt
+            if run:
+                run.append(q)
+            else:
+                run = [p, q]
+            continue
+
+        # Getroffenes Segment fein unterteilen und nur die berührten Stücke entfernen
+        hit = True
+        steps = max(1, math.ceil(math.hypot(q[0] - p[0], q[1] - p[1]) / (reach / 2)))
+        for k in range(steps + 1):
+            t = k / steps
+            sample = (p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+            if point_segment_distance_sq(*sample, *a, *b) > reach_sq:
+                if not (k == 0 and run and run[-1] == p):
+                    run.append(sample)
+            else:
+                if len(run) >= 2:
+                    runs.append(run)
+                run = []
+
+    if not hit:
+        return None
+    if len(run) >= 2:
+        # Bei geschlossenen Formen hängen letztes und erstes Teilstück zusammen
+        if closed and runs and runs[0][0] == pts[0] and run[-1] == pts[-1]:
+            runs[0] = run + runs[0][1:]
+        else:
+            runs.append(run)
+    return runs
+
+
+class AnnotationIndex:
+    """Raster-Index über die Segmente aller Annotationen einer Szene"""
+
+    def __init__(self, cell_size=INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = defaultdict(set)
+        self._item_cells = {}
+
+    def __len__(self):
+        return len(self._item_cells)
+
+    def __contains__(self, item):
+        return item in self._item_cells
+
+    def _cells_for_rect(self, min_x, min_y, max_x, max_y):
+        size = self.cell_size
+        for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+                yield cx, cy
+
+    def insert(self, item):
+        """Trägt ein Item in alle Zellen ein, die seine Segmente berühren"""
+        points, closed = annotation_polyline(item)
+        if closed:
+            points = list(points) + [points[0]]
+        margin = item.pen().widthF() / 2
+        step = self.cell_size
+
+        cells = set()
+        for (ax, ay), (bx, by) in zip(points, points[1:] or points):
+            # Lange Segmente unterteilen, damit nur Zellen entlang der Linie belegt werden
+            pieces = max(1, math.ceil(math.hypot(bx - ax, by - ay) / step))
+            for k in range(pieces):
+                x1, y1 = ax + (bx - ax) * k / pieces, ay + (by - ay) * k / pieces
+                x2, y2 = ax + (bx - ax) * (k + 1) / pieces, ay + (by - ay) * (k + 1) / pieces
+                cells.update(self._cells_for_rect(min(x1, x2) - margin, min(y1, y2) - margin,
+                                                  max(x1, x2) + margin, max(y1, y2) + margin))
+        for cell in cells:
+            self._cells[cell].add(item)
+        self._item_cells[item] = cells
+
+    def remove(self, item):
+        for cell in self._item_cells.pop(item, ()):
+            bucket = self._cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[cell]
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """Alle Items, deren Zellen das Rechteck berühren"""
+        found = set()
+        for cell in self._cells_for_rect(min_x, min_y, max_x, max_y):
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def query_segment(self, a, b, reach):
+        """Alle Items in Zellen entlang der Strecke a-b (Radius reach)"""
+        (ax, ay), (bx, by) = a, b
+        pieces = max(1, math.ceil(math.hypot(bx - ax, by - ay) / self.cell_size))
+        found = set()
+        for k in range(pieces):
+            x1, y1 = ax + (bx - ax) * k / pieces, ay + (by - ay) * k / pieces
+            x2, y2 = ax + (bx - ax) * (k + 1) / pieces, ay + (by - ay) * (k + 1) / pieces
+            found |= self.query(min(x1, x2) - reach, min(y1, y2) - reach,
+                                max(x1, x2) + reach, max(y1, y2) + reach)
+        return found
+
+
+# Art einer Annotation in AnnotationRecord
+KIND_STROKE = 1
+KIND_RECTANGLE = 2
+KIND_ELLIPSE = 3
+KIND_PIXELATE = 4
+KIND_BLUR = 5
+
+# Art einer Schwärzung <-> Effekt
+REDACTION_KINDS = {KIND_PIXELATE: PIXELATE, KIND_BLUR: BLUR}
+REDACTION_EFFECTS = {effect: kind for kind, effect in REDACTION_KINDS.items()}
+
+# Kompakte, vom Grafik-Item unabhängige Beschreibung einer Annotation.
+# coords ist ein array('f') mit x, y, x, y, ... bzw. x, y, Breite, Höhe bei Formen.
+# Bei Schwärzungen steht in width die Stärke und coords ist das Polygon.
+AnnotationRecord = namedtuple("AnnotationRecord", "kind color width round_cap coords")
+
+
+def annotation_record(item):
+    """Beschreibt eine Annotation kompakt als AnnotationRecord"""
+    if isinstance(item, RedactionItem):
+        coords = array("f", [c for point in item.points for c in point])
+        return AnnotationRecord(REDACTION_EFFECTS[item.effect], 0, float(item.strength), False, coords)
+
+    pen = item.pen()
+    style = (pen.color().rgba(), pen.widthF(), pen.capStyle() == Qt.RoundCap)
+    if isinstance(item, StrokeItem):
+        coords = array("f", [c for point in item.points for c in point])
+        return AnnotationRecord(KIND_STROKE, *style, coords)
+
+    rect = item.rect()
+    kind = KIND_RECTANGLE if isinstance(item, QGraphicsRectItem) else KIND_ELLIPSE
+    return AnnotationRecord(kind, *style, array("f", [rect.x(), rect.y(), rect.width(), rect.height()]))
+
+
+def record_size(record):
+    """Ungefährer Speicherbedarf eines AnnotationRecord in Bytes"""
+    return 64 + record.coords.itemsize * len(record.coords)
+
+
+def item_from_record(record):
+    """Erzeugt aus einem AnnotationRecord wieder ein Grafik-Item"""
+    if record.kind in REDACTION_KINDS:
+        coords = record.coords
+        return RedactionItem(REDACTION_KINDS[record.kind], record.width, list(zip(coords[0::2], coords[1::2])))
+
+    pen = QPen(QColor.fromRgba(record.color), record.width)
+    if record.round_cap:
+        pen.setCapStyle(Qt.RoundCap)
+        pen.setJoinStyle(Qt.RoundJoin)
+
+    coords = record.coords
+    if record.kind == KIND_STROKE:
+        return StrokeItem.from_points(pen, list(zip(coords[0::2], coords[1::2])))
+
+    rect = QRectF(*coords)
+    item = QGraphicsRectItem(rect) if record.kind == KIND_RECTANGLE else QGraphicsEllipseItem(rect)
+    item.setPen(pen)
+    item.setBrush(QBrush(Qt.NoBrush))
+    return item
+
+
+class RasterAnnotationLayer(QGraphicsItem):
+    """Rasterebene für eingeebnete Annotationen, gezeichnet als Kacheln"""
+
+    def __init__(self, rect, parent=None):
+        super().__init__(parent)
+        self._rect = QRectF(rect)
+        # Annotations-ID -> Item; gezeichnet wird in der Reihenfolge der IDs
+        self.items = {}
+        # Höchste je eingeebnete ID (bleibt beim Entfernen erhalten)
+        self.newest = 0
+        self._tiles = {}  # (tx, ty) -> QImage
+        self._tile_items = defaultdict(set)  # (tx, ty) -> Annotations-IDs
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return self.items.get(item.annotation_id) is item
+
+    def memory_used(self):
+        return len(self._tiles) * LAYER_TILE_SIZE * LAYER_TILE_SIZE * 4
+
+    def _tile_keys(self, rect):
+        rect = rect.intersected(self._rect)
+        if rect.isEmpty():
+            return []
+        size = LAYER_TILE_SIZE
+        return [(tx, ty)
+                for ty in range(int(rect.top() // size), int(math.ceil(rect.bottom() / size)))
+                for tx in range(int(rect.left() // size), int(math.ceil(rect.right() / size)))]
+
+    @staticmethod
+    def _tile_rect(key):
+        return QRectF(key[0] * LAYER_TILE_SIZE, key[1] * LAYER_TILE_SIZE, LAYER_TILE_SIZE, LAYER_TILE_SIZE)
+
+    def _new_tile(self):
+        image = QImage(LAYER_TILE_SIZE, LAYER_TILE_SIZE, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        return image
+
+    def _paint_items(self, image, key, items):
+        tile_rect = self._tile_rect(key)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-tile_rect.topLeft())
+        for item in items:
+            option = QStyleOptionGraphicsItem()
+            option.exposedRect = item.mapRectFromScene(tile_rect)
+            painter.save()
+            painter.setTransform(item.sceneTransform(), True)
+            painter.setOpacity(item.opacity())
+            item.paint(painter, option, None)
+            painter.restore()
+        painter.end()
+
+    def add(self, item):
+        """Ebnet ein Item ein; das neueste wird nur über die vorhandenen Kacheln gezeichnet
+
+        Ein älteres Item (z. B. durch Rückgängig wiederhergestellt) kommt unter die
+        neueren; nur die Kacheln, die es berührt, werden dafür neu gezeichnet.
+        """
+        annotation_id = item.annotation_id
+        self.items[annotation_id] = item
+        self.newest = max(self.newest, annotation_id)
+        rect = item.sceneBoundingRect()
+        for key in self._tile_keys(rect):
+            ids = self._tile_items[key]
+            ids.add(annotation_id)
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = self._tiles[key] = self._new_tile()
+            if annotation_id == max(ids):
+                self._paint_items(tile, key, [item])
+            else:
+                self._repaint_tile(tile, key)
+        self.update(rect)
+
+    def _repaint_tile(self, tile, key):
+        tile.fill(Qt.transparent)
+        self._paint_items(tile, key, [self.items[i] for i in sorted(self._tile_items[key])])
+
+    def remove(self, item):
+        """Nimmt ein Item heraus und zeichnet nur die Kacheln neu, die es berührt hat"""
+        annotation_id = item.annotation_id
+        del self.items[annotation_id]
+        rect = item.sceneBoundingRect()
+        for key in self._tile_keys(rect):
+            ids = self._tile_items[key]
+            ids.discard(annotation_id)
+            if not ids:
+                del self._tile_items[key]
+                self._tiles.pop(key, None)
+                continue
+            self._repaint_tile(self._tiles[key], key)
+        self.update(rect)
+
+    def clear(self):
+        self.items.clear()
+        self.newest = 0
+        self._tiles.clear()
+        self._tile_items.clear()
+        self.update()
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        # Nur sichtbare Kacheln, der Aufwand hängt nicht von der Zahl der Annotationen ab
+        for key in self._tile_keys(option.exposedRect):
+            tile = self._tiles.get(key)
+            if tile is not None:
+                painter.drawImage(self._tile_rect(key).topLeft(), tile)
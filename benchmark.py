@@ -0,0 +1,1017 @@
+"""
+Benchmarks für den Snipping Tool Clone
+--------------------------------------
+Misst die Latenz der zeitkritischen Pfade ohne echten Desktop, z. B. unter Xvfb
+oder mit der Qt-Plattform offscreen (Standard, wenn kein Display gesetzt ist):
+
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmark.py capture
+    python benchmark.py suite --json result.json --baseline baseline.json
+
+Mit --json werden alle Messreihen maschinenlesbar gespeichert, --baseline
+vergleicht die Mediane mit einem früheren Ergebnis und endet mit Status 1,
+wenn eine Messung um mehr als --tolerance langsamer geworden ist. Die
+Baseline muss auf demselben Rechner erzeugt werden; das Repository enthält
+bewusst keine.
+"""
+import argparse
+import itertools
+import json
+import math
+import platform
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import Qt, QEvent, QPointF
+from PyQt5.QtGui import QImage, QMouseEvent
+from PyQt5.QtWidgets import QApplication
+
+# Typische Aufnahmegrößen
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+
+# Aufgezeichnete Mausereignisse (Ausgabe von SNIPPING_TOOL_TRACE), von bench_suite in der
+# Reihenfolge der Dateinamen in derselben Szene abgespielt (der Radierer zuletzt)
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+# Fenstergröße beim Aufzeichnen; die Ereignisse liegen im sichtbaren Bereich einer 1080p-Szene
+TRACE_WINDOW = (2000, 1200)
+
+# Ergebnisse aller Messreihen für --json: "Benchmark/Messung" -> Kennzahlen in ms
+RESULTS = {}
+_section = ""
+
+# QApplication der Benchmarks; ohne Referenz gäbe Python sie sofort wieder frei
+_app = None
+
+
+def report(name, samples):
+    """Gibt Median, p95 und Maximum einer Messreihe (Sekunden) in Millisekunden aus"""
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<28} n={len(samples):<5} p50={p50 * 1000:8.2f} ms"
+          f"  p95={p95 * 1000:8.2f} ms  max={samples[-1] * 1000:8.2f} ms")
+    RESULTS[f"{_section}/{' '.join(name.split())}"] = {
+        "n": len(samples),
+        "p50_ms": round(p50 * 1000, 4),
+        "p95_ms": round(p95 * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+
+
+def sample_image(width, height):
+    """Erzeugt ein Testbild mit Verlauf, damit die Kodierung realistisch bleibt"""
+    image = QImage(width, height, QImage.Format_RGB32)
+    row = bytes(((x * 255 // width) & 0xFF) for x in range(width)) * 4
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    for y in range(height):
+        bits[y * image.bytesPerLine():y * image.bytesPerLine() + len(row)] = row
+    return image
+
+
+def timed(func, repeat):
+    """Führt func repeat-mal aus und liefert die Laufzeiten in Sekunden"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_capture(args):
+    """Latenz pro Aufnahme für jedes verfügbare Backend"""
+    from capture import BACKENDS
+
+    for cls in BACKENDS:
+        if not cls.available():
+            print(f"{cls.name:<28} nicht verfügbar")
+            continue
+        backend = cls()
+        backend.grab()  # Aufwärmen
+        report(cls.name, timed(backend.grab, args.repeat))
+        if backend.threaded and len(backend.monitors()) > 1:
+            # Vergleich: Monitore nacheinander statt parallel aufnehmen
+            backend.threaded = False
+            report(f"{cls.name} ({len(backend.monitors())} Monitore seriell)", timed(backend.grab, args.repeat))
+        backend.close()
+
+
+def stroke_trace(moves, cx=960, cy=540, phase=0.0):
+    """Mausereignisse für einen spiralförmigen Strich: [(Typ, x, y), ...]"""
+    events = []
+    for i in range(moves + 1):
+        angle = phase + i * 0.05
+        radius = 20 + i * 0.2
+        x = cx + radius * math.cos(angle)
+        y = cy + radius * math.sin(angle)
+        events.append(("press" if i == 0 else "move", x, y))
+    events.append(("release", x, y))
+    return events
+
+
+EVENT_TYPES = {
+    "press": QEvent.MouseButtonPress,
+    "move": QEvent.MouseMove,
+    "release": QEvent.MouseButtonRelease,
+}
+
+
+def send_mouse_event(view, kind, x, y):
+    """Schickt ein synthetisches Mausereignis (Szenenkoordinaten) mit linker Taste an die Ansicht"""
+    pos = QPointF(view.mapFromScene(QPointF(x, y)))
+    button = Qt.LeftButton if kind != "move" else Qt.NoButton
+    buttons = Qt.LeftButton if kind != "release" else Qt.NoButton
+    event = QMouseEvent(EVENT_TYPES[kind], pos, button, buttons, Qt.NoModifier)
+    QApplication.sendEvent(view.viewport(), event)
+
+
+def replay(view, events, on_event=None):
+    """Spielt eine Ereignisliste in einer QGraphicsView ab; on_event folgt jedem Ereignis"""
+    for kind, x, y in events:
+        send_mouse_event(view, kind, x, y)
+        if on_event:
+            on_event(kind)
+
+
+def load_trace(path):
+    """Szenen-Ereignisse einer Latenz-Aufzeichnung: [(Werkzeug, Typ, x, y), ...]"""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            kind = entry["stage"].partition("scene.")[2]
+            if kind in EVENT_TYPES:
+                events.append((entry["tool"], kind, entry["x"], entry["y"]))
+    return events
+
+
+def bench_suite(args):
+    """Editor laden, Aufzeichnungen abspielen, Neuzeichnen und Export in 1080p, 4K und 8K"""
+    from editor import EditorWidget
+    from export import ExportTask
+
+    app = QApplication.instance()
+    traces = {os.path.splitext(name)[0].partition("-")[2]: load_trace(os.path.join(TRACE_DIR, name))
+              for name in sorted(os.listdir(TRACE_DIR)) if name.endswith(".jsonl")}
+    repeat = max(1, args.repeat // 4)
+
+    for label, (width, height) in SIZES.items():
+        image = sample_image(width, height)
+
+        def load():
+            editor = EditorWidget(image)
+            editor.resize(1280, 800)
+            editor.show()
+            editor.view.viewport().repaint()
+            editor.close()
+
+        report(f"{label} Editor laden", timed(load, repeat))
+
+        editor = EditorWidget(image)
+        editor.resize(*TRACE_WINDOW)
+        editor.show()
+        editor.view.set_zoom(1.0, animated=False)
+        app.processEvents()
+        scene, view = editor.scene, editor.view
+
+        # Gleiche Ereignisse in jeder Bildgröße, damit nur die Szenengröße den Unterschied macht
+        for name, events in traces.items():
+            samples = []
+            for tool, kind, x, y in events:
+                start = time.perf_counter()
+                scene.current_tool = tool
+                send_mouse_event(view, kind, x, y)
+                scene.flush_stroke()
+                app.processEvents()
+                samples.append(time.perf_counter() - start)
+            report(f"{label} {name}", samples)
+
+        report(f"{label} Ansicht zeichnen", frame_times(view, [lambda: None] * args.repeat))
+
+        def flatten():
+            editor.composite.invalidate(scene.sceneRect())
+            editor.composite.image()
+
+        report(f"{label} Gesamtbild", timed(flatten, repeat))
+        composite = editor.composite.image()
+        for fmt in ("PNG", "JPEG"):
+            report(f"{label} Export {fmt}", timed(lambda: ExportTask(composite, fmt).run(), repeat))
+        editor.close()
+
+
+def bench_strokes(args):
+    """Latenz pro Mausereignis beim Zeichnen in Abhängigkeit von Strichlänge und Szenengröße"""
+    from editor import DrawingTool, EditorWidget
+
+    app = QApplication.instance()
+    for tool_name, tool in (("pen", DrawingTool.PEN), ("marker", DrawingTool.MARKER)):
+        for existing in (0, 200, 1000):
+            editor = EditorWidget(sample_image(1920, 1080))
+            editor.resize(1280, 800)
+            editor.show()
+            scene = editor.scene
+            scene.current_tool = tool
+            for i in range(existing):
+                replay(editor.view, stroke_trace(50, 100 + (i * 37) % 1700, 100 + (i * 53) % 900, phase=i))
+            app.processEvents()
+
+            samples = []
+            last = time.perf_counter()
+
+            def measure(kind):
+                nonlocal last
+                # Strich übernehmen und neu zeichnen lassen, wie es der Timer täte
+                scene.flush_stroke()
+                app.processEvents()
+                now = time.perf_counter()
+                samples.append(now - last)
+                last = now
+
+            replay(editor.view, stroke_trace(args.stroke_length), measure)
+            bucket = max(1, len(samples) // 10)
+            report(f"{tool_name} {existing:>4} Striche, Anfang", samples[1:bucket + 1])
+            report(f"{tool_name} {existing:>4} Striche, Ende", samples[-bucket - 1:-1])
+            editor.close()
+
+
+def bench_eraser(args):
+    """Latenz pro Mausereignis beim Radieren in Szenen mit vielen Annotationen"""
+    from editor import DrawingTool, EditorWidget
+
+    app = QApplication.instance()
+    for existing in (1000, 5000):
+        editor = EditorWidget(sample_image(1920, 1080))
+        editor.resize(1280, 800)
+        editor.show()
+        scene = editor.scene
+        for i in range(existing):
+            scene.current_tool = (DrawingTool.PEN, DrawingTool.RECTANGLE, DrawingTool.ELLIPSE)[i % 3]
+            x, y = 100 + (i * 37) % 1700, 100 + (i * 53) % 900
+            if scene.current_tool == DrawingTool.PEN:
+                replay(editor.view, stroke_trace(30, x, y, phase=i))
+            else:
+                replay(editor.view, [("press", x, y), ("move", x + 40, y + 30), ("release", x + 40, y + 30)])
+        app.processEvents()
+
+        scene.current_tool = DrawingTool.ERASER
+        samples = []
+        last = time.perf_counter()
+
+        def measure(kind):
+            nonlocal last
+            app.processEvents()
+            now = time.perf_counter()
+            samples.append(now - last)
+            last = now
+
+        # Schnelle Zickzack-Bewegung über die gesamte Szene
+        trace = [("press", 50, 50)]
+        trace += [("move", 50 + i * 9, 50 + (i % 20) * 50) for i in range(1, 200)]
+        trace.append(("release", *trace[-1][1:]))
+        replay(editor.view, trace, measure)
+        report(f"eraser {existing:>5} Annotationen", samples[1:-1])
+        print(f"{'':<28} verbleibende Annotationen: {len(scene.annotation_index)}")
+        editor.close()
+
+
+def bench_redaction(args):
+    """Schwärzen großer Bereiche: Effekt auf 4K und Latenz pro Mausereignis beim Aufziehen"""
+    from editor import DrawingTool, EditorWidget
+    from redaction import numpy, pixelate, box_blur
+
+    width, height = SIZES["4K"]
+    image = sample_image(width, height)
+    print(f"{'numpy':<28} {'ja' if numpy is not None else 'nein (Qt-Skalierung)'}")
+    repeat = max(1, args.repeat // 4)
+    report("4K pixelate (16 px)", timed(lambda: pixelate(image, 16), repeat))
+    report("4K box_blur (r=12)", timed(lambda: box_blur(image, 12), repeat))
+
+    app = QApplication.instance()
+    for tool_name, tool in (("pixelate", DrawingTool.PIXELATE), ("blur", DrawingTool.BLUR)):
+        for freehand in (False, True):
+            editor = EditorWidget(image)
+            editor.resize(1920, 1080)
+            editor.show()
+            editor.view.set_zoom(0.5, animated=False)
+            scene = editor.scene
+            scene.current_tool = tool
+            scene.current_width = 4
+            scene.redaction_freehand = freehand
+            app.processEvents()
+
+            samples = []
+            last = time.perf_counter()
+
+            def measure(kind):
+                nonlocal last
+                app.processEvents()
+                now = time.perf_counter()
+                samples.append(now - last)
+                last = now
+
+            # Diagonal über (fast) die gesamte 4K-Aufnahme aufziehen
+            steps = args.stroke_length // 10
+            trace = [("press", 20, 20)]
+            trace += [("move", 20 + (width - 40) * i / steps, 20 + (height - 40) * (i / steps) ** 2)
+                      for i in range(1, steps + 1)]
+            trace.append(("release", *trace[-1][1:]))
+            replay(editor.view, trace, measure)
+            shape = "Freihand" if freehand else "Rechteck"
+            report(f"{tool_name} 4K {shape}", samples[1:-1])
+            editor.close()
+
+
+def frame_times(view, steps):
+    """Zeit für jedes synchrone Neuzeichnen der Ansicht nach einem Schritt"""
+    samples = []
+    for step in steps:
+        step()
+        start = time.perf_counter()
+        view.viewport().repaint()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_layer(args):
+    """Bildzeit beim Verschieben mit vielen Marker-Strichen, mit und ohne Rasterebene"""
+    from editor import DrawingTool, EditorWidget
+
+    app = QApplication.instance()
+    for existing in (200, 2000):
+        for label, budget in (("Vektor", existing + 1), ("Raster", 50)):
+            editor = EditorWidget(sample_image(1920, 1080))
+            editor.resize(1280, 800)
+            editor.show()
+            scene = editor.scene
+            scene.flatten_budget = budget
+            scene.current_tool = DrawingTool.MARKER
+            scene.current_width = 12
+            for i in range(existing):
+                replay(editor.view, stroke_trace(50, 100 + (i * 37) % 1700, 100 + (i * 53) % 900, phase=i))
+            app.processEvents()
+            editor.view.set_zoom(1.5, animated=False)
+            view = editor.view
+
+            def pan():
+                bar = view.horizontalScrollBar()
+                bar.setValue((bar.value() + 40) % max(1, bar.maximum()))
+
+            report(f"{existing:>4} Marker, {label}", frame_times(view, [pan] * args.repeat * 2))
+            print(f"{'':<28} Items: {len(scene.vector_items)} Vektor, {len(scene.annotation_layer)} Raster "
+                  f"({scene.annotation_layer.memory_used() / 2**20:.1f} MB)")
+            editor.close()
+
+
+def bench_view(args):
+    """Bildzeiten beim Verschieben und Zoomen einer 8K-Aufnahme im Editor"""
+    from PyQt5.QtGui import QPainter, QPixmap
+    from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView
+    from editor import EditorWidget
+    from workers import worker_pool
+
+    app = QApplication.instance()
+    image = sample_image(*SIZES["8K"])
+
+    # Vergleich: bisherige Darstellung als ein einziges QGraphicsPixmapItem
+    plain_scene = QGraphicsScene()
+    plain_scene.addPixmap(QPixmap.fromImage(image))
+    plain_view = QGraphicsView(plain_scene)
+    plain_view.setRenderHint(QPainter.Antialiasing)
+    plain_view.setRenderHint(QPainter.SmoothPixmapTransform)
+
+    editor = EditorWidget(image)
+    worker_pool().waitForDone()  # Bildpyramide fertigstellen
+    app.processEvents()
+
+    for label, window, view in (("pixmap", plain_view, plain_view), ("tiled", editor, editor.view)):
+        window.resize(1920, 1080)
+        window.show()
+        app.processEvents()
+
+        def pan():
+            bar = view.horizontalScrollBar()
+            bar.setValue((bar.value() + 40) % max(1, bar.maximum()))
+
+        zoom_levels = [1.0 / (1 + (i % 16) * 0.25) for i in range(args.repeat * 2)]
+
+        def zoom(levels=itertools.cycle(zoom_levels)):
+            factor = next(levels)
+            view.resetTransform()
+            view.scale(factor, factor)
+
+        # Erster Durchlauf füllt Caches, gemessen wird der zweite
+        for _ in range(2):
+            view.resetTransform()
+            pan_samples = frame_times(view, [pan] * args.repeat * 2)
+            zoom_samples = frame_times(view, [zoom] * len(zoom_levels))
+        report(f"{label} pan 8K", pan_samples)
+        report(f"{label} zoom 8K", zoom_samples)
+
+        if view is editor.view:
+            # Während der Zoom-Animation zeichnet der Editor ohne Glättung
+            view.setRenderHint(QPainter.SmoothPixmapTransform, False)
+            report(f"{label} zoom 8K (Animation)", frame_times(view, [zoom] * len(zoom_levels)))
+            view.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        window.hide()
+    editor.close()
+
+
+def bench_document(args):
+    """Speichern und Laden eines Annotationsdokuments mit vielen Strichpunkten"""
+    from annotations import KIND_STROKE, AnnotationRecord
+    from array import array
+    from document import read_document, write_document
+    from editor import EditorWidget
+
+    app = QApplication.instance()
+    records = []
+    for i in range(500):
+        points = [c for _, x, y in stroke_trace(100, 100 + (i * 37) % 1700, 100 + (i * 53) % 900, phase=i)[:-1]
+                  for c in (x, y)]
+        records.append(AnnotationRecord(KIND_STROKE, 0xFFFF0000, 2.0, False, array("f", points)))
+    points = sum(len(r.coords) // 2 for r in records)
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "capture.png")
+        sample_image(1920, 1080).save(image_path)
+        path = os.path.join(directory, "capture.snip")
+
+        report(f"write {points} Punkte", timed(lambda: write_document(path, image_path, 1920, 1080, records),
+                                               args.repeat))
+        print(f"{'':<28} Dateigröße: {os.path.getsize(path) / 1024:.1f} KiB")
+        report(f"read {points} Punkte", timed(lambda: read_document(path), args.repeat))
+
+        # Zeit bis zum sichtbaren Basisbild und bis alle Annotationen geladen sind
+        visible, complete = [], []
+        for _ in range(max(1, args.repeat // 4)):
+            start = time.perf_counter()
+            document = read_document(path)
+            editor = EditorWidget(image_path=document.image_path)
+            editor.show()
+            editor.repaint()
+            visible.append(time.perf_counter() - start)
+            editor.load_annotations(document.records)
+            while editor.pending_records:
+                app.processEvents()
+            complete.append(time.perf_counter() - start)
+            editor.close()
+        report("open: Bild sichtbar", visible)
+        report("open: Annotationen geladen", complete)
+
+
+def bench_countdown(args):
+    """Abweichung des Auslösens von der Frist bei verzögerter Aufnahme mit vorbereitetem Backend"""
+    from PyQt5.QtCore import QEventLoop
+    from capture import select_backend
+    from countdown import CountdownOverlay
+
+    backend = select_backend()
+    jitter = []
+    for _ in range(max(1, args.repeat // 4)):
+        overlay = CountdownOverlay(1, prepare=backend.arm if backend else None)
+        loop = QEventLoop()
+        overlay.finished.connect(loop.quit)
+        overlay.show()
+        loop.exec_()
+        jitter.append(abs(overlay.jitter))
+        if backend:
+            backend.grab()
+        overlay.deleteLater()
+    report("countdown |Abweichung|", jitter)
+    if backend:
+        backend.close()
+
+
+GUI_STARTUP = (
+    "import sys; from PyQt5.QtWidgets import QApplication; app = QApplication(sys.argv[:1]); "
+    "import main; window = main.SnippingTool(); window.show(); app.processEvents()"
+)
+
+
+def cold_start(command, repeat):
+    """Laufzeiten eines neuen Python-Prozesses; None, falls er fehlschlägt"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            print(f"{'':<28} fehlgeschlagen: {result.stderr.decode(errors='replace').strip()[-200:]}")
+            return None
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_cli(args):
+    """Kaltstart bis zur geschriebenen Datei (CLI) im Vergleich zum Hauptfenster"""
+    repeat = max(1, args.repeat // 4)
+    with tempfile.TemporaryDirectory() as directory:
+        out = os.path.join(directory, "capture.png")
+        samples = cold_start([sys.executable, "main.py", "--mode", "full", "--out", out], repeat)
+        if samples:
+            report("cli full -> Datei", samples)
+
+    samples = cold_start([sys.executable, "-c", GUI_STARTUP], repeat)
+    if samples:
+        report("gui -> Fenster sichtbar", samples)
+
+
+def bench_freeform(args):
+    """Lasso auf einem 4K-Overlay: Bildzeit pro Mausbewegung und Maskieren des Ergebnisses"""
+    from selection import FreeformSelector, freeform_crop
+
+    width, height = SIZES["4K"]
+    frame = sample_image(width, height)
+    app = QApplication.instance()
+    events = stroke_trace(args.stroke_length, width // 2, height // 2)
+
+    for label, full_repaint in (("dirty", False), ("vollständig", True)):
+        selector = FreeformSelector(frame)
+        selector.setGeometry(0, 0, width, height)
+        selector.show()
+        app.processEvents()
+        samples = []
+        path = []
+        selector.selected.connect(path.append)
+        for kind, x, y in events:
+            start = time.perf_counter()
+            event = QMouseEvent(EVENT_TYPES[kind], QPointF(x, y), Qt.LeftButton,
+                                Qt.LeftButton if kind != "release" else Qt.NoButton, Qt.NoModifier)
+            QApplication.sendEvent(selector, event)
+            if full_repaint and kind == "move":
+                selector.update()
+            app.processEvents()
+            samples.append(time.perf_counter() - start)
+        report(f"4K Lasso ({label})", samples)
+        selector.close()
+
+    report("4K freeform_crop", timed(lambda: freeform_crop(frame, path[0]), args.repeat))
+
+
+def bench_window(args):
+    """Fensterauswahl auf 4K: Trefferabfrage im Fensterindex und Bildzeit pro Mausbewegung"""
+    import random
+    from PyQt5.QtCore import QRect
+    from selection import WindowSelector
+    from windows import WindowIndex
+
+    width, height = SIZES["4K"]
+    rng = random.Random(1)
+    index = WindowIndex()
+    index.rebuild([(window_id, QRect(rng.randrange(width - 200), rng.randrange(height - 200),
+                                     rng.randint(200, 1600), rng.randint(150, 1000)))
+                   for window_id in range(1, 201)])
+    points = [(rng.randrange(width), rng.randrange(height)) for _ in range(1000)]
+    report("200 Fenster, 1000x window_at", timed(lambda: [index.window_at(x, y) for x, y in points], args.repeat))
+
+    app = QApplication.instance()
+    selector = WindowSelector(sample_image(width, height), index)
+    selector.setGeometry(0, 0, width, height)
+    selector.show()
+    app.processEvents()
+    samples = []
+    for x, y in points[:args.stroke_length]:
+        start = time.perf_counter()
+        event = QMouseEvent(QEvent.MouseMove, QPointF(x, y), Qt.NoButton, Qt.NoButton, Qt.NoModifier)
+        QApplication.sendEvent(selector, event)
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    report("4K Fenster-Hover", samples)
+    selector.close()
+
+
+def recording_frames(width, height, count):
+    """Synthetische Aufnahme: bewegter Cursor, wachsender Text, jeder dritte Frame unverändert"""
+    from PyQt5.QtGui import QColor, QPainter
+
+    base = sample_image(width, height)
+    frame = base
+    for i in range(count):
+        if i % 3 != 2:
+            frame = base.copy()
+            painter = QPainter(frame)
+            painter.fillRect(100 + i * 5 % (width - 200), 200 + i * 3 % (height - 300), 24, 32, QColor("black"))
+            painter.fillRect(100, height - 80, 10 * i % (width - 200) + 10, 20, QColor("darkblue"))
+            painter.end()
+        yield frame
+
+
+def bench_recording(args):
+    """CPU pro Frame, Speicher des Rings und Kodierzeit für 30 s 1080p bei 10 fps"""
+    from recording import RECORDING_FPS, RECORDING_MEMORY_LIMIT, FrameRing, write_apng, write_gif
+
+    count = 30 * RECORDING_FPS
+    ring = FrameRing()
+    cpu = []
+    peak = 0
+    for i, frame in enumerate(recording_frames(1920, 1080, count)):
+        start = time.process_time()
+        ring.add(frame, i / RECORDING_FPS)
+        cpu.append(time.process_time() - start)
+        peak = max(peak, ring.memory_used)
+    ring.finish(count / RECORDING_FPS)
+
+    report("Frame-Differenz (CPU)", cpu)
+    print(f"{'CPU-Anteil bei 10 fps':<28} {statistics.mean(cpu) * RECORDING_FPS * 100:.1f} %")
+    print(f"{'Ring':<28} {len(ring)} Frames, {ring.collapsed} zusammengefasst, "
+          f"max. {peak / 2**20:.1f} MB von {RECORDING_MEMORY_LIMIT / 2**20:.0f} MB (+ 2 Vollbilder)")
+    frames = ring.sequence()
+    for name, writer in (("APNG", write_apng), ("GIF", write_gif)):
+        with tempfile.TemporaryFile() as f:
+            start = time.process_time()
+            writer(f, frames)
+            elapsed = time.process_time() - start
+            print(f"{name + ' kodieren':<28} {elapsed * 1000:8.1f} ms CPU, {f.tell() / 2**10:.0f} KB")
+
+
+def bench_history(args):
+    """Ablegen einer Aufnahme und Öffnen des Verlaufs-Panels mit 3000 Einträgen"""
+    from history import HistoryStore, HistoryView
+    from workers import worker_pool
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory)
+        image = sample_image(*SIZES["1080p"])
+        counter = itertools.count()
+
+        def store_changed():
+            image.setPixel(next(counter) % image.width(), 0, 0xFF000000)
+            store.store(image, "Vollbild-Ausschnitt")
+
+        report("1080p ablegen (Worker)", timed(store_changed, max(1, args.repeat // 4)))
+
+        small = sample_image(64, 40)
+        for i in range(3000):
+            small.setPixel(0, 0, 0xFF000000 | i)
+            store.store(small, "Rechteckiger Ausschnitt")
+        worker_pool().waitForDone()
+
+        app = QApplication.instance()
+        views = []
+
+        def open_panel():
+            view = HistoryView(store)
+            view.resize(400, 600)
+            view.show()
+            view.repaint()
+            views.append(view)
+
+        report(f"Verlauf öffnen ({len(store.entries())})", timed(open_panel, args.repeat))
+        for _ in range(3):
+            worker_pool().waitForDone()
+            app.processEvents()
+        loaded = len(views[-1].model().thumbnails)
+        print(f"{'Vorschaubilder geladen':<28} {loaded} von {views[-1].model().rowCount()}")
+        for view in views:
+            view.close()
+
+
+def bench_startup(args):
+    """Dauer der Startphasen des Hauptfensters bis zum ersten Zeichnen"""
+    from latency import TRACE_ENV
+
+    phases = {}
+    env = dict(os.environ, **{TRACE_ENV: "exit"})
+    for _ in range(max(1, args.repeat // 4)):
+        result = subprocess.run([sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
+        for line in result.stderr.decode(errors="replace").splitlines():
+            # JSON-Zeilen der Stufen startup.<Phase> und startup (gesamter Start)
+            if not line.startswith("{"):
+                continue
+            sample = json.loads(line)
+            if sample["stage"] == "startup" or sample["stage"].startswith("startup."):
+                phase = sample["stage"].partition(".")[2] or "gesamt"
+                phases.setdefault(phase, []).append(sample["ms"] / 1000)
+        if result.returncode != 0:
+            print(f"{'':<28} fehlgeschlagen: {result.stderr.decode(errors='replace').strip()[-200:]}")
+            return
+    for phase, samples in phases.items():
+        report(f"startup {phase}", samples)
+
+
+GUI_CAPTURE = (
+    "import sys; from PyQt5.QtWidgets import QApplication; app = QApplication(sys.argv[:1]); "
+    "import main; window = main.SnippingTool(); window.mode_combo.setCurrentText('Vollbild-Ausschnitt'); "
+    "window.perform_screenshot(); window.editor.repaint()"
+)
+
+
+def bench_daemon(args):
+    """Auslösen bis Editor sichtbar: Trigger an den Daemon im Vergleich zum Kaltstart"""
+    from cli import trigger
+
+    repeat = max(1, args.repeat // 4)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "daemon.sock")
+        daemon = subprocess.Popen([sys.executable, "main.py", "--daemon", "--socket", path],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.perf_counter() + 10
+            while not os.path.exists(path) and daemon.poll() is None and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            reply = trigger("full", path=path) if os.path.exists(path) else None
+            if not reply or not reply.get("ok"):
+                print(f"{'daemon':<28} nicht verfügbar: {reply.get('error') if reply else 'kein Socket'}")
+            else:
+                samples = cold_start([sys.executable, "main.py", "--trigger", "--mode", "full",
+                                      "--socket", path], repeat)
+                if samples:
+                    report("daemon trigger -> Editor", samples)
+                report("daemon (im Daemon gemessen)",
+                       [trigger("full", path=path)["latency_ms"] / 1000 for _ in range(repeat)])
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    samples = cold_start([sys.executable, "-c", GUI_CAPTURE], repeat)
+    if samples:
+        report("kaltstart -> Editor", samples)
+
+
+def xclip_copy(image):
+    """Bisheriger Kopierweg: PNG in temporäre Datei schreiben und xclip starten"""
+    fd, temp_file = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    try:
+        image.save(temp_file, 'PNG')
+        if shutil.which('xclip'):
+            subprocess.run(['xclip', '-selection', 'clipboard', '-t', 'image/png', '-i', temp_file])
+    finally:
+        os.remove(temp_file)
+
+
+def resident_memory():
+    """Aktueller Speicher des Prozesses (RSS) in Bytes; ohne /proc der Höchststand"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bench_documents(args):
+    """Viele 4K-Aufnahmen als Tabs: Speicher mit Budget, Öffnen und Wechsel auf ausgelagerte Tabs"""
+    from documents import DocumentWindow
+    from editor import EditorWidget
+    from imagestore import ImageStore
+
+    app = QApplication.instance()
+    captures = 24
+    budget = 256 * 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        store = ImageStore(budget, directory)
+        window = DocumentWindow(store)
+        window.resize(1280, 800)
+        window.show()
+        before = resident_memory()
+        image = sample_image(*SIZES["4K"])
+        samples = []
+        for i in range(captures):
+            # Jede Aufnahme mit eigenen Pixeln, damit nichts geteilt wird
+            capture = image.copy()
+            capture.setPixel(i, 0, 0xFF000000)
+            start = time.perf_counter()
+            window.add_editor(EditorWidget(capture), store.add(capture))
+            app.processEvents()
+            samples.append(time.perf_counter() - start)
+            del capture
+        report(f"Tab öffnen ({captures}x 4K)", samples)
+        store.wait()
+        print(f"{'Bildspeicher':<28} {store.memory_used / 2**20:.0f} MB im Speicher "
+              f"(Budget {budget / 2**20:.0f} MB), {store.disk_used / 2**20:.1f} MB ausgelagert")
+        print(f"{'Prozess (RSS)':<28} +{(resident_memory() - before) / 2**20:.0f} MB "
+              f"für {captures} Aufnahmen ({captures * image.sizeInBytes() / 2**20:.0f} MB Pixel)")
+
+        def switch(index=itertools.cycle(range(0, captures, 3))):
+            window.tabs.setCurrentIndex(next(index))
+            window.current_editor().view.viewport().repaint()
+
+        report("Wechsel zu ausgelagertem Tab", timed(switch, args.repeat))
+        window.close_all()
+        store.close()
+
+
+def screenshot_image(width, height, alpha=False):
+    """Bildschirmähnliches Testbild: Flächen, Fensterrahmen, Text und ein Foto-Verlauf"""
+    from PyQt5.QtGui import QColor, QLinearGradient, QPainter
+
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied if alpha else QImage.Format_RGB32)
+    image.fill(Qt.transparent if alpha else QColor("#2e3440"))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    step = max(1, width // 6)
+    for i, x in enumerate(range(0, width - step // 2, step)):
+        painter.fillRect(x + 8, 40, step - 16, height - 80, QColor("#eceff4"))
+        painter.fillRect(x + 8, 40, step - 16, 28, QColor.fromHsv(i * 50 % 360, 120, 200))
+        for y in range(80, height - 60, 22):
+            painter.drawText(x + 16, y + 14, f"Zeile {y} – Lorem ipsum dolor sit amet {x}")
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(200, 60, 60, 200 if alpha else 255))
+    gradient.setColorAt(1, QColor(40, 90, 220, 120 if alpha else 255))
+    painter.fillRect(width // 3, height // 3, width // 3, height // 3, gradient)
+    painter.end()
+    return image
+
+
+def decoded_image(data, name):
+    """Dekodiert einen verlustfreien Export (PNG über Qt, QOI über das Paket qoi) oder None ohne Dekoder"""
+    from encoders import qoi
+    if name.startswith("png"):
+        return QImage.fromData(data)
+    if qoi is None:
+        return None
+    pixels = qoi.decode(data)
+    height, width, channels = pixels.shape
+    fmt = QImage.Format_RGBA8888 if channels == 4 else QImage.Format_RGB888
+    return QImage(pixels.tobytes(), width, height, width * channels, fmt).copy()
+
+
+def bench_presets(args):
+    """Export-Voreinstellungen: Kodierzeit und Größe, verlustfreie Formate werden pixelgenau geprüft"""
+    from encoders import PRESETS, available_presets, encode
+
+    repeat = max(1, args.repeat // 4)
+    failures = 0
+    for label, alpha in (("1080p", False), ("4K", False), ("4K", True)):
+        image = screenshot_image(*SIZES[label], alpha)
+        label += " RGBA" if alpha else ""
+        expected = image.convertToFormat(QImage.Format_ARGB32)
+        for name in available_presets():
+            data = encode(image, name)
+            report(f"{label} {name}", timed(lambda: encode(image, name), repeat))
+            print(f"{'':<28} {len(data) / 2**20:8.2f} MB ({len(data) / image.sizeInBytes():.1%} der Pixel)")
+            decoded = decoded_image(data, name) if PRESETS[name].lossless else None
+            if decoded is not None and decoded.convertToFormat(QImage.Format_ARGB32) != expected:
+                failures += 1
+                print(f"{'':<28} FEHLER: dekodiertes Bild weicht vom Original ab", file=sys.stderr)
+    if failures:
+        raise SystemExit(f"{failures} verlustfreie Exporte dekodieren nicht pixelgenau")
+
+
+def bench_actions(args):
+    """Gedrückt gehaltenes Strg+Shift+S: 4K-Aufnahmen alle 50 ms mit allen Aktionen nach der Aufnahme"""
+    from actions import ACTIONS, ActionPipeline, ActionSettings
+
+    app = QApplication.instance()
+    image = screenshot_image(*SIZES["4K"])
+    captures = max(8, args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        settings = ActionSettings(set(ACTIONS), directory, "{n}", "png-fast", 640, "wc -c")
+        pipeline = ActionPipeline(settings)
+        durations = {name: [] for name in ACTIONS}
+        failures = []
+        pipeline.finished.connect(lambda results: [
+            durations[name].append(duration) if error is None else failures.append(error)
+            for name, duration, error, _ in results
+        ])
+        submit, peak, accepted = [], 0, 0
+        for _ in range(captures):
+            capture = image.copy()
+            start = time.perf_counter()
+            accepted += pipeline.submit(capture, "Vollbild-Ausschnitt")
+            submit.append(time.perf_counter() - start)
+            peak = max(peak, pipeline.pending_bytes)
+            # Tastenwiederholung: bis zur nächsten Aufnahme Ereignisse verarbeiten
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                app.processEvents()
+                time.sleep(0.002)
+            del capture
+        while pipeline.jobs:
+            pipeline.wait()
+            app.processEvents()
+        report("Aktionen starten (GUI)", submit)
+        for name, samples in durations.items():
+            if samples:
+                report(f"Aktion {name}", samples)
+        print(f"{'Aufnahmen':<28} {accepted} von {captures} bearbeitet, höchstens "
+              f"{peak / 2**20:.0f} MB in Arbeit, {len(failures)} Fehler")
+
+
+def bench_clipboard(args):
+    """Kopierlatenz der Lazy-Zwischenablage im Vergleich zum xclip-Weg"""
+    from clipboard import copy_image
+
+    if not shutil.which('xclip'):
+        print("xclip nicht gefunden, xclip-Messung enthält nur PNG-Kodierung und Dateizugriff")
+    repeat = max(1, args.repeat // 4)
+    for label, (width, height) in SIZES.items():
+        image = sample_image(width, height)
+        report(f"{label} copy (lazy)", timed(lambda: copy_image(image), args.repeat))
+        report(f"{label} paste image/png", timed(lambda: copy_image(image).data("image/png"), repeat))
+        report(f"{label} copy (xclip)", timed(lambda: xclip_copy(image), repeat))
+
+
+BENCHMARKS = {
+    "capture": bench_capture,
+    "suite": bench_suite,
+    "clipboard": bench_clipboard,
+    "strokes": bench_strokes,
+    "eraser": bench_eraser,
+    "redaction": bench_redaction,
+    "view": bench_view,
+    "layer": bench_layer,
+    "document": bench_document,
+    "cli": bench_cli,
+    "freeform": bench_freeform,
+    "window": bench_window,
+    "startup": bench_startup,
+    "recording": bench_recording,
+    "history": bench_history,
+    "daemon": bench_daemon,
+    "countdown": bench_countdown,
+    "documents": bench_documents,
+    "presets": bench_presets,
+    "actions": bench_actions,
+}
+
+
+def environment():
+    """Angaben zur Messumgebung, damit Ergebnisse vergleichbar bleiben"""
+    from PyQt5.QtCore import QT_VERSION_STR
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    return {
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": QApplication.platformName(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__ if numpy else None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(baseline_path, tolerance):
+    """Vergleicht die Mediane mit einer gespeicherten Messung; liefert die Zahl der Verschlechterungen"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print("== Vergleich mit Basislinie ==")
+    for key, result in RESULTS.items():
+        if key not in baseline:
+            print(f"{key:<48} neu")
+            continue
+        before, after = baseline[key]["p50_ms"], result["p50_ms"]
+        change = (after - before) / before if before else 0.0
+        marker = ""
+        if change > tolerance:
+            marker = "  langsamer"
+            regressions += 1
+        elif change < -tolerance:
+            marker = "  schneller"
+        print(f"{key:<48} {before:10.2f} -> {after:10.2f} ms ({change:+7.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snipping Tool Benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"Auswahl aus {', '.join(BENCHMARKS)} (Standard: alle)")
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen pro Messung")
+    parser.add_argument("--stroke-length", type=int, default=2000, help="Mausereignisse pro Strich")
+    parser.add_argument("--json", metavar="DATEI", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--baseline", metavar="DATEI", help="Mit einem früheren, lokal erzeugten --json-Ergebnis vergleichen")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Erlaubte Verschlechterung des Medians (Anteil, Standard 0.15)")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unbekannte Benchmarks: {', '.join(sorted(unknown))}")
+
+    # Ohne Display offscreen messen statt abzubrechen
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    global _app, _section
+    _app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"== {name} ==")
+        _section = name
+        BENCHMARKS[name](args)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": RESULTS}, f, indent=2)
+    if args.baseline and compare(args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Aufnahme-Backends für den Snipping Tool Clone
+---------------------------------------------
+Jedes Backend liefert ein Bildschirmfoto als QImage. Die Auswahl erfolgt beim
+Programmstart automatisch in der Reihenfolge von BACKENDS:
+
+- mss: In-Process über X11 (MIT-SHM / XGetImage), kein Fremdprozess
+- qt: QScreen.grabWindow über die laufende QApplication
+- gnome-screenshot: Bisheriger Weg über einen Unterprozess (Fallback)
+
+Mit der Umgebungsvariable SNIPPING_TOOL_BACKEND kann ein Backend erzwungen werden.
+
+Bei mehreren Monitoren nimmt grab() jeden Monitor einzeln auf (bei mss parallel
+in Worker-Threads) und setzt die Teilbilder in physischen Pixeln zum virtuellen
+Desktop zusammen. Die Position des Ergebnisses auf dem Desktop steht in
+QImage.offset(). ScreenMap rechnet zwischen logischen Qt-Koordinaten und
+Bildpixeln um, auch wenn die Monitore unterschiedliche Skalierungen haben.
+"""
+import importlib.util
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QPoint, QPointF, QRect, QRectF
+from PyQt5.QtGui import QGuiApplication, QImage, QPainter, QPainterPath
+
+from latency import tracer
+
+
+class CaptureError(Exception):
+    """Fehler bei der Aufnahme eines Screenshots"""
+
+
+def screen_rects():
+    """Logisches Rechteck und physisches Rechteck (Desktop-Pixel) jedes QScreen
+
+    Qt 5 behält bei Skalierung die native Position eines Bildschirms bei und
+    skaliert nur dessen Größe, das physische Rechteck folgt daraus direkt.
+    """
+    result = []
+    for screen in QGuiApplication.screens():
+        geometry = screen.geometry()
+        ratio = screen.devicePixelRatio()
+        physical = QRect(geometry.topLeft(), geometry.size() * ratio)
+        result.append((geometry, physical, ratio))
+    return result
+
+
+def stitch(parts):
+    """Setzt Teilbilder [(physisches QRect, QImage), ...] zu einem Bild zusammen"""
+    bounds = QRect()
+    for rect, _ in parts:
+        bounds = bounds.united(rect)
+    result = QImage(bounds.size(), QImage.Format_RGB32)
+    result.fill(0xFF000000)  # Lücken zwischen unterschiedlich großen Monitoren
+
+    painter = QPainter(result)
+    for rect, image in parts:
+        # Gleich große Teilbilder werden 1:1 kopiert, sonst auf das Rechteck skaliert
+        painter.drawImage(rect.translated(-bounds.topLeft()), image)
+    painter.end()
+    result.setOffset(bounds.topLeft())
+    return result
+
+
+class ScreenMap:
+    """Abbildung zwischen logischen Qt-Koordinaten und den Pixeln eines Aufnahmebildes
+
+    Jeder Bildschirm hat seine eigene Skalierung; Punkte außerhalb aller
+    Bildschirme (z. B. unter der offscreen-Plattform) werden 1:1 abgebildet.
+    """
+
+    def __init__(self, frame, screens=None):
+        self.origin = frame.offset()
+        self.size = frame.size()
+        self.screens = screen_rects() if screens is None else screens
+
+    def _screen_at(self, point, logical=True):
+        # Rechte und untere Kante zählen mit, damit Rechtecke bis zum Rand abgebildet werden
+        for geometry, physical, ratio in self.screens:
+            if QRectF(geometry if logical else physical).contains(point):
+                return geometry, ratio
+        return None, 1.0
+
+    def to_frame(self, point):
+        """Logischer Punkt (QPointF, Desktop-Koordinaten) -> Bildpixel"""
+        geometry, ratio = self._screen_at(point)
+        if geometry is None:
+            return point - QPointF(self.origin)
+        top_left = QPointF(geometry.topLeft())
+        return top_left + (point - top_left) * ratio - QPointF(self.origin)
+
+    def to_logical(self, point):
+        """Bildpixel (QPointF) -> logischer Punkt in Desktop-Koordinaten"""
+        point = point + QPointF(self.origin)
+        geometry, ratio = self._screen_at(point, logical=False)
+        if geometry is None:
+            return point
+        top_left = QPointF(geometry.topLeft())
+        return top_left + (point - top_left) / ratio
+
+    def rect_to_frame(self, rect):
+        """Logisches Rechteck (QRect oder QRectF) -> Rechteck in Bildpixeln (QRect)"""
+        rect = QRectF(rect)
+        return QRectF(self.to_frame(rect.topLeft()), self.to_frame(rect.bottomRight())).toAlignedRect()
+
+    def rect_to_logical(self, rect):
+        """Rechteck in Bildpixeln -> logisches Rechteck (QRect)"""
+        rect = QRectF(rect)
+        return QRectF(self.to_logical(rect.topLeft()), self.to_logical(rect.bottomRight())).toAlignedRect()
+
+    def path_to_frame(self, path):
+        """Pfad in logischen Koordinaten -> Pfad in Bildpixeln (Punkt für Punkt)"""
+        result = QPainterPath()
+        for i in range(path.elementCount()):
+            element = path.elementAt(i)
+            point = self.to_frame(QPointF(element.x, element.y))
+            if element.isMoveTo():
+                result.moveTo(point)
+            else:
+                result.lineTo(point)
+        return result
+
+    def logical_bounds(self):
+        """Logisches Rechteck, das das Aufnahmebild auf dem Desktop bedeckt"""
+        return self.rect_to_logical(QRect(QPoint(0, 0), self.size))
+
+
+class CaptureBackend:
+    """Basisklasse für alle Aufnahme-Backends"""
+
+    name = ""
+    # Kann das Backend selbst einen Bereich oder ein Fenster auswählen lassen?
+    interactive = False
+    # Dürfen mehrere Monitore gleichzeitig aus Worker-Threads aufgenommen werden?
+    threaded = False
+
+    def __init__(self):
+        # Index in monitors() oder None für den gesamten virtuellen Desktop
+        self.monitor = None
+        # Worker für parallele Aufnahmen, bleibt zwischen Aufnahmen bestehen
+        self._pool = None
+        self._pool_size = 0
+
+    def _executor(self, workers):
+        if self._pool is None or self._pool_size < workers:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"capture-{self.name}")
+            self._pool_size = workers
+        return self._pool
+
+    def arm(self):
+        """Bereitet die nächste Aufnahme vor, damit grab() zur Frist sofort beginnt
+
+        Öffnet Verbindungen und startet die Worker-Threads; wird z. B. während
+        des Countdowns aufgerufen. Der Standard macht nichts.
+        """
+
+    @classmethod
+    def available(cls):
+        return False
+
+    def monitors(self):
+        """Physische Rechtecke (QRect, Desktop-Pixel) der einzelnen Monitore"""
+        return []
+
+    def grab_monitor(self, index):
+        """Nimmt einen einzelnen Monitor in voller physischer Auflösung auf"""
+        raise NotImplementedError
+
+    def grab(self, rect=None):
+        """Nimmt den Desktop (bzw. den gewählten Monitor) oder nur rect (QRect) auf"""
+        with tracer.stage("capture", backend=self.name) as fields:
+            if rect is not None:
+                image = self.grab_rect(rect)
+            else:
+                image = self.grab_desktop(self.monitor)
+            fields["bytes"] = image.sizeInBytes()
+        return image
+
+    def grab_rect(self, rect):
+        """Nimmt ein Rechteck in physischen Desktop-Pixeln auf"""
+        raise NotImplementedError
+
+    def grab_desktop(self, monitor=None):
+        """Nimmt alle Monitore (bei threaded parallel) auf und setzt sie zusammen"""
+        monitors = self.monitors()
+        if monitor is not None:
+            if not 0 <= monitor < len(monitors):
+                raise CaptureError(f"Monitor {monitor + 1} ist nicht vorhanden")
+            indices = [monitor]
+        else:
+            indices = range(len(monitors))
+        if len(indices) == 1:
+            image = self.grab_monitor(indices[0])
+            image.setOffset(monitors[indices[0]].topLeft())
+            return image
+
+        if self.threaded:
+            images = list(self._executor(len(indices)).map(self.grab_monitor, indices))
+        else:
+            images = [self.grab_monitor(i) for i in indices]
+        return stitch([(monitors[i], image) for i, image in zip(indices, images)])
+
+    def grab_interactive(self, kind):
+        """Lässt den Benutzer einen Bereich ('area') oder ein Fenster ('window') wählen"""
+        raise CaptureError(f"{self.name} unterstützt keine interaktive Auswahl")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+class MssBackend(CaptureBackend):
+    """In-Process-Aufnahme über X11 mit dem mss-Paket"""
+
+    name = "mss"
+
+    threaded = True
+
+    def __init__(self):
+        super().__init__()
+        import mss
+        self._mss = mss.mss
+        self._sct = mss.mss()
+        # Jeder Worker-Thread braucht eine eigene X-Verbindung
+        self._local = threading.local()
+        self._local.sct = self._sct
+        self._instances = [self._sct]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def available(cls):
+        # Nur prüfen, ob mss installiert ist; importiert wird es erst beim Erzeugen
+        return bool(os.environ.get("DISPLAY")) and importlib.util.find_spec("mss") is not None
+
+    def arm(self):
+        # Eine X-Verbindung pro Worker-Thread öffnen; die Barriere verteilt die
+        # Aufgaben auf alle Threads des Pools
+        workers = len(self.monitors())
+        if workers < 2:
+            return
+        barrier = threading.Barrier(workers)
+
+        def open_connection():
+            self._thread_sct()
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+
+        try:
+            for future in [self._executor(workers).submit(open_connection) for _ in range(workers)]:
+                future.result()
+        except Exception as e:
+            raise CaptureError(f"mss-Verbindungen konnten nicht geöffnet werden: {e}") from e
+
+    def _thread_sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = self._mss()
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def monitors(self):
+        # monitors[0] ist der gesamte virtuelle Desktop, danach die einzelnen Monitore
+        return [QRect(m["left"], m["top"], m["width"], m["height"]) for m in self._sct.monitors[1:]]
+
+    def _grab(self, monitor):
+        try:
+            shot = self._thread_sct().grab(monitor)
+        except Exception as e:
+            raise CaptureError(f"mss-Aufnahme fehlgeschlagen: {e}") from e
+
+        # BGRA im Speicher entspricht QImage.Format_RGB32 (Little Endian)
+        image = QImage(shot.bgra, shot.width, shot.height, shot.width * 4, QImage.Format_RGB32)
+        return image.copy()
+
+    def grab_monitor(self, index):
+        return self._grab(self._sct.monitors[index + 1])
+
+    def grab_rect(self, rect):
+        return self._grab({"left": rect.x(), "top": rect.y(), "width": rect.width(), "height": rect.height()})
+
+    def close(self):
+        super().close()
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            sct.close()
+
+
+class QtScreenBackend(CaptureBackend):
+    """Aufnahme über QScreen.grabWindow der laufenden QApplication"""
+
+    name = "qt"
+
+    @classmethod
+    def available(cls):
+        app = QGuiApplication.instance()
+        if app is None or QGuiApplication.primaryScreen() is None:
+            return False
+        return QGuiApplication.platformName() not in ("offscreen", "minimal")
+
+    def monitors(self):
+        return [physical for _, physical, _ in screen_rects()]
+
+    def grab_monitor(self, index):
+        # QScreen.grabWindow liefert physische Pixel, gehört aber in den GUI-Thread
+        screen = QGuiApplication.screens()[index]
+        geometry = screen.geometry()
+        pixmap = screen.grabWindow(0, 0, 0, geometry.width(), geometry.height())
+        if pixmap.isNull():
+            raise CaptureError("QScreen.grabWindow lieferte kein Bild")
+        return pixmap.toImage()
+
+    def grab_rect(self, rect):
+        # Bildschirm mit der größten Überdeckung; aufgenommen wird der Teil auf diesem Bildschirm
+        best = None
+        for screen, (_, physical, ratio) in zip(QGuiApplication.screens(), screen_rects()):
+            part = rect.intersected(physical)
+            if not part.isEmpty() and (best is None or part.width() * part.height() > best[0]):
+                best = (part.width() * part.height(), screen, part, physical, ratio)
+        if best is None:
+            raise CaptureError(f"Bereich {rect.x()},{rect.y()} {rect.width()}x{rect.height()} "
+                               "liegt auf keinem Bildschirm")
+        _, screen, rect, physical, ratio = best
+        # Physisches Rechteck in logische Koordinaten des Bildschirms umrechnen
+        x = (rect.x() - physical.x()) / ratio
+        y = (rect.y() - physical.y()) / ratio
+        pixmap = screen.grabWindow(0, round(x), round(y), round(rect.width() / ratio),
+                                   round(rect.height() / ratio))
+        if pixmap.isNull():
+            raise CaptureError("QScreen.grabWindow lieferte kein Bild")
+        return pixmap.toImage()
+
+
+class GnomeScreenshotBackend(CaptureBackend):
+    """Aufnahme über einen gnome-screenshot-Unterprozess"""
+
+    name = "gnome-screenshot"
+    interactive = True
+
+    @classmethod
+    def available(cls):
+        return shutil.which("gnome-screenshot") is not None
+
+    def _run(self, args):
+        # Erst hier importiert, damit der Programmstart nicht darauf wartet
+        import subprocess
+        import tempfile
+
+        fd, temp_file = tempfile.mkstemp(suffix='.png')
+        os.close(fd)
+        try:
+            subprocess.run(['gnome-screenshot', *args, '-f', temp_file])
+            image = QImage(temp_file)
+        finally:
+            os.remove(temp_file)
+        if image.isNull():
+            raise CaptureError("gnome-screenshot hat kein Bild erzeugt")
+        return image
+
+    def grab(self, rect=None):
+        with tracer.stage("capture", backend=self.name) as fields:
+            # gnome-screenshot nimmt immer den gesamten Desktop auf
+            image = self._run([])
+            if rect is not None:
+                image = image.copy(rect)
+            elif self.monitor is not None:
+                monitors = [physical for _, physical, _ in screen_rects()]
+                if not 0 <= self.monitor < len(monitors):
+                    raise CaptureError(f"Monitor {self.monitor + 1} ist nicht vorhanden")
+                image = image.copy(monitors[self.monitor])
+                image.setOffset(monitors[self.monitor].topLeft())
+            fields["bytes"] = image.sizeInBytes()
+        return image
+
+    def grab_interactive(self, kind):
+        return self._run(['-w'] if kind == 'window' else ['-a'])
+
+
+BACKENDS = [MssBackend, QtScreenBackend, GnomeScreenshotBackend]
+
+
+def available_backends():
+    """Liefert alle auf diesem System nutzbaren Backend-Klassen"""
+    return [cls for cls in BACKENDS if cls.available()]
+
+
+def select_backend(preferred=None, monitor=None):
+    """Wählt das schnellste verfügbare Backend (oder das bevorzugte) und instanziiert es"""
+    preferred = preferred or os.environ.get("SNIPPING_TOOL_BACKEND")
+    candidates = available_backends()
+    if preferred:
+        candidates.sort(key=lambda cls: cls.name != preferred)
+
+    for cls in candidates:
+        try:
+            backend = cls()
+        except Exception:
+            continue
+        backend.monitor = monitor
+        return backend
+    return None
+
+
+def interactive_backend():
+    """Liefert ein Backend mit eigener Bereichs-/Fensterauswahl, falls vorhanden"""
+    for cls in available_backends():
+        if cls.interactive:
+            return cls()
+    return None
@@ -0,0 +1,243 @@
+"""
+Kommandozeilenmodus für den Snipping Tool Clone
+-----------------------------------------------
+Nimmt einen Screenshot ohne Hauptfenster auf, schreibt ihn und beendet sich.
+Geladen wird nur, was für die Aufnahme nötig ist; für Vollbildaufnahmen über
+mss läuft Qt mit der offscreen-Plattform.
+
+    python main.py --mode full --delay 2 --out bild.png
+    python main.py --mode region --format jpg --stdout > bild.jpg
+
+Mit --daemon bleibt eine vorgewärmte Instanz im Hintergrund; --trigger schickt
+ihr über einen Unix-Socket einen Aufnahmeauftrag, ohne selbst Qt zu laden.
+
+    python main.py --daemon &
+    python main.py --trigger --mode region
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Bildformat -> (Qt-Format, Dateiendung)
+CLI_FORMATS = {
+    "png": ("PNG", ".png"),
+    "jpg": ("JPEG", ".jpg"),
+}
+
+# Wartezeit (s) des Triggers auf die Antwort; Bereichsauswahl braucht den Benutzer
+TRIGGER_TIMEOUT = 120
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Snipping Tool Clone – Screenshot ohne Hauptfenster aufnehmen"
+    )
+    parser.add_argument("--mode", choices=["full", "region", "freeform", "window"], default="full",
+                        help="Aufnahmemodus (Standard: full)")
+    parser.add_argument("--delay", type=float, default=0, metavar="N",
+                        help="Verzögerung in Sekunden vor der Aufnahme")
+    parser.add_argument("--out", metavar="PATH", help="Zieldatei (Standard: Screenshot_<Zeit>.<Format>)")
+    parser.add_argument("--format", choices=sorted(CLI_FORMATS),
+                        help="Bildformat (Standard: aus --out, sonst png)")
+    parser.add_argument("--quality", type=int, default=-1, help="JPEG-Qualität 0-100")
+    parser.add_argument("--preset", metavar="NAME",
+                        help="Export-Voreinstellung statt --format (z. B. png-fast, png-max, jpeg-90, webp-75, qoi)")
+    parser.add_argument("--stdout", action="store_true", help="Bild auf die Standardausgabe schreiben")
+    parser.add_argument("--backend", help="Aufnahme-Backend erzwingen (mss, qt, gnome-screenshot)")
+    parser.add_argument("--monitor", type=int, metavar="N",
+                        help="Nur Monitor N aufnehmen (ab 1, Standard: alle Monitore)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Vorgewärmt im Hintergrund laufen und auf Aufträge warten")
+    parser.add_argument("--trigger", action="store_true",
+                        help="Aufnahme im laufenden Daemon auslösen (--mode, --delay)")
+    parser.add_argument("--socket", metavar="PATH", help="Socket des Daemons (Standard: im Laufzeitverzeichnis)")
+    return parser.parse_args(argv)
+
+
+def socket_path(path=None):
+    """Pfad des Daemon-Sockets, standardmäßig pro Benutzer im Laufzeitverzeichnis"""
+    if path:
+        return os.path.abspath(path)
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"snipping-tool-{os.getuid()}.sock")
+
+
+def trigger(mode, delay=0, path=None, timeout=TRIGGER_TIMEOUT):
+    """Schickt einen Aufnahmeauftrag an den Daemon und liefert dessen Antwort"""
+    request = json.dumps({"mode": mode, "delay": delay}).encode("utf-8") + b"\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path(path))
+        client.sendall(request)
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    if not reply:
+        return {"ok": False, "error": "Keine Antwort vom Daemon"}
+    return json.loads(reply)
+
+
+def run_trigger(args):
+    try:
+        reply = trigger(args.mode, args.delay, args.socket)
+    except (OSError, ValueError) as e:
+        print(f"Fehler: Daemon nicht erreichbar ({e})", file=sys.stderr)
+        return 1
+    if not reply.get("ok"):
+        print(f"Fehler: {reply.get('error', 'unbekannt')}", file=sys.stderr)
+        return 1
+    print(f"Editor geöffnet nach {reply['latency_ms']:.1f} ms ({reply['backend']})", file=sys.stderr)
+    return 0
+
+
+def output_format(args):
+    if args.format:
+        return args.format
+    if args.out and os.path.splitext(args.out)[1].lower() in (".jpg", ".jpeg"):
+        return "jpg"
+    return "png"
+
+
+def create_application(args):
+    """Erzeugt die schlankste QApplication, mit der der Modus auskommt"""
+    if args.mode in ("region", "freeform", "window"):
+        # Bereichs- und Fensterauswahl brauchen ein sichtbares Overlay
+        from PyQt5.QtWidgets import QApplication
+        return QApplication(sys.argv[:1])
+
+    from capture import MssBackend
+    if args.backend in (None, MssBackend.name) and MssBackend.available():
+        # mss braucht keine Fenster, Qt dient nur zum Kodieren
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtGui import QGuiApplication
+    return QGuiApplication(sys.argv[:1])
+
+
+def window_source():
+    """Fensterindex über X11 oder None, wenn er nicht verfügbar ist"""
+    from windows import WindowSourceError, X11WindowSource
+    if not X11WindowSource.available():
+        return None
+    try:
+        return X11WindowSource()
+    except WindowSourceError as e:
+        print(f"Hinweis: {e}", file=sys.stderr)
+        return None
+
+
+def capture(args, app, deadline=None):
+    """Nimmt gemäß Modus ein QImage auf (None bei Abbruch), frühestens zur Frist"""
+    from capture import CaptureError, interactive_backend, select_backend
+
+    backend = select_backend(args.backend, args.monitor - 1 if args.monitor else None)
+    if backend is None:
+        raise CaptureError("Kein Aufnahme-Backend verfügbar")
+    if deadline is not None and deadline > time.monotonic():
+        # Backend vorbereiten, solange die Verzögerung ohnehin läuft
+        backend.arm()
+        time.sleep(max(0, deadline - time.monotonic()))
+
+    if args.mode == "full":
+        return backend.grab()
+    if args.mode == "window":
+        source = None if backend.interactive else window_source()
+        if source is None:
+            window_backend = backend if backend.interactive else interactive_backend()
+            if window_backend is None:
+                raise CaptureError("Fenstermodus benötigt python-xlib oder gnome-screenshot")
+            return window_backend.grab_interactive('window')
+        # Fenster im eingefrorenen Bild auswählen, Geometrie aus dem Fensterindex
+        from selection import WindowSelector
+        frame = backend.grab()
+        result = []
+        selector = WindowSelector(frame, source.index)
+        selector.selected.connect(lambda rect: result.append(frame.copy(rect)))
+    elif args.mode == "freeform":
+        from selection import FreeformSelector, freeform_crop
+        frame = backend.grab()
+        result = []
+        selector = FreeformSelector(frame)
+        selector.selected.connect(lambda path: result.append(freeform_crop(frame, path)))
+    elif backend.interactive:
+        return backend.grab_interactive('area')
+    else:
+        from selection import RegionSelector
+        frame = backend.grab()
+        result = []
+        selector = RegionSelector(frame)
+        selector.selected.connect(lambda rect: result.append(frame.copy(rect)))
+    selector.selected.connect(app.quit)
+    selector.cancelled.connect(app.quit)
+    selector.show()
+    selector.activateWindow()
+    app.exec_()
+    return result[0] if result else None
+
+
+def run(argv, window_factory=None):
+    """Einstiegspunkt des Kommandozeilenmodus, liefert den Exit-Code
+
+    window_factory erzeugt für --daemon das Hauptfenster (SnippingTool aus main.py).
+    """
+    args = parse_args(argv)
+    if args.trigger:
+        return run_trigger(args)
+    if args.daemon:
+        if window_factory is None:
+            print("Fehler: --daemon nur über main.py starten", file=sys.stderr)
+            return 1
+        import daemon
+        return daemon.run(args, window_factory)
+
+    # Frist auf der monotonen Uhr; der Programmstart zählt zur Verzögerung
+    deadline = time.monotonic() + args.delay
+    app = create_application(args)
+
+    from capture import CaptureError
+    try:
+        image = capture(args, app, deadline)
+    except CaptureError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    if image is None or image.isNull():
+        print("Keine Aufnahme erstellt.", file=sys.stderr)
+        return 1
+
+    if args.preset:
+        # encoders lädt numpy und Pillow, daher nur mit --preset
+        from encoders import PRESETS, encode
+        if args.preset not in PRESETS:
+            print(f"Fehler: Unbekannte Voreinstellung {args.preset} ({', '.join(PRESETS)})", file=sys.stderr)
+            return 1
+        suffix = PRESETS[args.preset].extension
+        try:
+            data = encode(image, args.preset)
+        except ValueError as e:
+            print(f"Fehler: {e}", file=sys.stderr)
+            return 1
+    else:
+        from clipboard import encode_image
+        fmt, suffix = CLI_FORMATS[output_format(args)]
+        data = bytes(encode_image(image, fmt, args.quality))
+    if args.stdout:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    if args.out or not args.stdout:
+        path = args.out or f"Screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError:
+            print(f"Fehler: {path} konnte nicht geschrieben werden", file=sys.stderr)
+            return 1
+        print(path, file=sys.stderr)
+    return 0
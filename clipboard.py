@@ -0,0 +1,74 @@
+"""
+Zwischenablage für den Snipping Tool Clone
+------------------------------------------
+In-Process-Zwischenablage über QClipboard. Bilder werden erst dann kodiert,
+wenn ein Einfügeziel ein bestimmtes Format tatsächlich anfordert.
+"""
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QMimeData, QVariant
+from PyQt5.QtGui import QGuiApplication
+
+from latency import tracer
+
+# MIME-Typ, unter dem Qt ein QImage ohne Kodierung austauscht
+RAW_IMAGE_MIME = "application/x-qt-image"
+
+# MIME-Typ -> Qt-Bildformat für die Kodierung auf Anfrage
+ENCODED_FORMATS = {
+    "image/png": "PNG",
+    "image/bmp": "BMP",
+}
+
+
+def encode_image(image, fmt, quality=-1):
+    """Kodiert ein QImage im Speicher und liefert ein QByteArray"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, fmt, quality)
+    buffer.close()
+    return data
+
+
+class LazyImageMimeData(QMimeData):
+    """Bietet ein Bild in mehreren Formaten an, kodiert aber erst bei Bedarf"""
+
+    def __init__(self, image):
+        super().__init__()
+        self._image = image
+        self._encoded = {}
+
+    def formats(self):
+        return [RAW_IMAGE_MIME, *ENCODED_FORMATS]
+
+    def hasFormat(self, mimetype):
+        return mimetype in self.formats()
+
+    def hasImage(self):
+        return True
+
+    def set_encoded(self, mimetype, data):
+        """Übernimmt bereits kodierte Bytes, z. B. aus einem Hintergrund-Export"""
+        if mimetype in ENCODED_FORMATS and mimetype not in self._encoded:
+            self._encoded[mimetype] = QByteArray(data)
+
+    def retrieveData(self, mimetype, preferred_type):
+        if mimetype == RAW_IMAGE_MIME:
+            return QVariant(self._image)
+        fmt = ENCODED_FORMATS.get(mimetype)
+        if fmt is None:
+            return super().retrieveData(mimetype, preferred_type)
+
+        # Jedes Format wird höchstens einmal kodiert
+        if mimetype not in self._encoded:
+            with tracer.stage("clipboard.encode", format=fmt) as fields:
+                self._encoded[mimetype] = encode_image(self._image, fmt)
+                fields["bytes"] = self._encoded[mimetype].size()
+        return self._encoded[mimetype]
+
+
+def copy_image(image):
+    """Legt ein QImage in die Zwischenablage, ohne es sofort zu kodieren"""
+    with tracer.stage("clipboard.copy", bytes=image.sizeInBytes()):
+        mime_data = LazyImageMimeData(image)
+        QGuiApplication.clipboard().setMimeData(mime_data)
+    return mime_data
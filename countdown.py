@@ -0,0 +1,155 @@
+"""
+Countdown für den Snipping Tool Clone
+-------------------------------------
+Overlay über alle Monitore, das vor einer verzögerten Aufnahme die Sekunden
+herunterzählt; die Zahl erscheint in der Mitte jedes Monitors. Gezeichnet
+wird nur das Rechteck um die Zahl.
+
+Alle Zeitpunkte hängen an einer Frist auf der monotonen Uhr, die Sekunden
+laufen also nicht durch verspätete Timer auseinander. Während des Countdowns
+bereitet prepare() die Aufnahme vor (z. B. Capture-Backend.arm()); kurz vor
+der Frist verschwindet das Overlay, damit es nicht im Bild landet, und
+finished wird so genau wie möglich zur Frist ausgelöst. Die Abweichung steht
+danach in jitter und wird auf stderr ausgegeben.
+"""
+import math
+import sys
+import time
+
+from PyQt5.QtCore import Qt, QRect, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QFont, QGuiApplication, QRadialGradient
+from PyQt5.QtWidgets import QApplication, QWidget
+
+# Vorlauf (s), mit dem das Overlay vor der Frist ausgeblendet wird
+HIDE_LEAD = 0.08
+
+# Restzeit (s), die vor der Frist aktiv abgewartet statt dem Timer überlassen wird
+SPIN_WINDOW = 0.002
+
+# Größe des Rechtecks um die Zahl (logische Pixel)
+TEXT_BOX = 220
+
+
+class CountdownOverlay(QWidget):
+    """Overlay für den Countdown vor dem Screenshot"""
+
+    finished = pyqtSignal()
+
+    def __init__(self, seconds, parent=None, prepare=None):
+        super().__init__(parent)
+        self.seconds = seconds
+        self.current = seconds
+        self.prepare = prepare
+        self.deadline = time.monotonic() + seconds
+        # Abweichung (s) des Auslösens von der Frist, gesetzt sobald finished ausgelöst wurde
+        self.jitter = None
+
+        # Fenstereinstellungen
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setStyleSheet("background-color: transparent;")
+
+        # Gesamten virtuellen Desktop abdecken, gezeichnet wird nur um die Zahlen
+        self.setGeometry(QGuiApplication.primaryScreen().virtualGeometry())
+
+        # Sekunden-, Ausblende- und Auslöse-Timer, alle auf die Frist bezogen
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setSingleShot(True)
+        self.tick_timer.setTimerType(Qt.PreciseTimer)
+        self.tick_timer.timeout.connect(self.update_countdown)
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.setTimerType(Qt.PreciseTimer)
+        self.hide_timer.timeout.connect(self.hide_overlay)
+        self.fire_timer = QTimer(self)
+        self.fire_timer.setSingleShot(True)
+        self.fire_timer.setTimerType(Qt.PreciseTimer)
+        self.fire_timer.timeout.connect(self.fire)
+
+        self.schedule_tick()
+        self.hide_timer.start(self.ms_until(self.deadline - HIDE_LEAD))
+        self.fire_timer.start(self.ms_until(self.deadline - SPIN_WINDOW))
+        if prepare is not None:
+            # Erst nach dem ersten Zeichnen, damit der Countdown sofort sichtbar ist
+            QTimer.singleShot(0, prepare)
+
+    @staticmethod
+    def ms_until(when):
+        return max(0, math.ceil((when - time.monotonic()) * 1000))
+
+    def schedule_tick(self):
+        """Nächster Sekundenwechsel, gerechnet von der Frist statt vom letzten Timer"""
+        remaining = self.deadline - time.monotonic()
+        next_change = self.deadline - (math.ceil(remaining) - 1)
+        if remaining > 1:
+            self.tick_timer.start(self.ms_until(next_change))
+
+    def text_rects(self):
+        """Rechtecke um die Zahl auf jedem Monitor (Overlay-Koordinaten)"""
+        rects = []
+        for screen in QGuiApplication.screens():
+            center = screen.geometry().translated(-self.geometry().topLeft()).center()
+            rect = QRect(0, 0, TEXT_BOX, TEXT_BOX)
+            rect.moveCenter(center)
+            rects.append(rect)
+        return rects
+
+    def paintEvent(self, event):
+        if self.current <= 0:
+            return
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setClipRect(event.rect())
+
+        # Countdown-Zahl
+        font = QFont("Arial", 100, QFont.Bold)
+        painter.setFont(font)
+
+        for rect in self.text_rects():
+            if not rect.intersects(event.rect()):
+                continue
+
+            # Halbdurchsichtiger Hintergrund nur hinter der Zahl
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(0, 0, 0, 50))
+            painter.drawRoundedRect(rect, 24, 24)
+
+            # Verlaufsfüllung für den Text
+            gradient = QRadialGradient(rect.center(), 100)
+            gradient.setColorAt(0, QColor(255, 255, 255))
+            gradient.setColorAt(1, QColor(200, 200, 255))
+            painter.setBrush(QBrush(gradient))
+
+            # Schatten für den Text
+            painter.setPen(QPen(QColor(0, 0, 0, 180), 2))
+            painter.drawText(rect.adjusted(3, 3, 3, 3), Qt.AlignCenter, str(self.current))
+
+            # Text
+            painter.setPen(QPen(QColor(255, 255, 255), 2))
+            painter.drawText(rect, Qt.AlignCenter, str(self.current))
+
+    def update_countdown(self):
+        self.current = max(0, math.ceil(self.deadline - time.monotonic()))
+        for rect in self.text_rects():
+            self.update(rect)
+        self.schedule_tick()
+
+    def hide_overlay(self):
+        """Blendet das Overlay vor der Frist aus, damit es nicht mit aufgenommen wird"""
+        self.tick_timer.stop()
+        self.current = 0
+        self.hide()
+        # Ausblenden sofort an den Fenstersystem-Server schicken
+        QApplication.sync()
+
+    def fire(self):
+        # Die letzten Millisekunden aktiv warten, QTimer allein ist dafür zu grob
+        while time.monotonic() < self.deadline:
+            pass
+        if self.isVisible():
+            self.hide_overlay()
+        self.jitter = time.monotonic() - self.deadline
+        print(f"countdown {self.seconds} s, Auslösung {self.jitter * 1000:+.2f} ms nach der Frist",
+              file=sys.stderr)
+        self.finished.emit()
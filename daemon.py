@@ -0,0 +1,176 @@
+"""
+Daemon für den Snipping Tool Clone
+----------------------------------
+Hält QApplication, Aufnahme-Backend und einen verborgenen Editor bereit, damit
+eine per Tastenkürzel ausgelöste Aufnahme weder Interpreter- noch Qt-Start
+abwarten muss. Aufträge kommen als JSON-Zeile über einen Unix-Socket:
+
+    Anfrage:  {"mode": "full" | "region" | "freeform" | "window", "delay": 0}
+    Antwort:  {"ok": true, "latency_ms": 12.3, "backend": "mss"}
+
+Bei verzögerten Aufnahmen enthält die Antwort zusätzlich "jitter_ms", die
+Abweichung des Auslösens von der Frist.
+
+Geantwortet wird erst, wenn der Editor sichtbar ist (oder die Aufnahme
+fehlgeschlagen ist). Der passende Client ist ``python main.py --trigger``.
+"""
+import json
+import signal
+import sys
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+from PyQt5.QtWidgets import QApplication
+
+from capture import CaptureError
+from cli import socket_path
+
+# Aufnahmemodus im Auftrag -> Eintrag der Modusauswahl im Hauptfenster
+DAEMON_MODES = {
+    "full": "Vollbild-Ausschnitt",
+    "region": "Rechteckiger Ausschnitt",
+    "freeform": "Freiform-Ausschnitt",
+    "window": "Fenster-Ausschnitt",
+}
+
+
+class CaptureDaemon(QObject):
+    """Nimmt Aufträge über einen QLocalServer an und löst sie im Hauptfenster aus"""
+
+    def __init__(self, tool, path, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.path = path
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept)
+        # Unvollständige Anfragen je Verbindung und laufender Auftrag (Socket, Startzeit)
+        self.buffers = {}
+        self.pending = None
+        tool.editor_opened.connect(self.capture_done)
+        tool.capture_failed.connect(self.capture_error)
+
+    def listen(self):
+        # Ein verwaister Socket eines abgestürzten Daemons wird ersetzt
+        QLocalServer.removeServer(self.path)
+        return self.server.listen(self.path)
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self.buffers[connection] = b""
+            connection.readyRead.connect(lambda c=connection: self.read_request(c))
+            connection.disconnected.connect(lambda c=connection: self.drop(c))
+
+    def drop(self, connection):
+        self.buffers.pop(connection, None)
+        if self.pending is not None and self.pending[0] is connection:
+            # Client hat aufgegeben, die Aufnahme läuft trotzdem zu Ende
+            self.pending = (None, self.pending[1])
+        connection.deleteLater()
+
+    def read_request(self, connection):
+        if connection not in self.buffers:
+            return
+        data = self.buffers[connection] + bytes(connection.readAll())
+        if b"\n" not in data:
+            self.buffers[connection] = data
+            return
+        del self.buffers[connection]
+        try:
+            request = json.loads(data.split(b"\n", 1)[0])
+            mode = DAEMON_MODES[request.get("mode", "full")]
+            delay = max(0, int(round(float(request.get("delay", 0)))))
+        except (ValueError, KeyError, AttributeError, TypeError):
+            self.reply(connection, {"ok": False, "error": "Ungültiger Auftrag"})
+            return
+        if self.pending is not None:
+            self.reply(connection, {"ok": False, "error": "Es läuft bereits eine Aufnahme"})
+            return
+
+        self.pending = (connection, time.perf_counter())
+        self.tool.mode_combo.setCurrentText(mode)
+        self.tool.delay_spinner.setValue(delay)
+        self.tool.take_screenshot()
+
+    def capture_done(self):
+        # Antwort erst, nachdem der Editor sein erstes Bild gezeichnet hat
+        self.tool.editor.repaint()
+        self.finish({"ok": True})
+
+    def capture_error(self, message):
+        self.finish({"ok": False, "error": message})
+
+    def finish(self, reply):
+        if self.pending is None:
+            return
+        connection, start = self.pending
+        self.pending = None
+        reply["latency_ms"] = (time.perf_counter() - start) * 1000
+        backend = self.tool.capture_backend
+        reply["backend"] = backend.name if backend else None
+        if self.tool.capture_jitter is not None:
+            reply["jitter_ms"] = self.tool.capture_jitter * 1000
+        self.reply(connection, reply)
+
+    @staticmethod
+    def reply(connection, reply):
+        if connection is not None and connection.state() == QLocalSocket.ConnectedState:
+            connection.write(json.dumps(reply).encode("utf-8") + b"\n")
+            connection.flush()
+            connection.disconnectFromServer()
+
+    def close(self):
+        self.server.close()
+        QLocalServer.removeServer(self.path)
+
+
+def run(args, window_factory):
+    """Startet den Daemon (Einstiegspunkt für ``main.py --daemon``)
+
+    window_factory erzeugt das verborgene Hauptfenster, z. B. SnippingTool.
+    """
+    path = socket_path(args.socket)
+    app = QApplication(sys.argv[:1])
+    app.setStyle('Fusion')
+    app.setQuitOnLastWindowClosed(False)
+
+    probe = QLocalSocket()
+    probe.connectToServer(path)
+    if probe.waitForConnected(200):
+        print(f"Fehler: Auf {path} läuft bereits ein Daemon", file=sys.stderr)
+        return 1
+
+    # SIGTERM/SIGINT beenden die Ereignisschleife, damit der Socket entfernt wird;
+    # der Timer gibt dem Interpreter regelmäßig Gelegenheit, Signale zu behandeln
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+
+    tool = window_factory(resident=True)
+    daemon = CaptureDaemon(tool, path)
+    if not daemon.listen():
+        print(f"Fehler: {path} kann nicht geöffnet werden ({daemon.server.errorString()})", file=sys.stderr)
+        return 1
+    print(f"Daemon bereit auf {path}", file=sys.stderr)
+
+    # Aufwärmen: erste Aufnahme und erster Editor-Aufbau kosten am meisten
+    if tool.capture_backend is not None:
+        QTimer.singleShot(0, lambda: _warm_up(tool))
+    try:
+        return app.exec_()
+    finally:
+        daemon.close()
+
+
+def _warm_up(tool):
+    try:
+        tool.capture_backend.grab()
+    except CaptureError as e:
+        print(f"Aufwärmen fehlgeschlagen: {e}", file=sys.stderr)
+    # Fensterindex aufbauen, danach halten ihn X-Ereignisse aktuell
+    if not tool.capture_backend.interactive:
+        tool.window_source()
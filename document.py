@@ -0,0 +1,103 @@
+"""
+Annotationsdokumente für den Snipping Tool Clone
+------------------------------------------------
+Speichert die Annotationen einer Aufnahme als kompakte Begleitdatei (.snip)
+neben dem Basisbild. Aufbau (Little Endian):
+
+    Kopf:     b"SNIP", Version (u16), Bildbreite, Bildhöhe, Anzahl Annotationen (u32)
+    Bild:     Länge (u32) + Pfad des Basisbildes relativ zur .snip-Datei (UTF-8)
+    Stile:    je Annotation Art (u8), runde Enden (u8), Farbe RGBA (u32),
+              Strichstärke (f32), Anzahl Koordinaten (u32)
+    Punkte:   zlib-komprimiertes float32-Array aller Koordinaten hintereinander
+"""
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from annotations import AnnotationRecord
+
+DOCUMENT_SUFFIX = ".snip"
+DOCUMENT_MAGIC = b"SNIP"
+# Version 2: zusätzlich Schwärzungen (Art 4 und 5), sonst unverändert
+DOCUMENT_VERSION = 2
+
+_HEADER = struct.Struct("<4sHIII")
+_LENGTH = struct.Struct("<I")
+_STYLE = struct.Struct("<BBIfI")
+
+
+class DocumentError(Exception):
+    """Fehler beim Lesen oder Schreiben eines Annotationsdokuments"""
+
+
+class AnnotationDocument:
+    """Basisbild-Referenz, Bildgröße und Annotationen einer Aufnahme"""
+
+    def __init__(self, image_path, width, height, records):
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.records = records
+
+
+def sidecar_path(image_path):
+    """Pfad der Begleitdatei zu einem Bild"""
+    return os.path.splitext(image_path)[0] + DOCUMENT_SUFFIX
+
+
+def write_document(path, image_path, width, height, records):
+    """Schreibt Annotationen und Bildreferenz in eine .snip-Datei"""
+    reference = os.path.relpath(image_path, os.path.dirname(os.path.abspath(path))).encode("utf-8")
+    coords = array("f")
+    styles = []
+    for record in records:
+        styles.append(_STYLE.pack(record.kind, record.round_cap, record.color,
+                                  record.width, len(record.coords)))
+        coords.extend(record.coords)
+    if sys.byteorder != "little":
+        coords.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(DOCUMENT_MAGIC, DOCUMENT_VERSION, width, height, len(styles)))
+        f.write(_LENGTH.pack(len(reference)))
+        f.write(reference)
+        f.write(b"".join(styles))
+        f.write(zlib.compress(coords.tobytes(), 1))
+
+
+def read_document(path):
+    """Liest eine .snip-Datei; der Bildpfad wird absolut zurückgegeben"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    try:
+        magic, version, width, height, count = _HEADER.unpack_from(data, 0)
+        if magic != DOCUMENT_MAGIC or version > DOCUMENT_VERSION:
+            raise DocumentError(f"{path} ist kein unterstütztes Annotationsdokument")
+        offset = _HEADER.size
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        reference = data[offset:offset + length].decode("utf-8")
+        offset += length
+
+        styles = list(_STYLE.iter_unpack(data[offset:offset + count * _STYLE.size]))
+        offset += count * _STYLE.size
+        coords = array("f")
+        coords.frombytes(zlib.decompress(data[offset:]))
+    except (struct.error, zlib.error, UnicodeDecodeError) as e:
+        raise DocumentError(f"{path} ist beschädigt: {e}") from e
+    if sys.byteorder != "little":
+        coords.byteswap()
+    if len(coords) != sum(style[4] for style in styles):
+        raise DocumentError(f"{path} ist beschädigt: Anzahl der Koordinaten stimmt nicht")
+
+    records = []
+    start = 0
+    for kind, round_cap, color, width_f, size in styles:
+        records.append(AnnotationRecord(kind, color, width_f, bool(round_cap), coords[start:start + size]))
+        start += size
+
+    image_path = os.path.join(os.path.dirname(os.path.abspath(path)), reference)
+    return AnnotationDocument(image_path, width, height, records)
@@ -0,0 +1,123 @@
+"""
+Mehrere Aufnahmen für den Snipping Tool Clone
+---------------------------------------------
+DocumentWindow zeigt jede Aufnahme als eigenen Editor-Tab. Die Bilder liegen
+im gemeinsamen ImageStore: Nur der aktive Tab hält Pixel (Bildpyramide,
+Gesamtbild, Effekt-Kacheln), inaktive Tabs geben sie frei und behalten nur
+ihre Annotationen. Wird ein Tab wieder aktiv, lädt der Store das Bild (falls
+ausgelagert) von der Festplatte nach.
+"""
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QLabel, QTabWidget, QVBoxLayout, QWidget
+
+from imagestore import ImageStoreError, release_heap
+
+
+def format_bytes(size):
+    """Speichergröße für die Anzeige (MB bzw. GB)"""
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.1f} GB"
+    return f"{size / 1024 ** 2:.0f} MB"
+
+
+class DocumentWindow(QWidget):
+    """Fenster mit einem Editor-Tab pro Aufnahme"""
+
+    # Der aktive Editor hat gewechselt (None, wenn kein Tab mehr offen ist)
+    current_changed = pyqtSignal(object)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        # Editor -> Schlüssel seines Bildes im Store
+        self.keys = {}
+        self.active = None
+        self.count = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.currentChanged.connect(self.tab_changed)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        layout.addWidget(self.tabs)
+
+        # Speicheranzeige rechts neben den Tabs
+        self.memory_label = QLabel()
+        self.memory_label.setContentsMargins(8, 0, 8, 0)
+        self.tabs.setCornerWidget(self.memory_label)
+        store.usage_changed.connect(self.update_memory)
+        store.spill_failed.connect(self.spill_failed)
+        self.update_memory()
+
+    def editors(self):
+        return [self.tabs.widget(i) for i in range(self.tabs.count())]
+
+    def current_editor(self):
+        return self.tabs.currentWidget()
+
+    def add_editor(self, editor, key, title=None):
+        """Übernimmt einen Editor mit dem Bild zum Schlüssel key (die Referenz geht über)"""
+        self.count += 1
+        self.keys[editor] = key
+        index = self.tabs.addTab(editor, title or f"Aufnahme {self.count}")
+        self.tabs.setCurrentIndex(index)
+        self.tab_changed(index)
+        return index
+
+    def tab_changed(self, index):
+        editor = self.tabs.widget(index) if index >= 0 else None
+        if editor is self.active:
+            return
+        previous, self.active = self.active, editor
+        if editor is not None:
+            # Erst anheften und laden, dann den bisherigen Tab freigeben
+            key = self.keys[editor]
+            self.store.pin(key)
+            if editor.suspended:
+                try:
+                    editor.resume(self.store.image(key))
+                except (OSError, ImageStoreError) as e:
+                    editor.status_bar.showMessage(f"Bild konnte nicht geladen werden: {str(e)}")
+        if previous is not None and previous in self.keys:
+            previous.suspend()
+            self.store.unpin(self.keys[previous])
+            release_heap()
+        self.update_memory()
+        self.current_changed.emit(editor)
+
+    def close_tab(self, index):
+        editor = self.tabs.widget(index)
+        key = self.keys.pop(editor)
+        if editor is self.active:
+            self.active = None
+            self.store.unpin(key)
+        self.tabs.removeTab(index)
+        editor.close()
+        editor.deleteLater()
+        self.store.release(key)
+        if not self.tabs.count():
+            self.current_changed.emit(None)
+            self.hide()
+
+    def close_all(self):
+        while self.tabs.count():
+            self.close_tab(self.tabs.count() - 1)
+
+    def update_memory(self):
+        resident = sum(1 for key in self.keys.values() if self.store.is_resident(key))
+        self.memory_label.setText(
+            f"{len(self.keys)} Aufnahmen, {resident} im Speicher: {format_bytes(self.store.memory_used)}"
+            f" (Budget {format_bytes(self.store.budget)}), ausgelagert {format_bytes(self.store.disk_used)}"
+        )
+
+    def spill_failed(self, message):
+        editor = self.current_editor()
+        if editor is not None:
+            editor.status_bar.showMessage(f"Auslagern fehlgeschlagen: {message}", 5000)
+
+    def closeEvent(self, event):
+        self.close_all()
+        super().closeEvent(event)
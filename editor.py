@@ -0,0 +1,898 @@
+"""
+Editor für den Snipping Tool Clone
+----------------------------------
+Bearbeitungsfenster für eine Aufnahme: Zeichenwerkzeuge, Zoom, Rückgängig,
+Export und Projekte. Das Hauptfenster importiert dieses Modul erst, wenn der
+erste Editor geöffnet wird, damit der Programmstart nicht darauf wartet.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal, QRectF, QVariantAnimation
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPixmap, QIcon, QImage
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QAction, QFileDialog, QToolBar, QPushButton, QLabel,
+    QVBoxLayout, QStatusBar, QMessageBox, QSlider, QColorDialog, QGraphicsView,
+    QGraphicsScene, QFrame, QButtonGroup, QToolButton, QProgressBar
+)
+
+from annotations import (
+    AnnotationIndex, RasterAnnotationLayer, StrokeItem, ERASER_RADIUS, annotation_polyline,
+    annotation_record, item_from_record, simplify_polyline, split_polyline
+)
+from clipboard import copy_image
+from document import DOCUMENT_SUFFIX, write_document
+from encoders import PRESETS, available_presets
+from export import ExportTask, Exporter, FlattenedComposite, export_format
+from latency import tracer
+from redaction import BLUR, PIXELATE, RedactionCache, RedactionItem
+from tiles import TiledImageItem
+from undo import AnnotationEdit, UndoStack
+from workers import worker_pool
+
+
+class ColorButton(QPushButton):
+    """Farbauswahlknopf mit Farbvorschau"""
+
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.setColor(color)
+        self.setFixedSize(32, 32)
+        self.setCursor(Qt.PointingHandCursor)
+        self.clicked.connect(self.choose_color)
+
+    def setColor(self, color):
+        self.color = color
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+
+        rect = self.rect().adjusted(4, 4, -4, -4)
+        painter.setBrush(QBrush(self.color))
+        painter.drawRoundedRect(rect, 5, 5)
+
+    def choose_color(self):
+        color = QColorDialog.getColor(self.color, self)
+        if color.isValid():
+            self.setColor(color)
+            self.update()
+
+
+# Intervall (ms), in dem gesammelte Strichpunkte übernommen werden (~120 Hz)
+STROKE_FLUSH_INTERVAL = 8
+
+# Annotationen, die beim Öffnen eines Dokuments pro Durchlauf eingefügt werden
+ANNOTATION_LOAD_BATCH = 500
+
+# Grenzen und Dauer (ms) für den Zoom im Editor
+MIN_ZOOM = 0.05
+MAX_ZOOM = 16.0
+ZOOM_DURATION = 120
+
+# Annotationen bleiben einzeln bearbeitbare Items, bis sie älter als FLATTEN_AGE
+# Sekunden sind oder mehr als FLATTEN_BUDGET vorhanden sind; danach wandern die
+# ältesten in die Rasterebene
+FLATTEN_AGE = 60
+FLATTEN_BUDGET = 200
+
+# Wartezeit (ms), wenn das Einebnen auf das Ende einer Bearbeitung warten muss
+FLATTEN_RETRY = 100
+
+# Stärke der Schwärzung je Stufe des Stärke-Reglers: Blockgröße bzw. Radius in Pixeln
+PIXELATE_SCALE = 4
+BLUR_SCALE = 3
+
+
+class DrawingTool:
+    PEN = 1
+    MARKER = 2
+    ERASER = 3
+    TEXT = 4
+    RECTANGLE = 5
+    ELLIPSE = 6
+    ARROW = 7
+    PIXELATE = 8
+    BLUR = 9
+
+
+# Werkzeug -> Effekt der Schwärzung
+REDACTION_TOOLS = {
+    DrawingTool.PIXELATE: (PIXELATE, PIXELATE_SCALE),
+    DrawingTool.BLUR: (BLUR, BLUR_SCALE),
+}
+
+
+def load_image(source):
+    """Erzeugt ein QImage aus einem QImage, QPixmap, PNG/JPEG-Bytes oder einem Dateipfad"""
+    if isinstance(source, QImage):
+        return source
+    if isinstance(source, QPixmap):
+        return source.toImage()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return QImage.fromData(bytes(source))
+    return QImage(source)
+
+
+class EditableScene(QGraphicsScene):
+    """Bearbeitbare Grafikszene für den Screenshot"""
+
+    # Szenenbereich, in dem Annotationen hinzugekommen oder entfernt worden sind
+    annotation_changed = pyqtSignal(QRectF)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.current_stroke = None
+        self.last_point = None
+        self.current_tool = DrawingTool.PEN
+        self.current_color = QColor("#ff0000")
+        self.current_width = 2
+        self.temp_item = None
+        self.start_point = None
+
+        # Schwärzungen: Rechteck oder Freihand, Effekt-Kacheln aus dem Basisbild
+        self.redaction_freehand = False
+        self._redaction_cache = None
+        # Basisbild eines inaktiven Dokuments freigegeben (kein Einebnen bis zur Rückkehr)
+        self.base_released = False
+
+        # Räumlicher Index aller Annotationen für den Radiergummi
+        self.annotation_index = AnnotationIndex()
+
+        # Noch nicht eingeebnete Annotationen (ID -> (Item, Zeitpunkt)) und die Rasterebene
+        self.flatten_age = FLATTEN_AGE
+        self.flatten_budget = FLATTEN_BUDGET
+        self.vector_items = OrderedDict()
+        self.annotation_layer = None
+        self.flatten_timer = QTimer(self)
+        self.flatten_timer.setSingleShot(True)
+        self.flatten_timer.timeout.connect(self.flatten_annotations)
+
+        # Annotationen nach ID, Verlauf und die gerade laufende Bearbeitung
+        self.annotations = {}
+        self.next_annotation_id = 1
+        self.undo_stack = UndoStack()
+        self.current_edit = None
+
+        # Mausereignisse mit hoher Rate werden gesammelt und gebündelt übernommen
+        self.stroke_timer = QTimer(self)
+        self.stroke_timer.setSingleShot(True)
+        self.stroke_timer.setInterval(STROKE_FLUSH_INTERVAL)
+        self.stroke_timer.timeout.connect(self.flush_stroke)
+
+    def stroke_pen(self):
+        """Stift für den aktuellen Strich (Marker halbtransparent)"""
+        pen = QPen(self.current_color, self.current_width)
+
+        if self.current_tool == DrawingTool.MARKER:
+            pen.setCapStyle(Qt.RoundCap)
+            pen.setJoinStyle(Qt.RoundJoin)
+            pen.setColor(QColor(self.current_color.red(),
+                                self.current_color.green(),
+                                self.current_color.blue(),
+                                100))  # Semi-transparent
+        return pen
+
+    def set_base_image(self, image):
+        """Bild, aus dem Schwärzungen ihre Effekt-Kacheln berechnen, samt neuer Rasterebene"""
+        self._redaction_cache = RedactionCache(image)
+        if self.annotation_layer is not None:
+            self.removeItem(self.annotation_layer)
+        # Die Rasterebene liegt über dem Basisbild und unter allen späteren Items
+        self.annotation_layer = RasterAnnotationLayer(image.rect())
+        self.addItem(self.annotation_layer)
+
+    def redaction_cache(self):
+        return self._redaction_cache
+
+    def release_base_image(self):
+        """Gibt die aus dem Basisbild abgeleiteten Pixel frei, Annotationen bleiben erhalten"""
+        self.base_released = True
+        self._redaction_cache.set_image(None)
+        self.flatten_timer.stop()
+
+    def restore_base_image(self, image):
+        self.base_released = False
+        self._redaction_cache.set_image(image)
+        self.schedule_flatten()
+
+    def flush_stroke(self):
+        if self.current_stroke:
+            self.current_stroke.flush()
+
+    def add_annotation(self, item, annotation_id=None):
+        """Fügt eine fertige Annotation der Szene und dem Index hinzu
+
+        Mit annotation_id wird eine Annotation wiederhergestellt (Rückgängig,
+        Wiederholen); sie kommt an ihre alte Stelle in der Stapelreihenfolge.
+        """
+        restored = annotation_id is not None
+        if not restored:
+            annotation_id = self.next_annotation_id
+            self.next_annotation_id += 1
+        item.annotation_id = annotation_id
+        self.annotations[annotation_id] = item
+        self.annotation_index.insert(item)
+
+        # Einzelne Items mit höherer ID liegen über der wiederhergestellten Annotation
+        newer = [i for i in self.vector_items if i > annotation_id] if restored else []
+        if (restored and len(newer) == len(self.vector_items) and not self.base_released
+                and self.annotation_layer is not None and annotation_id <= self.annotation_layer.newest):
+            # Schon eingeebnet gewesen und älter als alle einzelnen Items: zurück in die Rasterebene
+            if item.scene() is self:
+                self.removeItem(item)
+            if isinstance(item, RedactionItem):
+                item.cache = self._redaction_cache
+            self.annotation_layer.add(item)
+        else:
+            if item.scene() is not self:
+                self.addItem(item)
+            if newer:
+                item.stackBefore(self.vector_items[min(newer)][0])
+            self.vector_items[annotation_id] = (item, time.monotonic())
+        if self.current_edit is not None:
+            self.current_edit[1][annotation_id] = item
+        self.annotation_changed.emit(item.sceneBoundingRect())
+        self.schedule_flatten()
+
+    def remove_annotation(self, item):
+        """Entfernt eine Annotation aus der Szene (bzw. der Rasterebene) und dem Index"""
+        del self.annotations[item.annotation_id]
+        self.annotation_index.remove(item)
+        if self.vector_items.pop(item.annotation_id, None) is not None:
+            self.removeItem(item)
+        else:
+            self.annotation_layer.remove(item)
+        if self.current_edit is not None:
+            removed, added = self.current_edit
+            # Innerhalb derselben Bearbeitung entstandene Teile zählen nicht als entfernt
+            if added.pop(item.annotation_id, None) is None:
+                removed[item.annotation_id] = annotation_record(item)
+        self.annotation_changed.emit(item.sceneBoundingRect())
+
+    def schedule_flatten(self):
+        """Plant das Einebnen: sofort über dem Budget, sonst wenn das älteste Item alt genug ist"""
+        if not self.vector_items or self.annotation_layer is None or self.base_released:
+            self.flatten_timer.stop()
+            return
+        if len(self.vector_items) > self.flatten_budget:
+            delay = 0
+        else:
+            _, created = next(iter(self.vector_items.values()))
+            delay = max(0, int((created + self.flatten_age - time.monotonic()) * 1000))
+        if not self.flatten_timer.isActive() or self.flatten_timer.remainingTime() > delay:
+            self.flatten_timer.start(delay)
+
+    def flatten_annotations(self):
+        """Ebnet die ältesten Annotationen in die Rasterebene ein"""
+        if self.current_edit is not None:
+            # Nicht während einer laufenden Bearbeitung, danach erneut versuchen
+            self.flatten_timer.start(FLATTEN_RETRY)
+            return
+        deadline = time.monotonic() - self.flatten_age
+        while self.vector_items:
+            annotation_id, (item, created) = next(iter(self.vector_items.items()))
+            if len(self.vector_items) <= self.flatten_budget and created > deadline:
+                break
+            del self.vector_items[annotation_id]
+            self.removeItem(item)
+            if isinstance(item, RedactionItem):
+                item.cache = self._redaction_cache
+            self.annotation_layer.add(item)
+        self.schedule_flatten()
+
+    def begin_edit(self):
+        """Beginnt eine Bearbeitung, die als ein Verlaufsschritt zählt"""
+        self.current_edit = ({}, {})
+
+    def end_edit(self):
+        """Schließt die Bearbeitung ab und legt sie im Verlauf ab"""
+        if self.current_edit is None:
+            return
+        removed, added = self.current_edit
+        self.current_edit = None
+        if removed or added:
+            records = {annotation_id: annotation_record(item) for annotation_id, item in added.items()}
+            self.undo_stack.push(AnnotationEdit(removed, records))
+
+    def undo(self):
+        # Während einer Mausbearbeitung ignoriert, sonst verweist sie auf zurückgenommene Items
+        if self.current_edit is None:
+            self.undo_stack.undo(self)
+
+    def redo(self):
+        if self.current_edit is None:
+            self.undo_stack.redo(self)
+
+    def erase_segment(self, start, end):
+        """Radiert entlang der Strecke start-end und trennt getroffene Annotationen auf"""
+        a, b = (start.x(), start.y()), (end.x(), end.y())
+        radius = max(ERASER_RADIUS, self.current_width)
+
+        for item in self.annotation_index.query_segment(a, b, radius):
+            pen = item.pen()
+            points, closed = annotation_polyline(item)
+            runs = split_polyline(points, closed, a, b, radius + pen.widthF() / 2)
+            if runs is None:
+                continue
+            if isinstance(item, RedactionItem):
+                # Schwärzungen werden nur als Ganzes entfernt
+                self.remove_annotation(item)
+                continue
+
+            # Verbleibende Teilstücke werden zu eigenständigen Strichen
+            self.remove_annotation(item)
+            for run in runs:
+                self.add_annotation(StrokeItem.from_points(pen, simplify_polyline(run)))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.last_point = event.scenePos()
+            self.start_point = event.scenePos()
+            self.begin_edit()
+
+            if self.current_tool in [DrawingTool.PEN, DrawingTool.MARKER]:
+                self.current_stroke = StrokeItem(self.stroke_pen(), self.last_point)
+                self.addItem(self.current_stroke)
+            elif self.current_tool == DrawingTool.ERASER:
+                self.erase_segment(self.last_point, self.last_point)
+            elif self.current_tool in REDACTION_TOOLS:
+                effect, scale = REDACTION_TOOLS[self.current_tool]
+                self.temp_item = RedactionItem(effect, self.current_width * scale, [
+                    (self.start_point.x(), self.start_point.y())])
+                self.addItem(self.temp_item)
+            elif self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
+                # Temporäres Item für Vorschau erstellen
+                if self.current_tool == DrawingTool.RECTANGLE:
+                    self.temp_item = self.addRect(
+                        QRectF(self.start_point, self.start_point),
+                        QPen(self.current_color, self.current_width),
+                        QBrush(Qt.NoBrush)
+                    )
+                elif self.current_tool == DrawingTool.ELLIPSE:
+                    self.temp_item = self.addEllipse(
+                        QRectF(self.start_point, self.start_point),
+                        QPen(self.current_color, self.current_width),
+                        QBrush(Qt.NoBrush)
+                    )
+
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self.last_point:
+            point = event.scenePos()
+
+            if self.current_tool in [DrawingTool.PEN, DrawingTool.MARKER] and self.current_stroke:
+                # Bei Stift und Marker: Punkt an den Strich anhängen
+                self.current_stroke.add_point(point)
+                if not self.stroke_timer.isActive():
+                    self.stroke_timer.start()
+
+            elif self.current_tool == DrawingTool.ERASER:
+                # Radiergummi: gesamte Strecke seit dem letzten Ereignis erfassen
+                self.erase_segment(self.last_point, point)
+
+            elif self.current_tool in REDACTION_TOOLS and self.temp_item:
+                # Vorschau: nur neu überdeckte Effekt-Kacheln werden berechnet
+                if self.redaction_freehand:
+                    self.temp_item.add_point(point)
+                else:
+                    self.temp_item.set_rect(QRectF(self.start_point, point).normalized())
+
+            elif self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
+                # Vorschau für Rechteck oder Ellipse aktualisieren
+                rect = QRectF(self.start_point, point).normalized()
+                if self.current_tool == DrawingTool.RECTANGLE and self.temp_item:
+                    self.temp_item.setRect(rect)
+                elif self.current_tool == DrawingTool.ELLIPSE and self.temp_item:
+                    self.temp_item.setRect(rect)
+                elif self.current_tool == DrawingTool.ARROW and self.temp_item:
+                    # Arrow wird als Linie mit Pfeilspitze implementiert
+                    # Hier könnte eine komplexere Implementation folgen
+                    pass
+
+            self.last_point = point
+
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            if self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
+                # Temporäres Item als fertige Annotation übernehmen
+                if self.temp_item:
+                    self.add_annotation(self.temp_item)
+                self.temp_item = None
+            elif self.current_tool in REDACTION_TOOLS and self.temp_item:
+                item, self.temp_item = self.temp_item, None
+                bounds = item.path().boundingRect()
+                if len(item.points) < 3 or bounds.width() < 2 or bounds.height() < 2:
+                    self.removeItem(item)
+                else:
+                    # Freihand-Umriss vereinfachen, Reserve der Begrenzung wieder abgeben
+                    points = simplify_polyline(item.points) if self.redaction_freehand else item.points
+                    item.set_points(points)
+                    self.add_annotation(item)
+            elif self.current_stroke:
+                # Strich abschließen und vereinfachen
+                self.stroke_timer.stop()
+                self.current_stroke.finish()
+                self.add_annotation(self.current_stroke)
+                self.current_stroke = None
+
+            self.end_edit()
+            self.last_point = None
+
+        super().mouseReleaseEvent(event)
+
+
+class EditorView(QGraphicsView):
+    """Grafikansicht mit weichem Zoom (Strg+Mausrad) und Verschieben (mittlere Maustaste)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.zoom = 1.0
+        self.pan_origin = None
+        # Beginn von set_image, bis zum ersten Zeichnen des neuen Bildes (für die Latenzmessung)
+        self.load_started = None
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+
+        self.zoom_animation = QVariantAnimation(self)
+        self.zoom_animation.setDuration(ZOOM_DURATION)
+        self.zoom_animation.valueChanged.connect(self.apply_zoom)
+        self.zoom_animation.finished.connect(self.zoom_finished)
+
+    def set_zoom(self, target, animated=True):
+        """Setzt den Zoomfaktor, standardmäßig weich animiert"""
+        target = max(MIN_ZOOM, min(MAX_ZOOM, target))
+        self.zoom_animation.stop()
+        if not animated:
+            self.apply_zoom(target)
+            return
+        # Während der Animation ohne Glättung skalieren, erst das letzte Bild glätten
+        self.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        self.zoom_animation.setStartValue(float(self.zoom))
+        self.zoom_animation.setEndValue(float(target))
+        self.zoom_animation.start()
+
+    def zoom_finished(self):
+        self.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        self.viewport().update()
+
+    def apply_zoom(self, value):
+        factor = value / self.zoom
+        self.scale(factor, factor)
+        self.zoom = value
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            # Bei laufender Animation vom Zielwert aus weiterzoomen
+            running = self.zoom_animation.state() == QVariantAnimation.Running
+            current = self.zoom_animation.endValue() if running else self.zoom
+            self.set_zoom(current * 1.25 ** (event.angleDelta().y() / 120))
+            event.accept()
+        else:
+            super().wheelEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.load_started is not None:
+            tracer.record("editor.first_paint", time.perf_counter() - self.load_started, self.load_started)
+            self.load_started = None
+
+    def dispatch(self, stage, handler, event):
+        """Reicht ein Mausereignis an die Szene weiter und misst dessen Bearbeitung"""
+        # Bewegungen ohne gedrückte Maustaste (Hover) werden nicht gemessen
+        if not tracer.enabled or stage == "scene.move" and not event.buttons() & Qt.LeftButton:
+            handler(event)
+            return
+        # Mit Werkzeug und Szenenposition lässt sich die Aufzeichnung wieder abspielen (benchmark.py)
+        pos = self.mapToScene(event.pos())
+        with tracer.stage(stage, tool=self.scene().current_tool, x=round(pos.x(), 2), y=round(pos.y(), 2)):
+            handler(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self.pan_origin = event.pos()
+            self.viewport().setCursor(Qt.ClosedHandCursor)
+            event.accept()
+        else:
+            self.dispatch("scene.press", super().mousePressEvent, event)
+
+    def mouseMoveEvent(self, event):
+        if self.pan_origin is not None:
+            delta = event.pos() - self.pan_origin
+            self.pan_origin = event.pos()
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+            event.accept()
+        else:
+            self.dispatch("scene.move", super().mouseMoveEvent, event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MiddleButton and self.pan_origin is not None:
+            self.pan_origin = None
+            self.viewport().unsetCursor()
+            event.accept()
+        else:
+            self.dispatch("scene.release", super().mouseReleaseEvent, event)
+
+
+class EditorWidget(QWidget):
+    """Widget zur Bearbeitung des aufgenommenen Screenshots"""
+
+    def __init__(self, image=None, parent=None, image_path=None):
+        super().__init__(parent)
+        # Das Bild kommt direkt aus dem Speicher, der Dateipfad ist nur optional
+        self.image_path = image_path
+        self.image = load_image(image if image is not None else image_path)
+        with tracer.stage("editor.setup"):
+            self.setupUI()
+
+    def setupUI(self):
+        # Hauptlayout
+        layout = QVBoxLayout(self)
+
+        # Haupt-Toolbar für Zeichenwerkzeuge
+        toolbar = QToolBar("Zeichenwerkzeuge")
+        toolbar.setIconSize(QSize(24, 24))
+        toolbar.setMovable(False)
+        toolbar.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)  # Text unter dem Icon
+
+        # Werkzeugbuttons erstellen
+        tool_group = QButtonGroup(self)
+
+        # Werkzeuge mit Icons erstellen
+        self.pen_button = QToolButton()
+        self.pen_button.setText("Stift")
+        self.pen_button.setCheckable(True)
+        self.pen_button.setChecked(True)
+        tool_group.addButton(self.pen_button, DrawingTool.PEN)
+
+        self.marker_button = QToolButton()
+        self.marker_button.setText("Marker")
+        self.marker_button.setCheckable(True)
+        tool_group.addButton(self.marker_button, DrawingTool.MARKER)
+
+        self.eraser_button = QToolButton()
+        self.eraser_button.setText("Radiergummi")
+        self.eraser_button.setCheckable(True)
+        tool_group.addButton(self.eraser_button, DrawingTool.ERASER)
+
+        self.rectangle_button = QToolButton()
+        self.rectangle_button.setText("Rechteck")
+        self.rectangle_button.setCheckable(True)
+        tool_group.addButton(self.rectangle_button, DrawingTool.RECTANGLE)
+
+        self.ellipse_button = QToolButton()
+        self.ellipse_button.setText("Ellipse")
+        self.ellipse_button.setCheckable(True)
+        tool_group.addButton(self.ellipse_button, DrawingTool.ELLIPSE)
+
+        toolbar.addWidget(self.pen_button)
+        toolbar.addWidget(self.marker_button)
+        toolbar.addWidget(self.eraser_button)
+        toolbar.addWidget(self.rectangle_button)
+        toolbar.addWidget(self.ellipse_button)
+        toolbar.addSeparator()
+
+        # Schwärzen: Verpixeln oder Weichzeichnen, als Rechteck oder Freihand
+        self.pixelate_button = QToolButton()
+        self.pixelate_button.setText("Verpixeln")
+        self.pixelate_button.setCheckable(True)
+        tool_group.addButton(self.pixelate_button, DrawingTool.PIXELATE)
+
+        self.blur_button = QToolButton()
+        self.blur_button.setText("Weichzeichnen")
+        self.blur_button.setCheckable(True)
+        tool_group.addButton(self.blur_button, DrawingTool.BLUR)
+
+        self.freehand_button = QToolButton()
+        self.freehand_button.setText("Freihand")
+        self.freehand_button.setCheckable(True)
+
+        toolbar.addWidget(self.pixelate_button)
+        toolbar.addWidget(self.blur_button)
+        toolbar.addWidget(self.freehand_button)
+        toolbar.addSeparator()
+
+        # Farbauswahl
+        self.color_button = ColorButton(QColor("#ff0000"))
+        toolbar.addWidget(self.color_button)
+
+        # Strichstärke
+        toolbar.addWidget(QLabel("Stärke:"))
+        self.width_slider = QSlider(Qt.Horizontal)
+        self.width_slider.setRange(1, 20)
+        self.width_slider.setValue(2)
+        self.width_slider.setFixedWidth(100)
+        toolbar.addWidget(self.width_slider)
+
+        layout.addWidget(toolbar)
+
+        # Zweite Toolbar für Speichern/Kopieren
+        action_toolbar = QToolBar("Aktions-Werkzeuge")
+        action_toolbar.setIconSize(QSize(32, 32))
+        action_toolbar.setMovable(False)
+
+        # Speichern/Kopieren-Buttons mit Icon und Text
+        save_action = QAction("Speichern", self)
+        save_action.setIcon(QIcon.fromTheme("document-save"))
+        save_action.triggered.connect(self.save_image)
+        action_toolbar.addAction(save_action)
+
+        copy_action = QAction("Kopieren", self)
+        copy_action.setIcon(QIcon.fromTheme("edit-copy"))
+        copy_action.triggered.connect(self.copy_to_clipboard)
+        action_toolbar.addAction(copy_action)
+
+        project_action = QAction("Projekt speichern", self)
+        project_action.setIcon(QIcon.fromTheme("document-save-as"))
+        project_action.triggered.connect(self.save_project)
+        action_toolbar.addAction(project_action)
+
+        action_toolbar.addSeparator()
+
+        undo_action = QAction("Rückgängig", self)
+        undo_action.setIcon(QIcon.fromTheme("edit-undo"))
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(lambda: self.scene.undo())
+        action_toolbar.addAction(undo_action)
+
+        redo_action = QAction("Wiederholen", self)
+        redo_action.setIcon(QIcon.fromTheme("edit-redo"))
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(lambda: self.scene.redo())
+        action_toolbar.addAction(redo_action)
+
+        layout.addWidget(action_toolbar)
+
+        # Grafikansicht für den Screenshot
+        self.view = EditorView()
+        self.view.setRenderHint(QPainter.Antialiasing)
+        self.view.setRenderHint(QPainter.SmoothPixmapTransform)
+        self.view.setBackgroundBrush(QBrush(QColor("#f0f0f0")))
+        self.view.setFrameShape(QFrame.NoFrame)
+
+        self.scene = EditableScene()
+        self.view.setScene(self.scene)
+
+        layout.addWidget(self.view)
+
+        # Export im Hintergrund aus dem Gesamtbild (siehe set_image)
+        self.pixmap_item = None
+        self.composite = None
+        self.scene.annotation_changed.connect(self.invalidate_composite)
+        self.exporter = Exporter(self.composite, self)
+        self.exporter.finished.connect(self.export_finished)
+        self.exporter.failed.connect(self.export_failed)
+        self.exporter.cancelled.connect(self.export_cancelled)
+        # (LazyImageMimeData, Version des Gesamtbildes) des laufenden Vorab-Kodierens
+        self.clipboard_prefetch = None
+
+        # Statusleiste mit Fortschrittsanzeige für laufende Exporte
+        self.status_bar = QStatusBar()
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 0)  # Unbestimmter Fortschritt
+        self.export_progress.setFixedWidth(120)
+        self.export_progress.hide()
+        self.cancel_export_button = QToolButton()
+        self.cancel_export_button.setText("Abbrechen")
+        self.cancel_export_button.clicked.connect(self.exporter.cancel)
+        self.cancel_export_button.hide()
+        self.status_bar.addPermanentWidget(self.export_progress)
+        self.status_bar.addPermanentWidget(self.cancel_export_button)
+        layout.addWidget(self.status_bar)
+
+        # Annotationen eines geöffneten Dokuments werden nach und nach eingefügt
+        self.pending_records = []
+        self.load_timer = QTimer(self)
+        self.load_timer.timeout.connect(self.load_next_annotations)
+
+        self.set_image(self.image, self.image_path)
+
+        # Werkzeugauswahl verbinden
+        tool_group.buttonClicked.connect(self.set_tool)
+        self.color_button.clicked.connect(self.set_color)
+        self.width_slider.valueChanged.connect(self.set_width)
+        self.freehand_button.toggled.connect(self.set_redaction_freehand)
+
+    def set_image(self, image, image_path=None):
+        """Zeigt ein Bild im Editor an, z. B. in einem vorab erzeugten Editor"""
+        if tracer.enabled:
+            # Gemessen bis zum ersten Zeichnen der Ansicht
+            self.view.load_started = time.perf_counter()
+        with tracer.stage("editor.load", bytes=image.sizeInBytes()):
+            self.show_image(image, image_path)
+
+    def show_image(self, image, image_path):
+        self.image_path = image_path
+        self.attach_image(image)
+        self.scene.set_base_image(self.image)
+        self.scene.setSceneRect(QRectF(self.image.rect()))
+
+        # Aufnahmen liegen in physischen Pixeln vor und werden 1:1 angezeigt
+        self.view.set_zoom(1 / self.view.devicePixelRatioF(), animated=False)
+
+    def attach_image(self, image):
+        """Zeigt die Pixel des Basisbildes an, ohne Annotationen oder Ansicht zu ändern"""
+        self.detach_image()
+        self.image = image
+
+        # Bild gekachelt anzeigen, die verkleinerten Stufen entstehen im Hintergrund
+        self.pixmap_item = TiledImageItem(self.image)
+        # Unter allen Annotationen, auch wenn es später als diese eingefügt wird
+        self.pixmap_item.setZValue(-1)
+        self.scene.addItem(self.pixmap_item)
+
+        # Gesamtbild für den Export, aktualisiert nur geänderte Bereiche
+        self.composite = FlattenedComposite(self.scene, self.image, self.pixmap_item)
+        self.exporter.composite = self.composite
+
+    def detach_image(self):
+        if self.pixmap_item is not None:
+            self.pixmap_item.cancel()
+            self.scene.removeItem(self.pixmap_item)
+            self.pixmap_item = None
+        self.image = None
+        self.composite = None
+        self.exporter.composite = None
+
+    def invalidate_composite(self, rect):
+        # Ein freigegebenes Dokument baut sein Gesamtbild beim Fortsetzen neu auf
+        if self.composite is not None:
+            self.composite.invalidate(rect)
+
+    @property
+    def suspended(self):
+        return self.image is None
+
+    def suspend(self):
+        """Gibt alle Pixel des Basisbildes frei (inaktiver Tab); resume() stellt sie wieder her"""
+        if self.suspended:
+            return
+        # Nur das Vorab-Kodieren für die Zwischenablage abbrechen, Speichern läuft weiter
+        if not self.exporter.is_saving():
+            self.exporter.cancel()
+        self.detach_image()
+        self.scene.release_base_image()
+
+    def resume(self, image):
+        """Zeigt das (z. B. aus dem Bildspeicher neu geladene) Basisbild wieder an"""
+        if not self.suspended:
+            return
+        self.attach_image(image)
+        self.scene.restore_base_image(image)
+
+    def closeEvent(self, event):
+        # Aufbau der Bildpyramide und laufende Exporte nicht unnötig weiterlaufen lassen
+        if self.pixmap_item is not None:
+            self.pixmap_item.cancel()
+        self.exporter.cancel()
+        super().closeEvent(event)
+
+    def set_tool(self, button):
+        self.scene.current_tool = self.sender().id(button)
+
+    def set_color(self):
+        self.scene.current_color = self.color_button.color
+
+    def set_width(self, width):
+        self.scene.current_width = width
+
+    def set_redaction_freehand(self, freehand):
+        self.scene.redaction_freehand = freehand
+
+    def save_image(self):
+        # Screenshot mit Zeichnungen als Bild speichern
+        # Ein Filter je Export-Voreinstellung
+        filters = {f"{PRESETS[name].label} (*{PRESETS[name].extension})": name for name in available_presets()}
+        filepath, selected = QFileDialog.getSaveFileName(
+            self,
+            "Screenshot speichern",
+            f"Screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
+            ";;".join([*filters, "All Files (*)"])
+        )
+
+        if filepath:
+            preset = filters.get(selected)
+            if preset is not None and not os.path.splitext(filepath)[1]:
+                filepath += PRESETS[preset].extension
+            # Die Voreinstellung gilt nur, wenn die Dateiendung zu ihr passt
+            if preset is None or os.path.splitext(filepath)[1].lower() != PRESETS[preset].extension:
+                preset = export_format(filepath)
+            # Kodieren und Schreiben im Hintergrund
+            self.exporter.export(preset, filepath)
+            self.set_export_busy(True, "Speichere Screenshot...")
+
+    def copy_to_clipboard(self):
+        # In die Zwischenablage legen, kodiert wird erst beim Einfügen
+        version = self.composite.version
+        try:
+            mime_data = copy_image(self.composite.image())
+        except Exception as e:
+            QMessageBox.warning(self, "Fehler", f"Fehler beim Kopieren: {str(e)}")
+            return
+
+        # PNG im Hintergrund vorbereiten, damit das Einfügen nicht warten muss
+        data = self.composite.cached_bytes("PNG")
+        if data is not None:
+            mime_data.set_encoded("image/png", data)
+        elif not self.exporter.is_saving():
+            # Ein laufendes Vorab-Kodieren desselben Stands gilt auch für die neue Kopie
+            running = self.clipboard_prefetch if self.exporter.is_running() else None
+            if running is None or running[1] != version:
+                self.exporter.export("PNG")
+            self.clipboard_prefetch = (mime_data, version)
+        self.status_bar.showMessage("Screenshot wurde in die Zwischenablage kopiert.", 3000)
+
+    def save_project(self):
+        # Annotationen als .snip-Begleitdatei neben dem Basisbild speichern
+        filepath, _ = QFileDialog.getSaveFileName(
+            self,
+            "Projekt speichern",
+            f"Screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}{DOCUMENT_SUFFIX}",
+            f"Snipping-Projekt (*{DOCUMENT_SUFFIX})"
+        )
+        if not filepath:
+            return
+
+        if not (self.image_path and os.path.exists(self.image_path)):
+            # Basisbild im Hintergrund neben das Projekt schreiben
+            self.image_path = os.path.splitext(filepath)[0] + ".png"
+            worker_pool().start(ExportTask(self.image, "PNG", self.image_path))
+
+        # Nach ID, also in Stapelreihenfolge (Wiederhergestelltes liegt nicht oben)
+        records = [annotation_record(item) for _, item in sorted(self.scene.annotations.items())]
+        try:
+            write_document(filepath, self.image_path, self.image.width(), self.image.height(), records)
+            self.status_bar.showMessage(f"Projekt wurde gespeichert unter: {filepath}", 5000)
+        except OSError as e:
+            QMessageBox.warning(self, "Fehler", f"Fehler beim Speichern des Projekts: {str(e)}")
+
+    def load_annotations(self, records):
+        """Fügt Annotationen schrittweise ein, das Basisbild ist sofort sichtbar"""
+        self.pending_records = list(records)
+        self.pending_records.reverse()
+        self.load_timer.start(0)
+
+    def load_next_annotations(self):
+        for _ in range(min(ANNOTATION_LOAD_BATCH, len(self.pending_records))):
+            self.scene.add_annotation(item_from_record(self.pending_records.pop()))
+        if self.pending_records:
+            self.status_bar.showMessage(f"Lade Annotationen... ({len(self.pending_records)} verbleibend)")
+        else:
+            self.load_timer.stop()
+            self.status_bar.clearMessage()
+
+    def set_export_busy(self, busy, message=""):
+        self.export_progress.setVisible(busy)
+        self.cancel_export_button.setVisible(busy)
+        if message:
+            self.status_bar.showMessage(message)
+
+    def export_finished(self, path, data):
+        self.set_export_busy(False)
+        if path:
+            self.status_bar.showMessage(f"Screenshot wurde gespeichert unter: {path}", 5000)
+        else:
+            # Vorab kodiertes PNG nur an die Kopie übergeben, aus der es kodiert wurde,
+            # und nur solange sie noch in der Zwischenablage liegt
+            mime_data, _ = self.clipboard_prefetch or (None, None)
+            self.clipboard_prefetch = None
+            if mime_data is not None and QApplication.clipboard().mimeData() is mime_data:
+                mime_data.set_encoded("image/png", data)
+            self.status_bar.clearMessage()
+
+    def export_failed(self, message):
+        self.clipboard_prefetch = None
+        self.set_export_busy(False)
+        QMessageBox.warning(self, "Fehler", f"Fehler beim Exportieren: {message}")
+
+    def export_cancelled(self):
+        self.clipboard_prefetch = None
+        self.set_export_busy(False, "Export abgebrochen")
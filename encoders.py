@@ -0,0 +1,264 @@
+"""
+Export-Kodierung für den Snipping Tool Clone
+--------------------------------------------
+Voreinstellungen (PRESETS) für den Export: PNG mit Qt-Standard, schnelles PNG,
+maximal komprimiertes PNG, JPEG und WebP in zwei Qualitätsstufen sowie QOI
+als schnelles verlustfreies Format. JPEG und WebP laufen über Pillow (JPEG
+ohne Pillow über Qt), QOI über das Paket qoi mit numpy (der QOI-Kodierer von
+Pillow ist reines Python und für große Aufnahmen zu langsam). Fehlt ein
+Paket, bietet available_presets() die betroffenen Voreinstellungen nicht an.
+
+Die PNG-Voreinstellungen schreibt das Modul selbst: Die Zeilen werden in
+Streifen geteilt, die in Worker-Threads parallel komprimiert werden (zlib gibt
+dabei das GIL frei). Jeder Streifen nutzt die letzten 32 KB des vorigen als
+Wörterbuch und endet mit einem Sync-Flush; aneinandergehängt ergeben die
+Teile einen einzigen gültigen zlib-Strom (wie bei pigz). Mit numpy wählt das
+maximal komprimierte PNG je Zeile den günstigsten PNG-Filter, ohne numpy
+übernimmt Qt (in einem Thread).
+
+    encode(image, "png-fast")   # Voreinstellung
+    encode(image, "JPEG", 80)   # oder ein Qt-Bildformat
+"""
+import io
+import os
+import struct
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtGui import QImage
+
+from clipboard import encode_image
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import qoi
+except ImportError:
+    qoi = None
+
+# Ungefähre Rohdaten (Bytes) je parallel komprimiertem Streifen
+PNG_STRIP_BYTES = 2 * 1024 * 1024
+
+# Fenster von deflate; so viele Bytes des vorigen Streifens dienen als Wörterbuch
+DEFLATE_WINDOW = 32 * 1024
+
+# Voreinstellung: Bezeichnung im Speichern-Dialog, Dateiendung, verlustfrei?
+ExportPreset = namedtuple("ExportPreset", "label extension lossless")
+
+PRESETS = {
+    "png": ExportPreset("PNG", ".png", True),
+    "png-fast": ExportPreset("PNG schnell", ".png", True),
+    "png-max": ExportPreset("PNG maximal komprimiert", ".png", True),
+    "jpeg-90": ExportPreset("JPEG Qualität 90", ".jpg", False),
+    "jpeg-75": ExportPreset("JPEG Qualität 75", ".jpg", False),
+    "webp-90": ExportPreset("WebP Qualität 90", ".webp", False),
+    "webp-75": ExportPreset("WebP Qualität 75", ".webp", False),
+    "qoi": ExportPreset("QOI (verlustfrei, schnell)", ".qoi", True),
+}
+
+# Voreinstellungen mit optionalen Abhängigkeiten
+PILLOW_PRESETS = {"webp-90", "webp-75"}
+QOI_PRESETS = {"qoi"}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_ADLER_BASE = 65521
+
+_pool = None
+
+
+def available_presets():
+    """Namen aller Voreinstellungen, die in dieser Umgebung kodieren können"""
+    missing = set()
+    if Image is None:
+        missing |= PILLOW_PRESETS
+    if qoi is None or numpy is None:
+        missing |= QOI_PRESETS
+    return [name for name in PRESETS if name not in missing]
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="encode")
+    return _pool
+
+
+def pixel_rows(image, alpha=True):
+    """Bild als 8-Bit-RGB bzw. -RGBA: (Bild, Kanäle); RGBA nur bei tatsächlich transparenten Pixeln"""
+    if alpha and image.hasAlphaChannel():
+        rgba = image.convertToFormat(QImage.Format_RGBA8888)
+        bits = rgba.constBits()
+        bits.setsize(rgba.sizeInBytes())
+        # Zeilen von RGBA8888 haben keine Auffüllung, der Alphakanal ist jedes vierte Byte
+        if bits.asstring()[3::4] != b"\xff" * (rgba.width() * rgba.height()):
+            return rgba, 4
+    return image.convertToFormat(QImage.Format_RGB888), 3
+
+
+def adler32_combine(adler1, adler2, length2):
+    """Adler-32 zweier aneinandergehängter Daten aus den Einzelsummen (wie zlib)"""
+    remainder = length2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (remainder * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - remainder) % _ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def _filter_none(lines, width_bytes):
+    """Zeilen mit Filtertyp 0 (ohne Filter)"""
+    return b"".join(b"\x00" + bytes(line[:width_bytes]) for line in lines)
+
+
+def _filter_adaptive(rows, above, bpp):
+    """Wählt je Zeile den PNG-Filter mit der kleinsten Summe der Beträge (Heuristik von libpng)"""
+    rows = rows.astype(numpy.int16)
+    up = numpy.vstack([above.astype(numpy.int16)[None], rows[:-1]])
+    left = numpy.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+    upper_left = numpy.zeros_like(rows)
+    upper_left[:, bpp:] = up[:, :-bpp]
+
+    # Paeth-Vorhersage
+    estimate = left + up - upper_left
+    distance_left = numpy.abs(estimate - left)
+    distance_up = numpy.abs(estimate - up)
+    distance_upper_left = numpy.abs(estimate - upper_left)
+    paeth = numpy.where((distance_left <= distance_up) & (distance_left <= distance_upper_left), left,
+                        numpy.where(distance_up <= distance_upper_left, up, upper_left))
+
+    candidates = numpy.stack([rows, rows - left, rows - up, rows - (left + up) // 2, rows - paeth])
+    candidates = (candidates & 0xFF).astype(numpy.uint8)
+    # Beträge als vorzeichenbehaftete Bytes, wie es libpng für die Auswahl tut
+    cost = numpy.abs(candidates.view(numpy.int8).astype(numpy.int32)).sum(axis=2)
+    choice = cost.argmin(axis=0)
+    chosen = candidates[choice, numpy.arange(len(choice))]
+    return numpy.hstack([choice.astype(numpy.uint8)[:, None], chosen]).tobytes()
+
+
+def _strip(image, first, last, level, adaptive):
+    """Filtert und komprimiert die Zeilen first..last-1; liefert (deflate-Teil, Adler-32, Länge)"""
+    width_bytes = image.width() * (image.depth() // 8)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    stride = image.bytesPerLine()
+    # Zeilen des vorigen Streifens, deren gefilterte Bytes als Wörterbuch dienen
+    context = min(first, -(-DEFLATE_WINDOW // (width_bytes + 1)))
+    start = first - context
+
+    if adaptive:
+        pixels = numpy.frombuffer(bits, numpy.uint8).reshape(image.height(), stride)[:, :width_bytes]
+        above = pixels[start - 1] if start > 0 else numpy.zeros(width_bytes, numpy.uint8)
+        filtered = _filter_adaptive(pixels[start:last], above, image.depth() // 8)
+    else:
+        view = memoryview(bits)
+        filtered = _filter_none((view[y * stride:y * stride + width_bytes] for y in range(start, last)),
+                                width_bytes)
+
+    split = context * (width_bytes + 1)
+    data = filtered[split:]
+    if split:
+        dictionary = filtered[max(0, split - DEFLATE_WINDOW):split]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    flush = zlib.Z_FINISH if last == image.height() else zlib.Z_SYNC_FLUSH
+    return compressor.compress(data) + compressor.flush(flush), zlib.adler32(data), len(data)
+
+
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)))
+
+
+def encode_png(image, level=6, adaptive=False):
+    """PNG mit paralleler Kompression der Streifen (adaptive Filter nur mit numpy)"""
+    pixels, channels = pixel_rows(image)
+    width, height = pixels.width(), pixels.height()
+    rows = max(1, PNG_STRIP_BYTES // (width * channels + 1))
+    strips = [(first, min(height, first + rows)) for first in range(0, height, rows)]
+    adaptive = adaptive and numpy is not None
+
+    def compress(strip):
+        return _strip(pixels, strip[0], strip[1], level, adaptive)
+
+    parts = list(_executor().map(compress, strips)) if len(strips) > 1 else [compress(strips[0])]
+
+    checksum = 1
+    for _, adler, length in parts:
+        checksum = adler32_combine(checksum, adler, length)
+    # zlib-Kopf (CMF, FLG mit Kompressionsstufe) und Prüfsumme rahmen die deflate-Teile ein
+    header = b"\x78" + (b"\x01", b"\x5e", b"\x9c", b"\xda")[(level >= 2) + (level >= 6) + (level >= 7)]
+    idat = [header + parts[0][0]] + [part for part, _, _ in parts[1:]]
+    idat[-1] += struct.pack(">I", checksum)
+
+    color_type = 6 if channels == 4 else 2
+    return b"".join([
+        _PNG_SIGNATURE,
+        _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)),
+        *(_chunk(b"IDAT", data) for data in idat),
+        _chunk(b"IEND", b""),
+    ])
+
+
+def encode_pillow(image, fmt, **options):
+    """Kodiert über Pillow (JPEG, WebP)"""
+    pixels, channels = pixel_rows(image, alpha=fmt != "JPEG")
+    mode = "RGBA" if channels == 4 else "RGB"
+    bits = pixels.constBits()
+    bits.setsize(pixels.sizeInBytes())
+    pil_image = Image.frombuffer(mode, (pixels.width(), pixels.height()), bits, "raw", mode,
+                                 pixels.bytesPerLine(), 1)
+    buffer = io.BytesIO()
+    pil_image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def encode_qoi(image):
+    """QOI über das Paket qoi"""
+    pixels, channels = pixel_rows(image)
+    bits = pixels.constBits()
+    bits.setsize(pixels.sizeInBytes())
+    rows = numpy.frombuffer(bits, numpy.uint8).reshape(pixels.height(), pixels.bytesPerLine())
+    array = rows[:, :pixels.width() * channels].reshape(pixels.height(), pixels.width(), channels)
+    return qoi.encode(numpy.ascontiguousarray(array))
+
+
+def encode_preset(image, name):
+    """Kodiert ein QImage mit einer Voreinstellung aus PRESETS und liefert die Bytes"""
+    if name == "png":
+        return bytes(encode_image(image, "PNG"))
+    if name == "png-fast":
+        return encode_png(image, level=1)
+    if name == "png-max":
+        if numpy is None:
+            # Ohne numpy sind Filter nur in Qt schnell genug; Qualität 0 heißt zlib-Stufe 9
+            return bytes(encode_image(image, "PNG", 0))
+        return encode_png(image, level=9, adaptive=True)
+    kind, _, quality = name.partition("-")
+    if kind == "jpeg":
+        if Image is None:
+            return bytes(encode_image(image, "JPEG", int(quality)))
+        return encode_pillow(image, "JPEG", quality=int(quality))
+    if name not in available_presets():
+        if name in PRESETS:
+            raise ValueError(f"{PRESETS[name].label} benötigt {'qoi und numpy' if name in QOI_PRESETS else 'Pillow'}")
+        raise ValueError(f"Unbekannte Export-Voreinstellung: {name}")
+    if kind == "webp":
+        return encode_pillow(image, "WEBP", quality=int(quality))
+    return encode_qoi(image)
+
+
+def encode(image, fmt, quality=-1):
+    """Kodiert mit einer Voreinstellung (Name aus PRESETS) oder einem Qt-Bildformat"""
+    if fmt in PRESETS:
+        return encode_preset(image, fmt)
+    return bytes(encode_image(image, fmt, quality))
@@ -0,0 +1,202 @@
+"""
+Export für den Snipping Tool Clone
+----------------------------------
+FlattenedComposite hält das Bild mit allen Annotationen als fertiges QImage und
+aktualisiert nur die Bereiche, in denen sich Annotationen geändert haben. Das
+Kodieren (Qt-Bildformat oder Voreinstellung aus encoders.PRESETS) und Schreiben
+übernimmt ExportTask in einem Worker-Thread.
+Für eine unveränderte Szene werden die zuletzt kodierten Bytes wiederverwendet.
+"""
+import os
+
+from PyQt5.QtCore import Qt, QObject, QRectF, QRunnable, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QRegion
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem
+
+from encoders import encode
+from latency import tracer
+from workers import worker_pool
+
+# Dateiendung -> Qt-Bildformat bzw. Voreinstellung (Formate, die Qt nicht schreiben kann)
+EXPORT_FORMATS = {
+    ".png": "PNG",
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".bmp": "BMP",
+    ".webp": "webp-90",
+    ".qoi": "qoi",
+}
+
+
+def export_format(path):
+    """Bildformat anhand der Dateiendung, PNG falls unbekannt"""
+    return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), "PNG")
+
+
+class FlattenedComposite:
+    """Inkrementell gepflegtes Gesamtbild aus Aufnahme und Annotationen"""
+
+    def __init__(self, scene, base_image, base_item):
+        self.scene = scene
+        self.base_image = base_image
+        self.base_item = base_item
+        self.version = 0
+        self._image = base_image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        self._dirty = QRegion()
+        self._encoded = {}
+
+    def invalidate(self, rect):
+        """Markiert einen Szenenbereich (QRectF) als veraltet"""
+        rect = rect.toAlignedRect().adjusted(-1, -1, 1, 1).intersected(self._image.rect())
+        if not rect.isEmpty():
+            self._dirty += rect
+            self.version += 1
+
+    def image(self):
+        """Aktuelles Gesamtbild als eigene Kopie; nur veraltete Bereiche werden neu gezeichnet
+
+        Die Kopie teilt die Pixel nur, bis das Gesamtbild das nächste Mal
+        aktualisiert wird (der QPainter löst sie dann ab). Export-Worker und
+        Zwischenablage behalten so den Stand zum Zeitpunkt des Aufrufs.
+        """
+        if self._dirty.isEmpty():
+            return QImage(self._image)
+
+        painter = QPainter(self._image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        for rect in self._dirty.rects():
+            painter.save()
+            painter.setClipRect(rect)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.drawImage(rect, self.base_image, rect)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            self._render_annotations(painter, rect)
+            painter.restore()
+        painter.end()
+
+        self._dirty = QRegion()
+        return QImage(self._image)
+
+    def _render_annotations(self, painter, rect):
+        """Zeichnet alle Items außer dem Basisbild, die den Bereich berühren"""
+        rect = QRectF(rect)
+        items = self.scene.items(rect, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder)
+        for item in items:
+            if item is self.base_item or not item.isVisible():
+                continue
+            option = QStyleOptionGraphicsItem()
+            option.exposedRect = item.mapRectFromScene(rect)
+            painter.save()
+            painter.setTransform(item.sceneTransform(), True)
+            painter.setOpacity(item.effectiveOpacity())
+            item.paint(painter, option, None)
+            painter.restore()
+
+    def cached_bytes(self, fmt, quality=-1):
+        """Zuletzt kodierte Bytes, falls die Szene seitdem unverändert ist"""
+        entry = self._encoded.get((fmt, quality))
+        if entry and entry[0] == self.version:
+            return entry[1]
+        return None
+
+    def store_bytes(self, version, fmt, quality, data):
+        if version == self.version:
+            self._encoded[(fmt, quality)] = (version, data)
+
+
+class _ExportSignals(QObject):
+    finished = pyqtSignal(bytes)
+    failed = pyqtSignal(str)
+
+
+class ExportTask(QRunnable):
+    """Kodiert ein Bild im Worker-Thread und schreibt es optional in eine Datei"""
+
+    def __init__(self, image, fmt, path=None, quality=-1, data=None):
+        super().__init__()
+        self.image = image
+        self.fmt = fmt
+        self.path = path
+        self.quality = quality
+        self.data = data
+        self.cancelled = False
+        self.signals = _ExportSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            data = self.data
+            if data is None:
+                if self.cancelled:
+                    return
+                with tracer.stage("export.encode", format=self.fmt) as fields:
+                    data = encode(self.image, self.fmt, self.quality)
+                    fields["bytes"] = len(data)
+            if self.cancelled:
+                return
+            if self.path:
+                with tracer.stage("export.write", bytes=len(data)):
+                    with open(self.path, "wb") as f:
+                        f.write(data)
+            if not self.cancelled:
+                self.signals.finished.emit(data)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class Exporter(QObject):
+    """Startet Exporte im Hintergrund und verwaltet Abbruch und Byte-Cache"""
+
+    started = pyqtSignal(str)
+    finished = pyqtSignal(str, bytes)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, composite, parent=None):
+        super().__init__(parent)
+        self.composite = composite
+        self.task = None
+
+    def is_running(self):
+        return self.task is not None
+
+    def is_saving(self):
+        """Läuft ein Export, der in eine Datei schreibt?"""
+        return self.task is not None and bool(self.task.path)
+
+    def export(self, fmt, path=None, quality=-1):
+        """Kodiert das aktuelle Gesamtbild (und speichert es, falls path gesetzt ist)"""
+        self.cancel()
+        # Ein Speichern kann das Freigeben des Gesamtbildes (inaktiver Tab) überdauern
+        composite = self.composite
+        version = composite.version
+        with tracer.stage("export.flatten") as fields:
+            image = composite.image()
+            fields["bytes"] = image.sizeInBytes()
+        task = ExportTask(image, fmt, path, quality, composite.cached_bytes(fmt, quality))
+
+        def done(data):
+            if self.task is task:
+                self.task = None
+                composite.store_bytes(version, fmt, quality, data)
+                self.finished.emit(path or "", data)
+
+        def error(message):
+            if self.task is task:
+                self.task = None
+                self.failed.emit(message)
+
+        task.signals.finished.connect(done)
+        task.signals.failed.connect(error)
+        self.task = task
+        self.started.emit(path or "")
+        worker_pool().start(task)
+        return task
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.cancelled.emit()
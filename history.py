@@ -0,0 +1,447 @@
+"""
+Aufnahmeverlauf für den Snipping Tool Clone
+-------------------------------------------
+Jede Aufnahme wird inhaltsadressiert abgelegt (SHA-256 der Pixel, Datei als
+PNG unter objects/), die Metadaten stehen in einer SQLite-Datenbank. Exakte
+Duplikate werden nicht erneut gespeichert, sondern nach vorne geholt; fast
+gleiche Aufnahmen erkennt ein Differenz-Hash (dHash) und verweisen auf ihr
+Gegenstück. Vorschaubilder liegen als JPEG in einem Cache auf der Festplatte,
+der nach Zugriffszeit (LRU) auf THUMBNAIL_CACHE_LIMIT begrenzt wird.
+
+Der Verlauf behält höchstens HISTORY_MAX_ENTRIES Aufnahmen mit zusammen
+HISTORY_MAX_BYTES; darüber hinaus werden die ältesten Einträge samt Dateien
+gelöscht. SNIPPING_TOOL_HISTORY=0 schaltet den Verlauf ab,
+SNIPPING_TOOL_HISTORY_MAX_ENTRIES und SNIPPING_TOOL_HISTORY_MAX_MB ändern die
+Grenzen.
+
+Speichern und Vorschaubilder laufen in Worker-Threads; jeder Thread verwendet
+eine eigene SQLite-Verbindung.
+"""
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from PyQt5.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QObject, QRunnable, QSize, pyqtSignal
+)
+from PyQt5.QtGui import QColor, QImage, QPixmap
+from PyQt5.QtWidgets import QListView
+
+from workers import worker_pool
+
+# Kantenlänge der Vorschaubilder und Größe des Caches auf der Festplatte
+THUMBNAIL_SIZE = 160
+THUMBNAIL_CACHE_LIMIT = 64 * 1024 * 1024
+
+# Aufnahmen im Verlauf; ältere werden samt Datei gelöscht
+HISTORY_MAX_ENTRIES = 5000
+HISTORY_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Vorschaubilder, die das Modell im Speicher hält
+THUMBNAIL_MEMORY_ITEMS = 500
+
+# Maximaler Hamming-Abstand der dHashes für "fast gleich" und Zahl der verglichenen Einträge
+NEAR_DUPLICATE_DISTANCE = 4
+NEAR_DUPLICATE_WINDOW = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    created REAL NOT NULL,
+    mode TEXT,
+    width INTEGER,
+    height INTEGER,
+    size INTEGER,
+    phash INTEGER,
+    similar_to INTEGER
+);
+CREATE INDEX IF NOT EXISTS captures_created ON captures(created);
+CREATE INDEX IF NOT EXISTS captures_hash ON captures(hash);
+"""
+
+HistoryEntry = namedtuple("HistoryEntry", "id hash created mode width height size similar_to")
+
+
+class HistoryError(Exception):
+    """Verlauf kann nicht geöffnet werden"""
+
+
+def history_directory():
+    """Speicherort des Verlaufs (SNIPPING_TOOL_HISTORY_DIR oder XDG-Datenverzeichnis)"""
+    directory = os.environ.get("SNIPPING_TOOL_HISTORY_DIR")
+    if directory:
+        return directory
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "snipping-tool", "history")
+
+
+def history_enabled():
+    """False, wenn der Verlauf mit SNIPPING_TOOL_HISTORY=0 (oder off/false/no) abgeschaltet ist"""
+    return os.environ.get("SNIPPING_TOOL_HISTORY", "1").strip().lower() not in ("0", "off", "false", "no")
+
+
+def history_limits():
+    """(Anzahl, Bytes) aus SNIPPING_TOOL_HISTORY_MAX_ENTRIES und _MAX_MB oder den Standardwerten"""
+    try:
+        entries = int(os.environ.get("SNIPPING_TOOL_HISTORY_MAX_ENTRIES") or HISTORY_MAX_ENTRIES)
+    except ValueError:
+        entries = HISTORY_MAX_ENTRIES
+    value = os.environ.get("SNIPPING_TOOL_HISTORY_MAX_MB")
+    try:
+        size = int(float(value) * 1024 * 1024) if value else HISTORY_MAX_BYTES
+    except ValueError:
+        size = HISTORY_MAX_BYTES
+    return entries, size
+
+
+def content_hash(image):
+    """SHA-256 über Größe und Pixel eines RGB32- oder ARGB32-Bildes"""
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    digest = hashlib.sha256(f"{image.width()}x{image.height()}:".encode())
+    digest.update(bits)
+    return digest.hexdigest()
+
+
+def perceptual_hash(image):
+    """64-Bit-Differenz-Hash: Helligkeitsverlauf eines 9x8-Graustufenbildes"""
+    small = image.scaled(9, 8, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format_Grayscale8)
+    value = 0
+    for y in range(8):
+        row = small.constScanLine(y).asstring(9)
+        for x in range(8):
+            value = (value << 1) | (row[x] > row[x + 1])
+    # SQLite speichert vorzeichenbehaftete 64-Bit-Zahlen
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+class HistoryStore:
+    """Ablage, Index und Vorschaubild-Cache des Verlaufs"""
+
+    def __init__(self, directory=None, thumbnail_limit=THUMBNAIL_CACHE_LIMIT, max_entries=None, max_bytes=None):
+        self.directory = directory or history_directory()
+        self.thumbnail_limit = thumbnail_limit
+        default_entries, default_bytes = history_limits()
+        self.max_entries = max_entries if max_entries is not None else default_entries
+        self.max_bytes = max_bytes if max_bytes is not None else default_bytes
+        self.objects_dir = os.path.join(self.directory, "objects")
+        self.thumbnails_dir = os.path.join(self.directory, "thumbnails")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thumbnail_bytes = None
+        try:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            os.makedirs(self.thumbnails_dir, exist_ok=True)
+            with self.connection() as db:
+                db.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            raise HistoryError(f"Verlauf in {self.directory} nicht verfügbar: {e}") from e
+
+    def connection(self):
+        """SQLite-Verbindung des aktuellen Threads"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(os.path.join(self.directory, "history.sqlite3"), timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".png")
+
+    def thumbnail_path(self, digest):
+        return os.path.join(self.thumbnails_dir, digest + ".jpg")
+
+    def entries(self):
+        """Alle Einträge, neueste zuerst"""
+        rows = self.connection().execute(
+            "SELECT id, hash, created, mode, width, height, size, similar_to "
+            "FROM captures ORDER BY created DESC"
+        )
+        return [HistoryEntry(*row) for row in rows]
+
+    def store(self, image, mode=""):
+        """Legt eine Aufnahme ab und liefert ihren Eintrag (blockiert, für Worker-Threads)"""
+        # Freiform-Ausschnitte behalten ihren Alphakanal
+        image = image.convertToFormat(QImage.Format_ARGB32 if image.hasAlphaChannel() else QImage.Format_RGB32)
+        digest = content_hash(image)
+        now = time.time()
+        db = self.connection()
+
+        row = db.execute("SELECT id FROM captures WHERE hash = ? ORDER BY created DESC LIMIT 1",
+                         (digest,)).fetchone()
+        if row:
+            # Exaktes Duplikat: nur nach vorne holen
+            with db:
+                db.execute("UPDATE captures SET created = ? WHERE id = ?", (now, row[0]))
+            return self.entry(row[0])
+
+        phash = perceptual_hash(image)
+        similar_to = None
+        recent = db.execute("SELECT id, phash FROM captures ORDER BY created DESC LIMIT ?",
+                            (NEAR_DUPLICATE_WINDOW,))
+        for entry_id, other in recent:
+            if other is not None and hamming_distance(phash, other) <= NEAR_DUPLICATE_DISTANCE:
+                similar_to = entry_id
+                break
+
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not image.save(path + ".tmp", "PNG"):
+            raise OSError(f"{path} konnte nicht geschrieben werden")
+        os.replace(path + ".tmp", path)
+        self.save_thumbnail(digest, image)
+
+        with db:
+            cursor = db.execute(
+                "INSERT INTO captures (hash, created, mode, width, height, size, phash, similar_to) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, now, mode, image.width(), image.height(), os.path.getsize(path), phash, similar_to)
+            )
+        self.evict()
+        return self.entry(cursor.lastrowid)
+
+    def entry(self, entry_id):
+        row = self.connection().execute(
+            "SELECT id, hash, created, mode, width, height, size, similar_to FROM captures WHERE id = ?",
+            (entry_id,)
+        ).fetchone()
+        return HistoryEntry(*row) if row else None
+
+    def evict(self):
+        """Löscht die ältesten Einträge samt Dateien, bis Anzahl und Größe in den Grenzen liegen
+
+        Der neueste Eintrag bleibt immer erhalten. Liefert die Zahl der gelöschten Einträge.
+        """
+        db = self.connection()
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM captures").fetchone()
+        victims = []
+        for entry_id, digest, size in db.execute("SELECT id, hash, size FROM captures ORDER BY created"):
+            if count <= 1 or (count <= self.max_entries and total <= self.max_bytes):
+                break
+            victims.append((entry_id, digest))
+            count -= 1
+            total -= size or 0
+        if not victims:
+            return 0
+
+        ids = [(entry_id,) for entry_id, _ in victims]
+        with db:
+            db.executemany("DELETE FROM captures WHERE id = ?", ids)
+            db.executemany("UPDATE captures SET similar_to = NULL WHERE similar_to = ?", ids)
+        for _, digest in victims:
+            if db.execute("SELECT 1 FROM captures WHERE hash = ? LIMIT 1", (digest,)).fetchone():
+                continue
+            self._remove(self.object_path(digest))
+            size = self._remove(self.thumbnail_path(digest))
+            if size:
+                with self._lock:
+                    if self._thumbnail_bytes is not None:
+                        self._thumbnail_bytes -= size
+        return len(victims)
+
+    @staticmethod
+    def _remove(path):
+        """Löscht eine Datei und liefert ihre Größe (0, wenn sie fehlt)"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        return size
+
+    def save_thumbnail(self, digest, image):
+        thumbnail = image.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        path = self.thumbnail_path(digest)
+        thumbnail.save(path, "JPEG", 85)
+        with self._lock:
+            self._account(os.path.getsize(path))
+        return thumbnail
+
+    def load_thumbnail(self, digest):
+        """Vorschaubild aus dem Cache oder neu aus der Aufnahme erzeugt (blockiert)"""
+        path = self.thumbnail_path(digest)
+        thumbnail = QImage(path)
+        if not thumbnail.isNull():
+            # Zugriffszeit für die LRU-Verdrängung
+            os.utime(path)
+            return thumbnail
+        image = QImage(self.object_path(digest))
+        if image.isNull():
+            return image
+        return self.save_thumbnail(digest, image)
+
+    def _account(self, size):
+        # Größe des Caches erst beim ersten Zugriff ermitteln, danach mitzählen
+        if self._thumbnail_bytes is None:
+            self._thumbnail_bytes = sum(e.stat().st_size for e in os.scandir(self.thumbnails_dir))
+        else:
+            self._thumbnail_bytes += size
+        if self._thumbnail_bytes > self.thumbnail_limit:
+            self._trim_thumbnails()
+
+    def _trim_thumbnails(self):
+        # Am längsten nicht verwendete Vorschaubilder löschen, bis 90 % der Grenze erreicht sind
+        files = sorted(os.scandir(self.thumbnails_dir), key=lambda e: e.stat().st_mtime)
+        for entry in files:
+            if self._thumbnail_bytes <= self.thumbnail_limit * 0.9:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._thumbnail_bytes -= size
+
+
+class _HistorySignals(QObject):
+    stored = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    thumbnail_loaded = pyqtSignal(str, QImage)
+    thumbnail_failed = pyqtSignal(str, str)
+
+
+class HistoryTask(QRunnable):
+    """Speichert eine Aufnahme im Worker-Thread im Verlauf"""
+
+    def __init__(self, store, image, mode=""):
+        super().__init__()
+        self.store = store
+        self.image = image
+        self.mode = mode
+        self.signals = _HistorySignals()
+
+    def run(self):
+        try:
+            self.signals.stored.emit(self.store.store(self.image, self.mode))
+        except (OSError, sqlite3.Error) as e:
+            self.signals.failed.emit(str(e))
+
+
+class ThumbnailTask(QRunnable):
+    """Lädt ein Vorschaubild im Worker-Thread"""
+
+    def __init__(self, store, digest, signals):
+        super().__init__()
+        self.store = store
+        self.digest = digest
+        self.signals = signals
+
+    def run(self):
+        try:
+            thumbnail = self.store.load_thumbnail(self.digest)
+        except Exception as e:
+            self.signals.thumbnail_failed.emit(self.digest, str(e))
+            return
+        self.signals.thumbnail_loaded.emit(self.digest, thumbnail)
+
+
+class HistoryModel(QAbstractListModel):
+    """Listenmodell des Verlaufs; Vorschaubilder werden erst beim Anzeigen geladen"""
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.entries = []
+        self.rows = {}
+        self.thumbnails = OrderedDict()
+        self.pending = set()
+        self.signals = _HistorySignals()
+        self.signals.thumbnail_loaded.connect(self.thumbnail_loaded)
+        self.signals.thumbnail_failed.connect(self.thumbnail_failed)
+        # Zuletzt angeforderte Vorschaubilder (sichtbarer Bereich) haben Vorrang
+        self.priority = itertools.count()
+        placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE * 9 // 16)
+        placeholder.fill(QColor("#e0e0e0"))
+        self.placeholder = placeholder
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self.entries = self.store.entries()
+        self.rows = {}
+        for row, entry in enumerate(self.entries):
+            self.rows.setdefault(entry.hash, row)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return time.strftime("%d.%m.%Y %H:%M", time.localtime(entry.created))
+        if role == Qt.ToolTipRole:
+            tooltip = f"{entry.mode}\n{entry.width} × {entry.height} px, {entry.size / 1024:.0f} KB"
+            if entry.similar_to is not None:
+                tooltip += "\nÄhnlich zu einer früheren Aufnahme"
+            return tooltip
+        if role == Qt.DecorationRole:
+            return self.thumbnail(entry.hash)
+        if role == Qt.UserRole:
+            return entry
+        return None
+
+    def thumbnail(self, digest):
+        pixmap = self.thumbnails.get(digest)
+        if pixmap is not None:
+            self.thumbnails.move_to_end(digest)
+            return pixmap
+        if digest not in self.pending:
+            self.pending.add(digest)
+            worker_pool().start(ThumbnailTask(self.store, digest, self.signals),
+                                next(self.priority) % 1000000)
+        return self.placeholder
+
+    def thumbnail_loaded(self, digest, image):
+        self.pending.discard(digest)
+        if image.isNull():
+            return
+        self.thumbnails[digest] = QPixmap.fromImage(image)
+        while len(self.thumbnails) > THUMBNAIL_MEMORY_ITEMS:
+            self.thumbnails.popitem(last=False)
+        row = self.rows.get(digest)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def thumbnail_failed(self, digest, message):
+        # Platzhalter behalten; beim nächsten Anzeigen wird es erneut versucht
+        self.pending.discard(digest)
+
+
+class HistoryView(QListView):
+    """Vorschaubilder des Verlaufs; öffnet eine Aufnahme per Doppelklick"""
+
+    open_requested = pyqtSignal(str)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.setGridSize(QSize(THUMBNAIL_SIZE + 16, THUMBNAIL_SIZE + 32))
+        # Gleich große Einträge: die Ansicht fragt nur sichtbare Zeilen ab
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setModel(HistoryModel(store, self))
+        self.doubleClicked.connect(self.open_entry)
+
+    def open_entry(self, index):
+        entry = index.data(Qt.UserRole)
+        if entry is not None:
+            self.open_requested.emit(self.store.object_path(entry.hash))
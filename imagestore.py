@@ -0,0 +1,307 @@
+"""
+Gemeinsamer Bildspeicher für den Snipping Tool Clone
+----------------------------------------------------
+Alle geöffneten Aufnahmen liegen genau einmal im ImageStore und werden über
+Referenzen geteilt (Editor-Tabs, letzter Screenshot). Ein Bild wird gelöscht,
+sobald die letzte Referenz freigegeben ist.
+
+Bilder aktiver Dokumente sind angeheftet (pin). Übersteigen die Pixel im
+Speicher das Budget, lagert der Speicher die am längsten nicht benutzten,
+nicht angehefteten Bilder zlib-komprimiert in ein Cache-Verzeichnis aus
+(in einem Worker-Thread) und lädt sie beim nächsten Zugriff transparent wieder. Da
+sich die Pixel einer Aufnahme nicht mehr ändern, bleibt die Datei bis zur
+Freigabe gültig; ein erneutes Auslagern kostet dann nichts mehr.
+
+Das Budget lässt sich mit SNIPPING_TOOL_MEMORY_BUDGET (MB) einstellen.
+"""
+import ctypes
+import itertools
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+from PyQt5.QtCore import QCoreApplication, QObject, QPoint, QRunnable, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from workers import worker_pool
+
+# Speicherbudget für Bildpixel in Bytes
+IMAGE_STORE_BUDGET = 1024 * 1024 * 1024
+
+# zlib-Stufe für ausgelagerte Bilder; Stufe 1 ist schnell und packt Bildschirminhalte gut
+SPILL_COMPRESSION = 1
+
+# glibc behält freigegebene Bildpuffer (knapp unter der mmap-Schwelle) sonst im Heap
+try:
+    _malloc_trim = ctypes.CDLL("libc.so.6").malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None
+
+# Kopf einer ausgelagerten Datei: Breite, Höhe, Bytes pro Zeile, Format, Offset, Pixelverhältnis
+_HEADER = struct.Struct("<4sIIIiiid")
+_MAGIC = b"SNPX"
+
+
+class ImageStoreError(Exception):
+    """Ein ausgelagertes Bild kann nicht geschrieben oder gelesen werden"""
+
+
+def memory_budget():
+    """Budget aus SNIPPING_TOOL_MEMORY_BUDGET (MB) oder IMAGE_STORE_BUDGET"""
+    value = os.environ.get("SNIPPING_TOOL_MEMORY_BUDGET")
+    try:
+        return int(float(value) * 1024 * 1024) if value else IMAGE_STORE_BUDGET
+    except ValueError:
+        return IMAGE_STORE_BUDGET
+
+
+def release_heap():
+    """Gibt freien Heap-Speicher an das System zurück (nur mit glibc, sonst ohne Wirkung)"""
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+def cache_directory():
+    """Cache-Verzeichnis (XDG), in dem jede Sitzung ein eigenes Auslagerungsverzeichnis anlegt"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "snipping-tool")
+
+
+def write_spill(path, image):
+    """Schreibt die Pixel eines Bildes zlib-komprimiert in eine Datei"""
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    header = _HEADER.pack(_MAGIC, image.width(), image.height(), image.bytesPerLine(), image.format(),
+                          image.offset().x(), image.offset().y(), image.devicePixelRatio())
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(zlib.compress(bits.asstring(), SPILL_COMPRESSION))
+    os.replace(temp_path, path)
+
+
+def read_spill(path):
+    """Liest ein mit write_spill geschriebenes Bild"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ImageStoreError(f"Ausgelagertes Bild ist unvollständig: {path}")
+    magic, width, height, bytes_per_line, fmt, x, y, ratio = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ImageStoreError(f"Keine ausgelagerte Bilddatei: {path}")
+    pixels = zlib.decompress(data[_HEADER.size:])
+    image = QImage(width, height, QImage.Format(fmt))
+    if image.bytesPerLine() != bytes_per_line or image.sizeInBytes() != len(pixels):
+        raise ImageStoreError(f"Ausgelagertes Bild passt nicht zum Format: {path}")
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    bits[:len(pixels)] = pixels
+    image.setOffset(QPoint(x, y))
+    image.setDevicePixelRatio(ratio)
+    return image
+
+
+class _Entry:
+    __slots__ = ("image", "size", "refs", "pins", "path", "spilling")
+
+    def __init__(self, image):
+        self.image = image
+        self.size = image.sizeInBytes()
+        self.refs = 1
+        self.pins = 0
+        self.path = None
+        self.spilling = False
+
+
+class _SpillSignals(QObject):
+    written = pyqtSignal(int)
+    failed = pyqtSignal(int, str)
+
+
+class SpillTask(QRunnable):
+    """Schreibt ein Bild im Worker-Thread in den Auslagerungs-Cache"""
+
+    def __init__(self, key, image, path):
+        super().__init__()
+        self.key = key
+        self.image = image
+        self.path = path
+        self.signals = _SpillSignals()
+        # Gesetzt, sobald das Ergebnis-Signal abgeschickt ist
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            write_spill(self.path, self.image)
+        except OSError as e:
+            self.signals.failed.emit(self.key, str(e))
+        else:
+            self.signals.written.emit(self.key)
+        finally:
+            self.done.set()
+
+
+class ImageStore(QObject):
+    """Referenzgezählter Bildspeicher mit Speicherbudget und Auslagerung auf die Festplatte"""
+
+    # Pixel im Speicher bzw. auf der Festplatte (Bytes) haben sich geändert
+    usage_changed = pyqtSignal()
+    # Auslagern ist fehlgeschlagen; das Bild bleibt im Speicher
+    spill_failed = pyqtSignal(str)
+
+    _keys = itertools.count(1)
+
+    def __init__(self, budget=None, directory=None, parent=None):
+        super().__init__(parent)
+        self.budget = budget if budget is not None else memory_budget()
+        self._directory = directory
+        self._spill_directory = None
+        # Schlüssel -> Eintrag, in Reihenfolge der letzten Benutzung (LRU zuerst)
+        self._entries = OrderedDict()
+        self._tasks = {}
+        self.memory_used = 0
+        self.disk_used = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def add(self, image):
+        """Legt ein Bild ab und liefert seinen Schlüssel (mit einer Referenz)"""
+        key = next(self._keys)
+        self._entries[key] = _Entry(image)
+        self.memory_used += image.sizeInBytes()
+        self.trim()
+        self.usage_changed.emit()
+        return key
+
+    def retain(self, key):
+        self._entries[key].refs += 1
+
+    def release(self, key):
+        """Gibt eine Referenz frei; mit der letzten verschwindet das Bild samt Datei"""
+        entry = self._entries[key]
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+        del self._entries[key]
+        if entry.image is not None:
+            self.memory_used -= entry.size
+        if entry.path is not None:
+            self._remove_file(entry.path)
+        self.usage_changed.emit()
+
+    def pin(self, key):
+        """Hält ein Bild im Speicher, solange sein Dokument aktiv ist"""
+        self._entries[key].pins += 1
+
+    def unpin(self, key):
+        entry = self._entries[key]
+        entry.pins = max(0, entry.pins - 1)
+        self.trim()
+
+    def is_resident(self, key):
+        return self._entries[key].image is not None
+
+    def image(self, key):
+        """Bild zum Schlüssel; ausgelagerte Bilder werden dabei wieder geladen"""
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        if entry.image is None:
+            entry.image = read_spill(entry.path)
+            self.memory_used += entry.size
+            self.trim()
+            self.usage_changed.emit()
+        return entry.image
+
+    def trim(self):
+        """Lagert die ältesten nicht angehefteten Bilder aus, bis das Budget eingehalten ist"""
+        excess = self.memory_used - self.budget - sum(
+            entry.size for entry in self._entries.values() if entry.spilling)
+        for key, entry in self._entries.items():
+            if excess <= 0:
+                break
+            if entry.image is None or entry.pins or entry.spilling:
+                continue
+            excess -= entry.size
+            if entry.path is not None:
+                # Die Datei ist noch gültig, die Pixel können sofort weg
+                self._drop(entry)
+            else:
+                self._spill(key, entry)
+
+    def _drop(self, entry):
+        entry.image = None
+        self.memory_used -= entry.size
+        release_heap()
+        self.usage_changed.emit()
+
+    def _spill(self, key, entry):
+        if self._spill_directory is None:
+            directory = self._directory or cache_directory()
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._spill_directory = tempfile.mkdtemp(prefix="spill-", dir=directory)
+            except OSError as e:
+                self.spill_failed.emit(str(e))
+                return
+        entry.spilling = True
+        task = SpillTask(key, entry.image, os.path.join(self._spill_directory, f"{key}.zimg"))
+        task.signals.written.connect(self._spill_written)
+        task.signals.failed.connect(self._spill_failed)
+        self._tasks[key] = task
+        worker_pool().start(task)
+
+    def _spill_written(self, key):
+        task = self._tasks.pop(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            # Inzwischen freigegeben
+            self._remove_file(task.path, counted=False)
+            return
+        entry.spilling = False
+        entry.path = task.path
+        self.disk_used += os.path.getsize(task.path)
+        # Nur verwerfen, wenn das Bild nicht inzwischen wieder gebraucht wird
+        if not entry.pins and self.memory_used > self.budget:
+            self._drop(entry)
+        else:
+            self.usage_changed.emit()
+        self.trim()
+
+    def _spill_failed(self, key, message):
+        self._tasks.pop(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.spilling = False
+        self.spill_failed.emit(message)
+
+    def _remove_file(self, path, counted=True):
+        try:
+            if counted:
+                self.disk_used -= os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            pass
+
+    def wait(self):
+        """Wartet auf die eigenen laufenden Auslagerungen und übernimmt deren Ergebnis"""
+        while self._tasks:
+            # Andere Aufgaben im gemeinsamen Pool (Export, Verlauf) bleiben unberücksichtigt
+            for task in list(self._tasks.values()):
+                task.done.wait()
+            QCoreApplication.processEvents()
+
+    def close(self):
+        """Wartet auf laufende Auslagerungen und löscht das Verzeichnis dieser Sitzung"""
+        self.wait()
+        if self._spill_directory is not None:
+            shutil.rmtree(self._spill_directory, ignore_errors=True)
+            self._spill_directory = None
+        self.disk_used = 0
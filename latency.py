@@ -0,0 +1,126 @@
+"""
+Latenzmessung für den Snipping Tool Clone
+-----------------------------------------
+Mit SNIPPING_TOOL_TRACE misst das Programm jede Stufe vom Start über das
+Aufnehmen bis zum Export (Startphasen, Aufnahme, Laden in den Editor, erstes
+Zeichnen, Mausereignisse in der Szene, Einebnen, Kodieren, Zwischenablage) mit
+der monotonen Uhr und schreibt je Messung eine JSON-Zeile. Für erzeugte Bilder
+wird die Größe in Bytes mit ausgegeben. Beim Beenden folgt eine Zusammenfassung
+(p50/p95 je Stufe) auf stderr.
+
+    SNIPPING_TOOL_TRACE=trace.jsonl python main.py    # JSON-Zeilen in eine Datei
+    SNIPPING_TOOL_TRACE=1 python main.py              # JSON-Zeilen auf stderr
+    SNIPPING_TOOL_TRACE=exit python main.py           # stderr, Ende nach dem Start
+
+Die Startphasen von main.py heißen startup.<Phase>, die Stufe startup misst
+den gesamten Start bis zum ersten Zeichnen des Hauptfensters. Mit ``exit``
+beendet sich das Programm danach (für automatische Messungen).
+
+Eine Zeile sieht so aus:
+
+    {"stage": "capture", "t": 1.2345, "ms": 8.91, "backend": "mss", "bytes": 8294400}
+
+t ist der Beginn der Stufe in Sekunden seit dem Import dieses Moduls.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_ENV = "SNIPPING_TOOL_TRACE"
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class LatencyTrace:
+    """Sammelt die Dauer benannter Stufen und schreibt sie als JSON-Zeilen"""
+
+    def __init__(self, target=None):
+        self.enabled = bool(target)
+        self.exit_after_startup = target == "exit"
+        self.start = time.perf_counter()
+        # Ende der zuletzt abgeschlossenen Startphase; None, sobald der Start gemessen ist
+        self.last_mark = self.start
+        self.samples = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._owns_file = False
+        if self.enabled:
+            if target in ("1", "-", "exit"):
+                self._file = sys.stderr
+            else:
+                self._file = open(target, "a", encoding="utf-8")
+                self._owns_file = True
+            atexit.register(self.close)
+
+    def record(self, stage, duration, start=None, **fields):
+        """Legt eine Messung (Sekunden) ab; fields kommen unverändert in die JSON-Zeile"""
+        if not self.enabled:
+            return
+        begin = (start if start is not None else time.perf_counter() - duration) - self.start
+        line = json.dumps({"stage": stage, "t": round(begin, 6), "ms": round(duration * 1000, 3), **fields})
+        with self._lock:
+            self.samples.setdefault(stage, []).append(duration)
+            self._file.write(line + "\n")
+
+    def mark(self, phase):
+        """Schließt die laufende Startphase ab und misst sie als Stufe startup.<phase>"""
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.record(f"startup.{phase}", now - self.last_mark, self.last_mark)
+        self.last_mark = now
+
+    def startup_finished(self, phase):
+        """Schließt die letzte Startphase ab und misst den gesamten Start (nur beim ersten Aufruf)
+
+        Liefert True, wenn der Start damit gemessen wurde.
+        """
+        if not self.enabled or self.last_mark is None:
+            return False
+        self.mark(phase)
+        self.record("startup", self.last_mark - self.start, self.start)
+        self.last_mark = None
+        return True
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Misst den Block als Stufe name; in das gelieferte dict können Felder ergänzt werden"""
+        if not self.enabled:
+            yield fields
+            return
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(name, time.perf_counter() - start, start, **fields)
+
+    def summary(self, file=None):
+        """Gibt p50/p95 und Anzahl je Stufe aus"""
+        file = file or sys.stderr
+        with self._lock:
+            stages = {name: list(samples) for name, samples in self.samples.items()}
+        for name, samples in stages.items():
+            print(f"trace {name:<22} n={len(samples):<6} p50={percentile(samples, 0.5) * 1000:8.2f} ms"
+                  f"  p95={percentile(samples, 0.95) * 1000:8.2f} ms", file=file)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.summary()
+        with self._lock:
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.flush()
+            self._file = None
+            self.enabled = False
+
+
+tracer = LatencyTrace(os.environ.get(TRACE_ENV))
@@ -12,392 +12,57 @@ Unterstützte Aufnahmemodi:
 
 Abhängigkeiten:
 - PyQt5 für die GUI
-- gnome-screenshot für die Screenshot-Funktionalität
-- xclip für Zwischenablage-Unterstützung
+- mss für die In-Process-Aufnahme unter X11 (optional)
+- gnome-screenshot als Fallback für die Screenshot-Funktionalität
+
+Ohne Hauptfenster (z. B. für Automatisierung):
+    python main.py --mode full|region|freeform|window --delay N --out PATH --format png|jpg --stdout
 """
-import sys
 import os
-import subprocess
-import tempfile
-from datetime import datetime
-from PyQt5.QtCore import Qt, QRect, QPoint, QSize, QTimer, pyqtSignal, QRectF
-from PyQt5.QtGui import (
-    QPainter, QPen, QBrush, QColor, QPixmap, QIcon, QFont,
-    QPainterPath, QCursor, QImage, QRadialGradient
-)
-from PyQt5.QtWidgets import (
-    QApplication, QWidget, QMainWindow, QAction, QFileDialog,
-    QShortcut, QToolBar, QPushButton, QLabel, QComboBox,
-    QVBoxLayout, QHBoxLayout, QSpinBox, QStatusBar, QMenu,
-    QMessageBox, QSizePolicy, QSlider, QColorDialog, QSplitter,
-    QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsPathItem,
-    QGraphicsEllipseItem, QFrame, QButtonGroup, QToolButton
-)
-
-
-class ColorButton(QPushButton):
-    """Farbauswahlknopf mit Farbvorschau"""
-
-    def __init__(self, color, parent=None):
-        super().__init__(parent)
-        self.setColor(color)
-        self.setFixedSize(32, 32)
-        self.setCursor(Qt.PointingHandCursor)
-        self.clicked.connect(self.choose_color)
-
-    def setColor(self, color):
-        self.color = color
-        self.update()
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setPen(Qt.NoPen)
-
-        rect = self.rect().adjusted(4, 4, -4, -4)
-        painter.setBrush(QBrush(self.color))
-        painter.drawRoundedRect(rect, 5, 5)
-
-    def choose_color(self):
-        color = QColorDialog.getColor(self.color, self)
-        if color.isValid():
-            self.setColor(color)
-            self.update()
-
-
-class DrawingTool:
-    PEN = 1
-    MARKER = 2
-    ERASER = 3
-    TEXT = 4
-    RECTANGLE = 5
-    ELLIPSE = 6
-    ARROW = 7
-
-
-class EditableScene(QGraphicsScene):
-    """Bearbeitbare Grafikszene für den Screenshot"""
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.current_path = None
-        self.last_point = None
-        self.current_tool = DrawingTool.PEN
-        self.current_color = QColor("#ff0000")
-        self.current_width = 2
-        self.temp_item = None
-        self.start_point = None
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.last_point = event.scenePos()
-            self.start_point = event.scenePos()
-
-            if self.current_tool in [DrawingTool.PEN, DrawingTool.MARKER]:
-                self.current_path = QPainterPath()
-                self.current_path.moveTo(self.last_point)
-            elif self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
-                # Temporäres Item für Vorschau erstellen
-                if self.current_tool == DrawingTool.RECTANGLE:
-                    self.temp_item = self.addRect(
-                        QRectF(self.start_point, self.start_point),
-                        QPen(self.current_color, self.current_width),
-                        QBrush(Qt.NoBrush)
-                    )
-                elif self.current_tool == DrawingTool.ELLIPSE:
-                    self.temp_item = self.addEllipse(
-                        QRectF(self.start_point, self.start_point),
-                        QPen(self.current_color, self.current_width),
-                        QBrush(Qt.NoBrush)
-                    )
-
-        super().mousePressEvent(event)
-
-    def mouseMoveEvent(self, event):
-        if event.buttons() & Qt.LeftButton and self.last_point:
-            point = event.scenePos()
-
-            if self.current_tool in [DrawingTool.PEN, DrawingTool.MARKER]:
-                # Bei Stift und Marker: Linie zeichnen
-                self.current_path.lineTo(point)
-
-                # Aktuellen Pfad entfernen und neu zeichnen
-                if hasattr(self, 'path_item') and self.path_item in self.items():
-                    self.removeItem(self.path_item)
-
-                pen = QPen(self.current_color, self.current_width)
-
-                if self.current_tool == DrawingTool.MARKER:
-                    pen.setCapStyle(Qt.RoundCap)
-                    pen.setJoinStyle(Qt.RoundJoin)
-                    pen.setColor(QColor(self.current_color.red(),
-                                        self.current_color.green(),
-                                        self.current_color.blue(),
-                                        100))  # Semi-transparent
-
-                self.path_item = self.addPath(self.current_path, pen)
-
-            elif self.current_tool == DrawingTool.ERASER:
-                # Radiergummi: Elemente unter dem Cursor entfernen
-                items = self.items(point)
-                for item in items:
-                    if isinstance(item, (QGraphicsPathItem, QGraphicsEllipseItem)) and item != self.temp_item:
-                        self.removeItem(item)
-
-            elif self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
-                # Vorschau für Rechteck oder Ellipse aktualisieren
-                rect = QRectF(self.start_point, point).normalized()
-                if self.current_tool == DrawingTool.RECTANGLE and self.temp_item:
-                    self.temp_item.setRect(rect)
-                elif self.current_tool == DrawingTool.ELLIPSE and self.temp_item:
-                    self.temp_item.setRect(rect)
-                elif self.current_tool == DrawingTool.ARROW and self.temp_item:
-                    # Arrow wird als Linie mit Pfeilspitze implementiert
-                    # Hier könnte eine komplexere Implementation folgen
-                    pass
-
-            self.last_point = point
-
-        super().mouseMoveEvent(event)
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            if self.current_tool in [DrawingTool.RECTANGLE, DrawingTool.ELLIPSE, DrawingTool.ARROW]:
-                # Temporäres Item freigeben
-                self.temp_item = None
-
-            self.last_point = None
-
-        super().mouseReleaseEvent(event)
-
-
-class EditorWidget(QWidget):
-    """Widget zur Bearbeitung des aufgenommenen Screenshots"""
-
-    def __init__(self, image_path, parent=None):
-        super().__init__(parent)
-        self.image_path = image_path
-        self.setupUI()
-
-    def setupUI(self):
-        # Hauptlayout
-        layout = QVBoxLayout(self)
-
-        # Haupt-Toolbar für Zeichenwerkzeuge
-        toolbar = QToolBar("Zeichenwerkzeuge")
-        toolbar.setIconSize(QSize(24, 24))
-        toolbar.setMovable(False)
-        toolbar.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)  # Text unter dem Icon
-
-        # Werkzeugbuttons erstellen
-        tool_group = QButtonGroup(self)
-
-        # Werkzeuge mit Icons erstellen
-        self.pen_button = QToolButton()
-        self.pen_button.setText("Stift")
-        self.pen_button.setCheckable(True)
-        self.pen_button.setChecked(True)
-        tool_group.addButton(self.pen_button, DrawingTool.PEN)
-
-        self.marker_button = QToolButton()
-        self.marker_button.setText("Marker")
-        self.marker_button.setCheckable(True)
-        tool_group.addButton(self.marker_button, DrawingTool.MARKER)
-
-        self.eraser_button = QToolButton()
-        self.eraser_button.setText("Radiergummi")
-        self.eraser_button.setCheckable(True)
-        tool_group.addButton(self.eraser_button, DrawingTool.ERASER)
-
-        self.rectangle_button = QToolButton()
-        self.rectangle_button.setText("Rechteck")
-        self.rectangle_button.setCheckable(True)
-        tool_group.addButton(self.rectangle_button, DrawingTool.RECTANGLE)
-
-        self.ellipse_button = QToolButton()
-        self.ellipse_button.setText("Ellipse")
-        self.ellipse_button.setCheckable(True)
-        tool_group.addButton(self.ellipse_button, DrawingTool.ELLIPSE)
-
-        toolbar.addWidget(self.pen_button)
-        toolbar.addWidget(self.marker_button)
-        toolbar.addWidget(self.eraser_button)
-        toolbar.addWidget(self.rectangle_button)
-        toolbar.addWidget(self.ellipse_button)
-        toolbar.addSeparator()
-
-        # Farbauswahl
-        self.color_button = ColorButton(QColor("#ff0000"))
-        toolbar.addWidget(self.color_button)
-
-        # Strichstärke
-        toolbar.addWidget(QLabel("Stärke:"))
-        self.width_slider = QSlider(Qt.Horizontal)
-        self.width_slider.setRange(1, 20)
-        self.width_slider.setValue(2)
-        self.width_slider.setFixedWidth(100)
-        toolbar.addWidget(self.width_slider)
-
-        layout.addWidget(toolbar)
-
-        # Zweite Toolbar für Speichern/Kopieren
-        action_toolbar = QToolBar("Aktions-Werkzeuge")
-        action_toolbar.setIconSize(QSize(32, 32))
-        action_toolbar.setMovable(False)
-
-        # Speichern/Kopieren-Buttons mit Icon und Text
-        save_action = QAction("Speichern", self)
-        save_action.setIcon(QIcon.fromTheme("document-save"))
-        save_action.triggered.connect(self.save_image)
-        action_toolbar.addAction(save_action)
-
-        copy_action = QAction("Kopieren", self)
-        copy_action.setIcon(QIcon.fromTheme("edit-copy"))
-        copy_action.triggered.connect(self.copy_to_clipboard)
-        action_toolbar.addAction(copy_action)
-
-        layout.addWidget(action_toolbar)
-
-        # Grafikansicht für den Screenshot
-        self.view = QGraphicsView()
-        self.view.setRenderHint(QPainter.Antialiasing)
-        self.view.setRenderHint(QPainter.SmoothPixmapTransform)
-        self.view.setBackgroundBrush(QBrush(QColor("#f0f0f0")))
-        self.view.setFrameShape(QFrame.NoFrame)
-
-        self.scene = EditableScene()
-        self.view.setScene(self.scene)
-
-        # Bild laden
-        self.pixmap = QPixmap(self.image_path)
-        self.pixmap_item = self.scene.addPixmap(self.pixmap)
-        self.scene.setSceneRect(QRectF(self.pixmap.rect()))
-
-        layout.addWidget(self.view)
-
-        # Werkzeugauswahl verbinden
-        tool_group.buttonClicked.connect(self.set_tool)
-        self.color_button.clicked.connect(self.set_color)
-        self.width_slider.valueChanged.connect(self.set_width)
-
-    def set_tool(self, button):
-        self.scene.current_tool = self.sender().id(button)
-
-    def set_color(self):
-        self.scene.current_color = self.color_button.color
-
-    def set_width(self, width):
-        self.scene.current_width = width
-
-    def save_image(self):
-        # Screenshot mit Zeichnungen als Bild speichern
-        filepath, _ = QFileDialog.getSaveFileName(
-            self,
-            "Screenshot speichern",
-            f"Screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-            "PNG Files (*.png);;JPEG Files (*.jpg *.jpeg);;All Files (*)"
-        )
-
-        if filepath:
-            # Szene in Pixmap rendern
-            image = QImage(self.pixmap.size(), QImage.Format_ARGB32)
-            image.fill(Qt.transparent)
-            painter = QPainter(image)
-            self.scene.render(painter)
-            painter.end()
-
-            # Speichern
-            image.save(filepath)
-            QMessageBox.information(self, "Gespeichert", f"Screenshot wurde gespeichert unter:\n{filepath}")
-
-    def copy_to_clipboard(self):
-        # Szene in Pixmap rendern
-        image = QImage(self.pixmap.size(), QImage.Format_ARGB32)
-        image.fill(Qt.transparent)
-        painter = QPainter(image)
-        self.scene.render(painter)
-        painter.end()
-
-        # In temporäre Datei speichern
-        temp_file = tempfile.mktemp(suffix='.png')
-        image.save(temp_file)
-
-        # Mit xclip in Zwischenablage kopieren
-        try:
-            subprocess.run(['xclip', '-selection', 'clipboard', '-t', 'image/png', '-i', temp_file])
-            QMessageBox.information(self, "Kopiert", "Screenshot wurde in die Zwischenablage kopiert.")
-        except Exception as e:
-            QMessageBox.warning(self, "Fehler", f"Fehler beim Kopieren: {str(e)}")
-
-
-class CountdownOverlay(QWidget):
-    """Overlay für den Countdown vor dem Screenshot"""
-
-    finished = pyqtSignal()
-
-    def __init__(self, seconds, parent=None):
-        super().__init__(parent)
-        self.seconds = seconds
-        self.current = seconds
-
-        # Fenstereinstellungen
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
-        self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setStyleSheet("background-color: transparent;")
-
-        # Bildschirmgröße bestimmen
-        desktop = QApplication.desktop()
-        screen_rect = desktop.screenGeometry()
-        self.setGeometry(screen_rect)
-
-        # Timer einrichten
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_countdown)
-        self.timer.start(1000)
-
-    def paintEvent(self, event):
-        if self.current <= 0:
-            return
-
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # Halbdurchsichtiger Hintergrund
-        painter.fillRect(self.rect(), QColor(0, 0, 0, 50))
+import sys
 
-        # Countdown-Zahl
-        font = QFont("Arial", 100, QFont.Bold)
-        painter.setFont(font)
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1].startswith("-") and "--daemon" not in sys.argv:
+    # Kommandozeilenmodus: ohne Hauptfenster und ohne die GUI-Importe aufnehmen
+    import cli
+    sys.exit(cli.run(sys.argv[1:]))
 
-        # Verlaufsfüllung für den Text
-        gradient = QRadialGradient(self.rect().center(), 100)
-        gradient.setColorAt(0, QColor(255, 255, 255))
-        gradient.setColorAt(1, QColor(200, 200, 255))
-        painter.setBrush(QBrush(gradient))
+from latency import tracer
 
-        # Schatten für den Text
-        painter.setPen(QPen(QColor(0, 0, 0, 180), 2))
-        painter.drawText(self.rect().adjusted(3, 3, 3, 3), Qt.AlignCenter, str(self.current))
+from datetime import datetime
+from PyQt5.QtCore import Qt, QPoint, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPixmap, QIcon, QFont, QPainterPath, QImage
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QMainWindow, QAction, QFileDialog, QShortcut, QToolBar,
+    QPushButton, QLabel, QComboBox, QVBoxLayout, QHBoxLayout, QSpinBox, QMessageBox,
+    QFrame, QToolButton, QDockWidget
+)
+tracer.mark("Qt-Import")
 
-        # Text
-        painter.setPen(QPen(QColor(255, 255, 255), 2))
-        painter.drawText(self.rect(), Qt.AlignCenter, str(self.current))
+from clipboard import copy_image
+from capture import CaptureError, select_backend, interactive_backend
+from selection import FreeformSelector, RegionSelector, WindowSelector, freeform_crop
+from workers import worker_pool
+tracer.mark("Modul-Import")
 
-    def update_countdown(self):
-        self.current -= 1
-        self.update()
+# Editor, Countdown und Projektdateien werden erst bei Bedarf importiert
 
-        if self.current <= 0:
-            self.timer.stop()
-            self.hide()
-            self.finished.emit()
+# Verzögerung (ms), bevor der Daemon nach einer Aufnahme den nächsten Editor vorbereitet
+SPARE_EDITOR_DELAY = 1000
 
 
 class SnippingTool(QMainWindow):
-    def __init__(self):
+    # Für den Daemon: Editor geöffnet bzw. Aufnahme fehlgeschlagen
+    editor_opened = pyqtSignal()
+    capture_failed = pyqtSignal(str)
+
+    def __init__(self, resident=False):
         super().__init__()
+        # Im Daemon bleibt das Hauptfenster verborgen, ein Editor liegt bereit
+        self.resident = resident
+        self.spare_editor = None
         self.initUI()
+        if resident:
+            self.prepare_spare_editor()
 
     def initUI(self):
         # Fenstereinstellungen
@@ -460,8 +125,9 @@ class SnippingTool(QMainWindow):
             }
         """)
 
-        # Icon
-        self.setWindowIcon(self.create_icon())
+        # Icon einmal zeichnen, für Fenster und Logo gemeinsam verwenden
+        self.icon_pixmap = self.create_icon_pixmap()
+        self.setWindowIcon(QIcon(self.icon_pixmap))
 
         # Hauptlayout erstellen
         central_widget = QWidget()
@@ -483,10 +149,17 @@ class SnippingTool(QMainWindow):
             "Rechteckiger Ausschnitt",
             "Freiform-Ausschnitt",
             "Fenster-Ausschnitt",
-            "Vollbild-Ausschnitt"
+            "Vollbild-Ausschnitt",
+            "Bildschirmaufnahme"
         ])
         self.mode_combo.setCurrentIndex(0)
         self.toolbar.addWidget(self.mode_combo)
+
+        # Monitorauswahl, gefüllt sobald das Aufnahme-Backend feststeht
+        self.monitor_combo = QComboBox()
+        self.monitor_combo.addItem("Alle Monitore")
+        self.monitor_combo.currentIndexChanged.connect(self.set_monitor)
+        self.toolbar.addWidget(self.monitor_combo)
         self.toolbar.addSeparator()
 
         # Verzögerung
@@ -525,13 +198,7 @@ class SnippingTool(QMainWindow):
         logo_layout = QHBoxLayout()
 
         logo_label = QLabel()
-        logo_pixmap = QPixmap(32, 32)
-        logo_pixmap.fill(Qt.transparent)
-        logo_painter = QPainter(logo_pixmap)
-        logo_painter.setRenderHint(QPainter.Antialiasing)
-        self.draw_icon(logo_painter, logo_pixmap.rect())
-        logo_painter.end()
-        logo_label.setPixmap(logo_pixmap)
+        logo_label.setPixmap(self.icon_pixmap)
         logo_layout.addWidget(logo_label)
 
         info_title = QLabel("MS Snipping Tool Clone")
@@ -590,6 +257,11 @@ class SnippingTool(QMainWindow):
         new_action.triggered.connect(self.take_screenshot)
         file_menu.addAction(new_action)
 
+        open_action = QAction("Öffnen...", self)
+        open_action.setShortcut("Ctrl+O")
+        open_action.triggered.connect(self.open_file)
+        file_menu.addAction(open_action)
+
         file_menu.addSeparator()
 
         exit_action = QAction("Beenden", self)
@@ -605,6 +277,15 @@ class SnippingTool(QMainWindow):
         copy_action.triggered.connect(self.copy_last_to_clipboard)
         edit_menu.addAction(copy_action)
 
+        # Ansicht-Menü
+        view_menu = menubar.addMenu("Ansicht")
+
+        self.history_action = QAction("Verlauf", self)
+        self.history_action.setShortcut("Ctrl+H")
+        self.history_action.setCheckable(True)
+        self.history_action.triggered.connect(self.toggle_history)
+        view_menu.addAction(self.history_action)
+
         # Optionen-Menü
         options_menu = menubar.addMenu("Optionen")
 
@@ -613,6 +294,10 @@ class SnippingTool(QMainWindow):
         always_top_action.triggered.connect(self.toggle_always_on_top)
         options_menu.addAction(always_top_action)
 
+        # Aktionen nach der Aufnahme, beim ersten Öffnen des Menüs gefüllt
+        self.actions_menu = options_menu.addMenu("Nach der Aufnahme")
+        self.actions_menu.aboutToShow.connect(self.fill_actions_menu)
+
         # Hilfe-Menü
         help_menu = menubar.addMenu("Hilfe")
 
@@ -632,18 +317,67 @@ class SnippingTool(QMainWindow):
         self.shortcut_snip.setKey(Qt.CTRL + Qt.SHIFT + Qt.Key_S)
         self.shortcut_snip.activated.connect(self.take_screenshot)
 
-        # Letzte temporäre Datei speichern
+        # Letzten Screenshot (Schlüssel im Bildspeicher) merken
         self.last_screenshot = None
 
-    def create_icon(self):
-        """Erstellt ein Icon für das Fenster"""
+        # Bildspeicher und Editor-Tabs, erst mit dem ersten Editor angelegt
+        self.images = None
+        self.documents = None
+        self.editor = None
+
+        # Abweichung (s) der letzten verzögerten Aufnahme von ihrer Frist
+        self.capture_jitter = None
+
+        # Laufende Bildschirmaufnahme
+        self.recorder = None
+
+        # Fensterindex für den Fenster-Ausschnitt, bei der ersten Fensterauswahl aufgebaut
+        self.window_tracker = None
+
+        # Verlauf, erst bei der ersten Aufnahme bzw. beim Öffnen des Panels geladen
+        self.history = None
+        self.history_dock = None
+
+        # Aktionen nach der Aufnahme, erst bei der ersten Aufnahme angelegt
+        self.actions = None
+
+        tracer.mark("Oberfläche")
+
+        # Aufnahme-Backend auswählen
+        self.capture_backend = select_backend()
+        tracer.mark("Aufnahme-Backend")
+        if self.capture_backend:
+            monitors = self.capture_backend.monitors()
+            for i, rect in enumerate(monitors):
+                self.monitor_combo.addItem(f"Monitor {i + 1} ({rect.width()}x{rect.height()})")
+            self.monitor_combo.setVisible(len(monitors) > 1)
+            self.statusBar().showMessage(
+                f"Bereit (Aufnahme über {self.capture_backend.name}). "
+                "Drücken Sie Strg+Shift+S für einen schnellen Screenshot."
+            )
+        else:
+            self.monitor_combo.hide()
+            self.statusBar().showMessage("Kein Aufnahme-Backend verfügbar (mss oder gnome-screenshot installieren).")
+
+    def set_monitor(self, index):
+        """Beschränkt Aufnahmen auf einen Monitor (Index 0: gesamter Desktop)"""
+        if self.capture_backend is not None:
+            self.capture_backend.monitor = index - 1 if index > 0 else None
+
+    def create_icon_pixmap(self):
+        """Zeichnet das Icon für Fenster und Logo"""
         pixmap = QPixmap(32, 32)
         pixmap.fill(Qt.transparent)
         painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
         self.draw_icon(painter, pixmap.rect())
         painter.end()
-        return QIcon(pixmap)
+        return pixmap
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if tracer.startup_finished("erstes Bild") and tracer.exit_after_startup:
+            QTimer.singleShot(0, QApplication.quit)
 
     def draw_icon(self, painter, rect):
         """Zeichnet ein Snipping-Tool-Icon"""
@@ -692,69 +426,361 @@ class SnippingTool(QMainWindow):
         )
 
     def take_screenshot(self):
+        # Während einer Bildschirmaufnahme beenden "Neu" und Strg+Shift+S sie
+        if self.recorder is not None:
+            self.stop_recording()
+            return
+
         mode = self.mode_combo.currentText()
         delay = self.delay_spinner.value()
+        self.capture_jitter = None
 
         # Status aktualisieren
         self.statusBar().showMessage(f"Erstelle Screenshot im Modus: {mode}...")
 
         # Bei Verzögerung: Fenster minimieren und Countdown anzeigen
         if delay > 0:
-            self.showMinimized()
+            if not self.resident:
+                self.showMinimized()
 
-            # Countdown-Overlay anzeigen
-            self.countdown = CountdownOverlay(delay)
-            self.countdown.finished.connect(self.perform_screenshot)
+            # Countdown-Overlay anzeigen; währenddessen wird das Backend vorbereitet
+            from countdown import CountdownOverlay
+            self.countdown = CountdownOverlay(delay, prepare=self.arm_capture)
+            self.countdown.finished.connect(self.countdown_finished)
             self.countdown.show()
         else:
             # Sofort Screenshot machen
             self.perform_screenshot()
 
-    def perform_screenshot(self):
-        # Temporäre Datei für Screenshot
-        temp_file = tempfile.mktemp(suffix='.png')
-        self.last_screenshot = temp_file
+    def arm_capture(self):
+        """Bereitet das Backend während des Countdowns auf die Aufnahme vor"""
+        if self.capture_backend is not None:
+            try:
+                self.capture_backend.arm()
+            except CaptureError as e:
+                self.statusBar().showMessage(str(e))
+
+    def countdown_finished(self):
+        self.capture_jitter = self.countdown.jitter
+        self.perform_screenshot()
 
-        # Basierend auf dem ausgewählten Modus den richtigen gnome-screenshot Befehl ausführen
+    def perform_screenshot(self):
         mode = self.mode_combo.currentText()
+        backend = self.capture_backend
 
-        if mode == "Rechteckiger Ausschnitt":
-            subprocess.run(['gnome-screenshot', '-a', '-f', temp_file])
-        elif mode == "Fenster-Ausschnitt":
-            subprocess.run(['gnome-screenshot', '-w', '-f', temp_file])
-        elif mode == "Vollbild-Ausschnitt":
-            subprocess.run(['gnome-screenshot', '-f', temp_file])
-        else:  # Freiform ist nicht direkt mit gnome-screenshot möglich, verwenden wir Rechteck
-            subprocess.run(['gnome-screenshot', '-a', '-f', temp_file])
-
-        # Prüfen, ob die Datei erzeugt wurde
-        if os.path.exists(temp_file) and os.path.getsize(temp_file) > 0:
-            self.open_editor(temp_file)
+        if backend is None:
+            self.finish_screenshot(None)
+            return
+
+        try:
+            if mode == "Vollbild-Ausschnitt":
+                self.finish_screenshot(backend.grab())
+            elif mode == "Fenster-Ausschnitt":
+                source = None if backend.interactive else self.window_source()
+                if source is not None:
+                    # Fenster im eingefrorenen Bild auswählen, Geometrie aus dem Fensterindex
+                    frame = backend.grab()
+                    self.selector = WindowSelector(frame, source.index)
+                    self.selector.selected.connect(lambda rect: self.finish_screenshot(frame.copy(rect)))
+                    self.selector.cancelled.connect(lambda: self.finish_screenshot(None))
+                    self.selector.show()
+                    self.selector.activateWindow()
+                    return
+                window_backend = backend if backend.interactive else interactive_backend()
+                if window_backend:
+                    self.finish_screenshot(window_backend.grab_interactive('window'))
+                else:
+                    self.finish_screenshot(backend.grab())
+            elif mode == "Bildschirmaufnahme":
+                if backend.interactive:
+                    raise CaptureError(f"Bildschirmaufnahmen sind über {backend.name} nicht möglich "
+                                       "(mss oder qt benötigt)")
+                # Bereich auswählen, aufgenommen wird in physischen Desktop-Pixeln
+                frame = backend.grab()
+                self.selector = RegionSelector(frame)
+                origin = frame.offset()
+                self.selector.selected.connect(lambda rect: self.start_recording(rect.translated(origin)))
+                self.selector.cancelled.connect(lambda: self.finish_screenshot(None))
+                self.selector.show()
+                self.selector.activateWindow()
+            elif mode == "Freiform-Ausschnitt":
+                # Lasso im eingefrorenen Bild, mit jedem Backend möglich
+                frame = backend.grab()
+                self.selector = FreeformSelector(frame)
+                self.selector.selected.connect(lambda path: self.finish_screenshot(freeform_crop(frame, path)))
+                self.selector.cancelled.connect(lambda: self.finish_screenshot(None))
+                self.selector.show()
+                self.selector.activateWindow()
+            elif backend.interactive:
+                self.finish_screenshot(backend.grab_interactive('area'))
+            else:
+                # Bereich im eingefrorenen Bild auswählen lassen
+                frame = backend.grab()
+                self.selector = RegionSelector(frame)
+                self.selector.selected.connect(lambda rect: self.finish_screenshot(frame.copy(rect)))
+                self.selector.cancelled.connect(lambda: self.finish_screenshot(None))
+                self.selector.show()
+                self.selector.activateWindow()
+        except CaptureError as e:
+            self.finish_screenshot(None, str(e))
+
+    def window_source(self):
+        """Fensterindex über X11 oder None, wenn er nicht verfügbar ist"""
+        from windows import WindowSourceError, X11WindowSource
+        if self.window_tracker is None and X11WindowSource.available():
+            try:
+                self.window_tracker = X11WindowSource(self)
+            except WindowSourceError as e:
+                self.statusBar().showMessage(str(e))
+        return self.window_tracker
+
+    def finish_screenshot(self, image, error=None):
+        """Öffnet den Editor für ein aufgenommenes Bild und zeigt das Fenster wieder an"""
+        if image is not None and not image.isNull():
+            # Screenshot bleibt im Bildspeicher, kodiert wird erst beim Speichern oder Kopieren
+            editor = self.open_editor(image)
+            self.remember_screenshot(self.documents.keys[editor])
+            self.editor_opened.emit()
+            self.add_to_history(image, self.mode_combo.currentText())
+            self.action_pipeline().submit(image, self.mode_combo.currentText())
         else:
-            self.statusBar().showMessage("Screenshot konnte nicht erstellt werden.")
+            error = error or "Screenshot konnte nicht erstellt werden."
+            self.statusBar().showMessage(error)
+            self.capture_failed.emit(error)
 
         # Fenster wieder anzeigen
-        self.showNormal()
+        if not self.resident:
+            self.showNormal()
+
+    def start_recording(self, rect):
+        """Startet die Bildschirmaufnahme eines Bereichs"""
+        from recording import ScreenRecorder
+        self.recorder = ScreenRecorder(self.capture_backend, rect, parent=self)
+        self.recorder.frame_added.connect(
+            lambda count: self.statusBar().showMessage(
+                f"Aufnahme läuft ({count} Frames). 'Stopp' oder Strg+Shift+S beendet sie.")
+        )
+        self.recorder.failed.connect(self.recording_failed)
+        self.new_button.setText("Stopp")
+        self.recorder.start()
+        if not self.resident:
+            self.showNormal()
+
+    def stop_recording(self):
+        """Beendet die Bildschirmaufnahme und speichert sie im Hintergrund"""
+        from recording import RecordingEncoder
+        ring = self.recorder.stop()
+        self.recorder.deleteLater()
+        self.recorder = None
+        self.new_button.setText("Neu")
+
+        filepath, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Aufnahme speichern",
+            f"Aufnahme_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
+            "Animiertes PNG (*.png);;GIF (*.gif)"
+        )
+        if not filepath:
+            self.statusBar().showMessage("Aufnahme verworfen")
+            return
+        if selected_filter.startswith("GIF") and not filepath.lower().endswith(".gif"):
+            filepath += ".gif"
 
-    def open_editor(self, image_path):
-        """Öffnet den Editor für den Screenshot"""
-        self.editor = EditorWidget(image_path)
-        self.editor.setWindowTitle("Screenshot bearbeiten")
-        self.editor.setWindowIcon(self.windowIcon())
-        self.editor.resize(1024, 768)  # Größeres Fenster
-        self.editor.show()
+        self.recording_task = RecordingEncoder(ring.sequence(), filepath)
+        self.recording_task.signals.finished.connect(
+            lambda path: self.statusBar().showMessage(f"Aufnahme gespeichert unter: {path}")
+        )
+        self.recording_task.signals.failed.connect(
+            lambda message: self.statusBar().showMessage(f"Fehler beim Speichern der Aufnahme: {message}")
+        )
+        self.statusBar().showMessage(f"Speichere Aufnahme ({len(ring)} Frames)...")
+        worker_pool().start(self.recording_task)
+
+    def recording_failed(self, message):
+        self.statusBar().showMessage(f"Aufnahme abgebrochen: {message}")
+        if self.recorder is not None and len(self.recorder.ring):
+            self.stop_recording()
+        else:
+            self.recorder = None
+            self.new_button.setText("Neu")
+
+    def create_editor(self, image=None, image_path=None):
+        from editor import EditorWidget
+        editor = EditorWidget(image, image_path=image_path)
+        editor.setWindowTitle("Screenshot bearbeiten")
+        editor.setWindowIcon(self.windowIcon())
+        editor.resize(1024, 768)  # Größeres Fenster
+        return editor
+
+    def prepare_spare_editor(self):
+        """Erzeugt einen verborgenen Editor, den die nächste Aufnahme übernimmt"""
+        if self.spare_editor is None:
+            placeholder = QImage(1, 1, QImage.Format_RGB32)
+            placeholder.fill(Qt.white)
+            self.spare_editor = self.create_editor(placeholder)
+            self.spare_editor.ensurePolished()
+
+    def image_store(self):
+        if self.images is None:
+            from imagestore import ImageStore
+            self.images = ImageStore(parent=self)
+            # Ausgelagerte Bilder gehören nur zu dieser Sitzung
+            QApplication.instance().aboutToQuit.connect(self.images.close)
+        return self.images
+
+    def document_window(self):
+        if self.documents is None:
+            from documents import DocumentWindow
+            self.documents = DocumentWindow(self.image_store())
+            self.documents.setWindowTitle("Screenshot bearbeiten")
+            self.documents.setWindowIcon(self.windowIcon())
+            self.documents.resize(1024, 768)  # Größeres Fenster
+            self.documents.current_changed.connect(self.set_current_editor)
+        return self.documents
+
+    def set_current_editor(self, editor):
+        self.editor = editor
+
+    def open_editor(self, image=None, image_path=None):
+        """Öffnet den Screenshot (QImage oder optional Dateipfad) in einem neuen Editor-Tab"""
+        from editor import load_image
+        if image is None:
+            image = load_image(image_path)
+        if self.spare_editor is not None:
+            editor, self.spare_editor = self.spare_editor, None
+            editor.set_image(image, image_path)
+            # Neuen Vorrat erst anlegen, wenn der Editor sichtbar ist
+            QTimer.singleShot(SPARE_EDITOR_DELAY, self.prepare_spare_editor)
+        else:
+            editor = self.create_editor(image, image_path)
+
+        # Das Bild liegt einmal im Bildspeicher, der Tab hält die erste Referenz
+        window = self.document_window()
+        key = self.image_store().add(image)
+        window.add_editor(editor, key, os.path.basename(image_path) if image_path else None)
+        window.show()
+        window.raise_()
+        return editor
+
+    def remember_screenshot(self, key):
+        """Merkt sich eine Aufnahme für 'Kopieren', auch wenn ihr Tab geschlossen wird"""
+        store = self.image_store()
+        store.retain(key)
+        if self.last_screenshot is not None:
+            store.release(self.last_screenshot)
+        self.last_screenshot = key
+
+    def open_file(self):
+        """Öffnet ein Bild oder ein Snipping-Projekt im Editor"""
+        from document import DOCUMENT_SUFFIX
+        filepath, _ = QFileDialog.getOpenFileName(
+            self,
+            "Öffnen",
+            "",
+            f"Projekte und Bilder (*{DOCUMENT_SUFFIX} *.png *.jpg *.jpeg *.bmp);;All Files (*)"
+        )
+        if filepath:
+            self.open_project(filepath)
+
+    def open_project(self, filepath):
+        """Öffnet ein Bild samt vorhandener .snip-Begleitdatei bzw. ein .snip-Projekt"""
+        from document import DOCUMENT_SUFFIX, DocumentError, read_document, sidecar_path
+        document_path = filepath if filepath.endswith(DOCUMENT_SUFFIX) else sidecar_path(filepath)
+        document = None
+        if os.path.exists(document_path):
+            try:
+                document = read_document(document_path)
+            except (OSError, DocumentError) as e:
+                self.statusBar().showMessage(f"Projekt konnte nicht geöffnet werden: {str(e)}")
+                return
+
+        editor = self.open_editor(image_path=document.image_path if document else filepath)
+        if document:
+            editor.load_annotations(document.records)
 
     def copy_last_to_clipboard(self):
         """Kopiert den letzten Screenshot in die Zwischenablage"""
-        if self.last_screenshot and os.path.exists(self.last_screenshot):
+        if self.last_screenshot is not None:
             try:
-                subprocess.run(['xclip', '-selection', 'clipboard', '-t', 'image/png', '-i', self.last_screenshot])
+                copy_image(self.image_store().image(self.last_screenshot))
                 self.statusBar().showMessage("Screenshot in die Zwischenablage kopiert")
             except Exception as e:
                 self.statusBar().showMessage(f"Fehler beim Kopieren in die Zwischenablage: {str(e)}")
         else:
             self.statusBar().showMessage("Kein Screenshot zum Kopieren verfügbar")
 
+    def history_store(self):
+        if self.history is None:
+            from history import HistoryStore
+            self.history = HistoryStore()
+        return self.history
+
+    def add_to_history(self, image, mode):
+        """Legt eine Aufnahme im Hintergrund im Verlauf ab (nicht, wenn er abgeschaltet ist)"""
+        from history import HistoryError, HistoryTask, history_enabled
+        if not history_enabled():
+            return
+        try:
+            self.history_task = HistoryTask(self.history_store(), image, mode)
+        except HistoryError as e:
+            self.statusBar().showMessage(str(e))
+            return
+        self.history_task.signals.stored.connect(self.history_stored)
+        self.history_task.signals.failed.connect(
+            lambda message: self.statusBar().showMessage(f"Fehler beim Speichern im Verlauf: {message}")
+        )
+        worker_pool().start(self.history_task)
+
+    def action_pipeline(self):
+        if self.actions is None:
+            from actions import COMMAND_TIMEOUT, ActionPipeline
+            self.actions = ActionPipeline(parent=self)
+            self.actions.message.connect(self.statusBar().showMessage)
+            # Laufende Aktionen (z. B. Speichern) vor dem Beenden abschließen
+            QApplication.instance().aboutToQuit.connect(lambda: self.actions.wait(COMMAND_TIMEOUT * 1000))
+        return self.actions
+
+    def fill_actions_menu(self):
+        """Ein umschaltbarer Eintrag je Aktion; der Befehl nur, wenn er eingestellt ist"""
+        if self.actions_menu.actions():
+            return
+        from actions import ACTIONS
+        pipeline = self.action_pipeline()
+        for name, label in ACTIONS.items():
+            action = QAction(label, self)
+            action.setCheckable(True)
+            action.setChecked(name in pipeline.settings.actions)
+            action.setEnabled(name != "command" or bool(pipeline.settings.command))
+            action.toggled.connect(lambda checked, name=name: self.actions.set_enabled(name, checked))
+            self.actions_menu.addAction(action)
+
+    def history_stored(self, entry):
+        if self.history_dock is not None:
+            self.history_dock.widget().model().reload()
+
+    def toggle_history(self, checked):
+        """Zeigt das Verlaufs-Panel an oder blendet es aus"""
+        if self.history_dock is None:
+            if not checked:
+                return
+            from history import HistoryError, HistoryView, history_enabled
+            if not history_enabled():
+                self.statusBar().showMessage("Verlauf ist abgeschaltet (SNIPPING_TOOL_HISTORY=0)")
+                self.history_action.setChecked(False)
+                return
+            try:
+                view = HistoryView(self.history_store())
+            except HistoryError as e:
+                self.statusBar().showMessage(str(e))
+                self.history_action.setChecked(False)
+                return
+            view.open_requested.connect(self.open_project)
+            self.history_dock = QDockWidget("Verlauf", self)
+            self.history_dock.setWidget(view)
+            self.history_dock.visibilityChanged.connect(self.history_action.setChecked)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.history_dock)
+        self.history_dock.setVisible(checked)
+
     def toggle_always_on_top(self, checked):
         """Setzt das Fenster immer im Vordergrund oder normal"""
         if checked:
@@ -775,6 +801,7 @@ class SnippingTool(QMainWindow):
             <li><b>Freiform-Ausschnitt:</b> Zeichnen Sie eine beliebige Form, um den Bereich auszuwählen.</li>
             <li><b>Fenster-Ausschnitt:</b> Wählen Sie ein Fenster aus, um es zu erfassen.</li>
             <li><b>Vollbild-Ausschnitt:</b> Erfasst den gesamten Bildschirm.</li>
+            <li><b>Bildschirmaufnahme:</b> Nimmt einen Bereich als kurzes Video (APNG oder GIF) auf, bis Sie auf 'Stopp' klicken.</li>
         </ul>
 
         <h3>Verzögerung</h3>
@@ -786,6 +813,7 @@ class SnippingTool(QMainWindow):
             <li><b>Marker:</b> Zeichnet mit einer halbtransparenten Linie.</li>
             <li><b>Radiergummi:</b> Entfernt Zeichnungen.</li>
             <li><b>Rechteck/Ellipse:</b> Zeichnet Formen.</li>
+            <li><b>Verpixeln/Weichzeichnen:</b> Macht einen Bereich unkenntlich (mit 'Freihand' als freie Form).</li>
         </ul>
 
         <h3>Tastenkürzel</h3>
@@ -793,6 +821,8 @@ class SnippingTool(QMainWindow):
             <li><b>Strg+Shift+S:</b> Schneller Screenshot mit aktuellen Einstellungen</li>
             <li><b>Strg+N:</b> Neuer Screenshot</li>
             <li><b>Strg+C:</b> In Zwischenablage kopieren</li>
+            <li><b>Strg+H:</b> Verlauf früherer Aufnahmen anzeigen</li>
+            <li><b>Strg+Z / Strg+Y:</b> Im Editor rückgängig machen / wiederholen</li>
             <li><b>F1:</b> Hilfe anzeigen</li>
         </ul>
         """
@@ -815,10 +845,16 @@ class SnippingTool(QMainWindow):
 def main():
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # Modernes Look-and-Feel
+    tracer.mark("QApplication")
     window = SnippingTool()
     window.show()
+    tracer.mark("show")
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
+    if "--daemon" in sys.argv[1:]:
+        # Der Daemon hält ein Hauptfenster bereit; die Klasse wird übergeben, statt main neu zu importieren
+        import cli
+        sys.exit(cli.run(sys.argv[1:], window_factory=SnippingTool))
     main()
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""
+Bildschirmaufnahme für den Snipping Tool Clone
+----------------------------------------------
+ScreenRecorder nimmt einen Bereich mit fester Bildrate auf und legt die Frames
+in einem FrameRing ab. Unveränderte Frames werden zusammengefasst, von allen
+anderen wird nur das Rechteck gespeichert, in dem sich Pixel geändert haben
+(mit numpy vektorisiert, sonst zeilenweise). Der Ring hält höchstens die
+letzten RECORDING_MAX_SECONDS und RECORDING_MEMORY_LIMIT Bytes; ältere
+Änderungen werden in das Startbild eingerechnet.
+
+RecordingEncoder schreibt den Ring in einem Worker-Thread als APNG oder als GIF mit
+Farbpalette pro Frame. Beide Formate übernehmen die Teilrechtecke direkt.
+"""
+import os
+import struct
+import time
+import zlib
+from collections import deque, namedtuple
+
+from PyQt5.QtCore import Qt, QObject, QRect, QRunnable, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Bildrate und Grenzen des Rings (Teilbilder; Start- und aktuelles Bild kommen hinzu)
+RECORDING_FPS = 10
+RECORDING_MAX_SECONDS = 30
+RECORDING_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# zlib-Stufe für APNG (6 = Standard von libpng)
+APNG_COMPRESSION = 6
+
+# Dateiendung -> Aufnahmeformat
+RECORDING_FORMATS = {
+    ".png": "APNG",
+    ".apng": "APNG",
+    ".gif": "GIF",
+}
+
+# Geänderter Bereich eines Frames: Zeitpunkt (s), Position und Teilbild
+Frame = namedtuple("Frame", "timestamp x y image")
+
+
+def recording_format(path):
+    """Aufnahmeformat anhand der Dateiendung, APNG falls unbekannt"""
+    return RECORDING_FORMATS.get(os.path.splitext(path)[1].lower(), "APNG")
+
+
+def _pixels(image):
+    """Pixel eines RGB32-Bildes als numpy-Array (Höhe x Breite) ohne Kopie"""
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    array = numpy.frombuffer(bits, numpy.uint32)
+    return array.reshape(image.height(), image.bytesPerLine() // 4)[:, :image.width()]
+
+
+def changed_rect(previous, current):
+    """Begrenzungsrechteck der geänderten Pixel zweier gleich großer RGB32-Bilder"""
+    if numpy is not None:
+        diff = _pixels(previous) != _pixels(current)
+        rows = numpy.flatnonzero(diff.any(axis=1))
+        if not rows.size:
+            return QRect()
+        cols = numpy.flatnonzero(diff[rows[0]:rows[-1] + 1].any(axis=0))
+        return QRect(int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+    # Ohne numpy: Zeilen als Bytes vergleichen, die Breite bleibt vollständig
+    changed = [y for y in range(current.height())
+               if previous.constScanLine(y).asstring(current.bytesPerLine())
+               != current.constScanLine(y).asstring(current.bytesPerLine())]
+    if not changed:
+        return QRect()
+    return QRect(0, changed[0], current.width(), changed[-1] - changed[0] + 1)
+
+
+class FrameRing:
+    """Begrenzter Speicher für Aufnahmen aus Startbild und geänderten Bereichen"""
+
+    def __init__(self, max_seconds=RECORDING_MAX_SECONDS, memory_limit=RECORDING_MEMORY_LIMIT):
+        self.max_seconds = max_seconds
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self.base = None
+        self.base_time = 0.0
+        self.end_time = 0.0
+        self.frames = deque()
+        self.collapsed = 0
+        self._last = None
+
+    def __len__(self):
+        return len(self.frames) + (self.base is not None)
+
+    def add(self, image, timestamp):
+        """Übernimmt ein vollständiges Bild; False, wenn es unverändert war"""
+        image = image.convertToFormat(QImage.Format_RGB32)
+        self.end_time = timestamp
+        if self.base is None:
+            self.base = self._last = image
+            self.base_time = timestamp
+            return True
+
+        rect = changed_rect(self._last, image)
+        if rect.isEmpty():
+            self.collapsed += 1
+            return False
+        frame = Frame(timestamp, rect.x(), rect.y(), image.copy(rect))
+        self.frames.append(frame)
+        self.memory_used += frame.image.sizeInBytes()
+        self._last = image
+        self._trim()
+        return True
+
+    def _trim(self):
+        # Älteste Änderungen in das Startbild einrechnen, bis beide Grenzen passen
+        painter = None
+        while self.frames and (self.memory_used > self.memory_limit or
+                               self.end_time - self.frames[0].timestamp > self.max_seconds):
+            frame = self.frames.popleft()
+            if painter is None:
+                self.base = self.base.copy()
+                painter = QPainter(self.base)
+                painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.drawImage(frame.x, frame.y, frame.image)
+            self.memory_used -= frame.image.sizeInBytes()
+            self.base_time = frame.timestamp
+        if painter is not None:
+            painter.end()
+
+    def finish(self, timestamp):
+        """Legt das Ende der Aufnahme fest (Anzeigedauer des letzten Frames)"""
+        self.end_time = max(self.end_time, timestamp)
+
+    def sequence(self):
+        """Frames als [(x, y, Teilbild, Dauer in s)], beginnend mit dem Startbild"""
+        if self.base is None:
+            return []
+        frames = [Frame(self.base_time, 0, 0, self.base), *self.frames]
+        ends = [frame.timestamp for frame in frames[1:]] + [self.end_time]
+        return [(frame.x, frame.y, frame.image, max(0.0, end - frame.timestamp))
+                for frame, end in zip(frames, ends)]
+
+
+class ScreenRecorder(QObject):
+    """Nimmt einen Bildschirmbereich per Timer über ein Aufnahme-Backend auf"""
+
+    frame_added = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, backend, rect, fps=RECORDING_FPS, parent=None):
+        super().__init__(parent)
+        self.backend = backend
+        self.rect = rect
+        self.fps = fps
+        self.ring = FrameRing()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.capture_frame)
+
+    def is_recording(self):
+        return self.timer.isActive()
+
+    def start(self):
+        self.capture_frame()
+        self.timer.start(int(1000 / self.fps))
+
+    def stop(self):
+        """Beendet die Aufnahme und liefert den FrameRing"""
+        self.timer.stop()
+        self.ring.finish(time.perf_counter())
+        return self.ring
+
+    def capture_frame(self):
+        from capture import CaptureError
+        try:
+            image = self.backend.grab(self.rect)
+        except CaptureError as e:
+            self.timer.stop()
+            self.failed.emit(str(e))
+            return
+        if self.ring.add(image, time.perf_counter()):
+            self.frame_added.emit(len(self.ring))
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _rgb_rows(image):
+    """Zeilen eines Bildes als RGB-Bytes mit PNG-Filter 0"""
+    image = image.convertToFormat(QImage.Format_RGB888)
+    width = image.width() * 3
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    data = bits.asstring()
+    line = image.bytesPerLine()
+    return b"".join(b"\0" + data[y * line:y * line + width] for y in range(image.height()))
+
+
+def write_apng(f, frames, loops=0):
+    """Schreibt [(x, y, Teilbild, Dauer)] als animiertes PNG; das erste Bild ist vollständig"""
+    first = frames[0][2]
+    f.write(b"\x89PNG\r\n\x1a\n")
+    f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", first.width(), first.height(), 8, 2, 0, 0, 0)))
+    f.write(_png_chunk(b"acTL", struct.pack(">II", len(frames), loops)))
+    sequence = 0
+    for index, (x, y, image, duration) in enumerate(frames):
+        delay = min(65535, round(duration * 1000))
+        # Frames bleiben stehen (dispose none) und ersetzen ihren Bereich (blend source)
+        f.write(_png_chunk(b"fcTL", struct.pack(">IIIIIHHBB", sequence, image.width(), image.height(),
+                                                 x, y, delay, 1000, 0, 0)))
+        sequence += 1
+        data = zlib.compress(_rgb_rows(image), APNG_COMPRESSION)
+        if index == 0:
+            f.write(_png_chunk(b"IDAT", data))
+        else:
+            f.write(_png_chunk(b"fdAT", struct.pack(">I", sequence) + data))
+            sequence += 1
+    f.write(_png_chunk(b"IEND", b""))
+
+
+def _lzw_encode(indices, min_code_size=8):
+    """LZW-Kompression der Palettenindizes nach GIF-Spezifikation"""
+    clear = 1 << min_code_size
+    end = clear + 1
+    code_size = min_code_size + 1
+    next_code = end + 1
+    codes = {}
+    out = bytearray()
+    buffer = clear
+    bits = code_size
+
+    prefix = indices[0]
+    for index in indices[1:]:
+        key = (prefix << 8) | index
+        code = codes.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        buffer |= prefix << bits
+        bits += code_size
+        while bits >= 8:
+            out.append(buffer & 0xFF)
+            buffer >>= 8
+            bits -= 8
+        if next_code < 4096:
+            codes[key] = next_code
+            if next_code == 1 << code_size and code_size < 12:
+                code_size += 1
+            next_code += 1
+        else:
+            # Tabelle voll: neu beginnen
+            buffer |= clear << bits
+            bits += code_size
+            codes.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = index
+
+    for code in (prefix, end):
+        buffer |= code << bits
+        bits += code_size
+    while bits > 0:
+        out.append(buffer & 0xFF)
+        buffer >>= 8
+        bits -= 8
+    return bytes(out)
+
+
+def _gif_frame(image):
+    """Palettenbild: (Farbtabelle mit 256 Einträgen, Indizes zeilenweise ohne Auffüllung)"""
+    indexed = image.convertToFormat(QImage.Format_Indexed8, Qt.ThresholdDither)
+    colors = indexed.colorTable()
+    palette = b"".join(struct.pack("BBB", (c >> 16) & 0xFF, (c >> 8) & 0xFF, c & 0xFF) for c in colors)
+    palette = palette.ljust(256 * 3, b"\0")
+    bits = indexed.constBits()
+    bits.setsize(indexed.sizeInBytes())
+    data = bits.asstring()
+    line = indexed.bytesPerLine()
+    width = indexed.width()
+    if line != width:
+        data = b"".join(data[y * line:y * line + width] for y in range(indexed.height()))
+    return palette, data
+
+
+def write_gif(f, frames, loops=0):
+    """Schreibt [(x, y, Teilbild, Dauer)] als GIF mit lokaler Farbpalette je Frame"""
+    first = frames[0][2]
+    f.write(b"GIF89a" + struct.pack("<HHBBB", first.width(), first.height(), 0, 0, 0))
+    f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loops) + b"\0")
+    for x, y, image, duration in frames:
+        delay = min(65535, round(duration * 100))
+        # Grafiksteuerung: Frame bleibt stehen (Disposal 1), keine Transparenz
+        f.write(b"\x21\xf9\x04" + struct.pack("<BHB", 1 << 2, delay, 0) + b"\0")
+        f.write(b"\x2c" + struct.pack("<HHHHB", x, y, image.width(), image.height(), 0x80 | 7))
+        palette, indices = _gif_frame(image)
+        f.write(palette)
+        f.write(b"\x08")
+        data = _lzw_encode(indices)
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            f.write(bytes([len(block)]) + block)
+        f.write(b"\0")
+    f.write(b"\x3b")
+
+
+class _EncoderSignals(QObject):
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+
+class RecordingEncoder(QRunnable):
+    """Schreibt eine Aufnahme im Worker-Thread als APNG oder GIF"""
+
+    def __init__(self, frames, path, fmt=None):
+        super().__init__()
+        self.frames = frames
+        self.path = path
+        self.fmt = fmt or recording_format(path)
+        self.signals = _EncoderSignals()
+
+    def run(self):
+        try:
+            if not self.frames:
+                raise ValueError("Die Aufnahme enthält keine Frames")
+            writer = write_gif if self.fmt == "GIF" else write_apng
+            with open(self.path, "wb") as f:
+                writer(f, self.frames)
+            self.signals.finished.emit(self.path)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
@@ -0,0 +1,273 @@
+"""
+Schwärzen für den Snipping Tool Clone
+-------------------------------------
+RedactionItem verpixelt oder zeichnet einen rechteckigen oder freihand
+umrandeten Bereich des Basisbildes weich. Der Effekt wird kachelweise aus dem
+Basisbild berechnet (mit numpy vektorisiert, sonst über Qt-Skalierung) und in
+einem RedactionCache gehalten. Beim Aufziehen werden nur neu überdeckte
+Kacheln berechnet und nur die geänderte Fläche neu gezeichnet.
+
+Das Item wird wie jede andere Annotation gezeichnet und landet damit auch im
+exportierten Gesamtbild.
+"""
+import itertools
+import math
+
+from PyQt5.QtCore import Qt, QPointF, QRect, QRectF
+from PyQt5.QtGui import QImage, QPainterPath, QPen, QPolygonF, QRegion
+from PyQt5.QtWidgets import QGraphicsItem
+
+from tiles import TileCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Effekte
+PIXELATE = "pixelate"
+BLUR = "blur"
+
+# Ungefähre Kantenlänge einer Effekt-Kachel (beim Verpixeln ein Vielfaches der Blockgröße)
+REDACTION_TILE_SIZE = 256
+
+# Speicherbudget für berechnete Kacheln in Bytes
+REDACTION_CACHE_BUDGET = 64 * 1024 * 1024
+
+# Anzahl der Box-Filter-Durchläufe; drei nähern einen Gauß-Filter gut an
+BLUR_PASSES = 3
+
+# Reserve (Pixel), um die die Begrenzung beim Aufziehen erweitert wird
+REDACTION_BOUNDS_PADDING = 128
+
+
+def _pixels(image):
+    """Pixel eines 32-Bit-Bildes als numpy-Array (Höhe x Breite x 4) ohne Kopie"""
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    array = numpy.frombuffer(bits, numpy.uint8)
+    return array.reshape(image.height(), image.bytesPerLine() // 4, 4)[:, :image.width()]
+
+
+def pixelate(image, block):
+    """Ersetzt jeden Block von block x block Pixeln (Raster ab 0, 0) durch seinen Mittelwert"""
+    width, height = image.width(), image.height()
+    if numpy is None:
+        # Glättendes Verkleinern mittelt die Blöcke, vergrößert wird ohne Glättung
+        small = image.scaled(math.ceil(width / block), math.ceil(height / block),
+                             Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return small.scaled(width, height, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+
+    result = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    pixels = _pixels(result)
+    rows, cols = math.ceil(height / block), math.ceil(width / block)
+    padded = numpy.pad(pixels, ((0, rows * block - height), (0, cols * block - width), (0, 0)), mode="edge")
+    means = padded.reshape(rows, block, cols, block, 4).mean(axis=(1, 3)) + 0.5
+    blocks = numpy.repeat(numpy.repeat(means.astype(numpy.uint8), block, axis=0), block, axis=1)
+    pixels[:] = blocks[:height, :width]
+    return result
+
+
+def _box_rows(values, radius):
+    """Gleitender Mittelwert über 2 * radius + 1 Zeilen (Achse 0) mit Randwiederholung"""
+    padded = numpy.pad(values, ((radius + 1, radius), (0, 0), (0, 0)), mode="edge")
+    sums = numpy.cumsum(padded, axis=0, dtype=numpy.float32)
+    size = values.shape[0]
+    return (sums[2 * radius + 1:2 * radius + 1 + size] - sums[:size]) / (2 * radius + 1)
+
+
+def box_blur(image, radius, passes=BLUR_PASSES):
+    """Weichzeichnen mit separierbaren Box-Filtern (mehrere Durchläufe ~ Gauß-Filter)"""
+    width, height = image.width(), image.height()
+    if numpy is None:
+        # Verkleinern und geglättet wieder vergrößern kommt einem Weichzeichner nahe
+        small = image.scaled(max(1, width // radius), max(1, height // radius),
+                             Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return small.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+    result = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    pixels = _pixels(result)
+    values = pixels.astype(numpy.float32)
+    for _ in range(passes):
+        values = _box_rows(values, radius)
+        values = _box_rows(values.transpose(1, 0, 2), radius).transpose(1, 0, 2)
+    pixels[:] = (values + 0.5).astype(numpy.uint8)
+    return result
+
+
+def apply_effect(image, effect, strength):
+    """Wendet einen Effekt mit der angegebenen Stärke (Blockgröße bzw. Radius) an"""
+    if effect == PIXELATE:
+        return pixelate(image, strength)
+    return box_blur(image, strength)
+
+
+class RedactionCache:
+    """Kacheln des Basisbildes mit angewendetem Effekt, berechnet bei Bedarf"""
+
+    _ids = itertools.count()
+
+    def __init__(self, image, tiles=None):
+        self.key = next(self._ids)
+        # Umgewandelt wird erst beim ersten Zeichnen; Dokumente ohne Schwärzung zahlen nichts
+        self._source = image
+        self._image = None
+        self.tiles = tiles if tiles is not None else TileCache(REDACTION_CACHE_BUDGET)
+
+    @property
+    def image(self):
+        """Basisbild als ARGB32_Premultiplied oder None, solange es freigegeben ist"""
+        if self._image is None and self._source is not None:
+            self._image = self._source.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            self._source = None
+        return self._image
+
+    @staticmethod
+    def tile_size(effect, strength):
+        if effect == PIXELATE:
+            # Kachelkanten fallen auf das Blockraster, damit Blöcke nicht zerschnitten werden
+            return strength * max(1, REDACTION_TILE_SIZE // strength)
+        return REDACTION_TILE_SIZE
+
+    def tile(self, effect, strength, tx, ty):
+        """Kachel (tx, ty) mit Effekt als QImage"""
+        key = (self.key, effect, strength, tx, ty)
+        image = self.tiles.get(key)
+        if image is None:
+            size = self.tile_size(effect, strength)
+            rect = QRect(tx * size, ty * size, size, size).intersected(self.image.rect())
+            # Der Weichzeichner braucht Pixel jenseits der Kachelkante
+            halo = 0 if effect == PIXELATE else strength * BLUR_PASSES
+            source = rect.adjusted(-halo, -halo, halo, halo).intersected(self.image.rect())
+            processed = apply_effect(self.image.copy(source), effect, strength)
+            image = processed.copy(rect.translated(-source.topLeft()))
+            self.tiles.put(key, image)
+        return image
+
+    def draw(self, painter, effect, strength, rect):
+        """Zeichnet den Effekt für den Bildbereich rect (QRectF); ohne Basisbild nichts"""
+        if self.image is None:
+            return
+        size = self.tile_size(effect, strength)
+        rect = rect.toAlignedRect().intersected(self.image.rect())
+        if rect.isEmpty():
+            return
+        for ty in range(rect.top() // size, rect.bottom() // size + 1):
+            for tx in range(rect.left() // size, rect.right() // size + 1):
+                painter.drawImage(QPointF(tx * size, ty * size), self.tile(effect, strength, tx, ty))
+
+    def set_image(self, image):
+        """Tauscht das Basisbild (None gibt es frei, z. B. für ein inaktives Dokument)"""
+        self._source = image
+        self._image = None
+        self.clear()
+
+    def clear(self):
+        self.tiles.clear()
+
+
+class RedactionItem(QGraphicsItem):
+    """Verpixelter oder weichgezeichneter Bereich (Polygon) des Basisbildes"""
+
+    def __init__(self, effect, strength, points, parent=None):
+        super().__init__(parent)
+        self.effect = effect
+        self.strength = max(1, int(round(strength)))
+        self.points = list(points)
+        self._path = self._build_path()
+        self._shape = None
+        # Ausdehnung der Punkte; _bounds enthält zusätzlich die Reserve beim Aufziehen
+        self._extent = self._path.boundingRect()
+        self._bounds = self._extent
+        # Cache für das Zeichnen außerhalb einer Szene (z. B. in der Rasterebene)
+        self.cache = None
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    @classmethod
+    def from_rect(cls, effect, strength, rect):
+        return cls(effect, strength, cls.rect_points(rect))
+
+    @staticmethod
+    def rect_points(rect):
+        return [(rect.left(), rect.top()), (rect.right(), rect.top()),
+                (rect.right(), rect.bottom()), (rect.left(), rect.bottom())]
+
+    def pen(self):
+        # Für den Annotations-Index: Schwärzungen haben keinen Rand
+        return QPen(Qt.NoPen)
+
+    def _build_path(self):
+        """Offener Umriss; geschlossen wird er erst in shape()"""
+        path = QPainterPath()
+        path.addPolygon(QPolygonF([QPointF(x, y) for x, y in self.points]))
+        return path
+
+    def _grow(self, extent, dirty):
+        """Übernimmt die Ausdehnung, erweitert die Begrenzung (mit Reserve) bei Bedarf
+        und zeichnet nur den Bereich dirty (QRegion) neu"""
+        self._shape = None
+        self._extent = extent
+        if not self._bounds.contains(extent):
+            self.prepareGeometryChange()
+            pad = REDACTION_BOUNDS_PADDING
+            self._bounds = self._bounds.united(extent.adjusted(-pad, -pad, pad, pad))
+        for rect in dirty.rects():
+            self.update(QRectF(rect).adjusted(-1, -1, 1, 1))
+
+    def _reshape(self, points, dirty):
+        """Übernimmt neue Punkte und zeichnet nur den Bereich dirty (QRegion) neu"""
+        self.points = points
+        self._path = self._build_path()
+        self._grow(self._path.boundingRect(), dirty)
+
+    def set_rect(self, rect):
+        """Setzt die Fläche auf ein Rechteck; neu gezeichnet wird nur die Differenz"""
+        old = QRegion(self._extent.toAlignedRect())
+        self._reshape(self.rect_points(rect), old.xored(QRegion(rect.toAlignedRect())))
+
+    def add_point(self, point):
+        """Hängt einen Punkt an die Freihand-Fläche an"""
+        first, last = self.points[0], self.points[-1]
+        xs = (first[0], last[0], point.x())
+        ys = (first[1], last[1], point.y())
+        # Betroffen ist nur das Dreieck aus erstem, bisher letztem und neuem Punkt
+        dirty = QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+        # Punkte und offenen Umriss fortschreiben statt alles neu aufzubauen
+        self.points.append((point.x(), point.y()))
+        self._path.lineTo(point)
+        self._grow(self._extent.united(dirty), QRegion(dirty.toAlignedRect()))
+
+    def set_points(self, points):
+        """Ersetzt die Punkte (z. B. vereinfacht) und reduziert die Begrenzung"""
+        self.prepareGeometryChange()
+        self.points = list(points)
+        self._path = self._build_path()
+        self._shape = None
+        self._extent = self._path.boundingRect()
+        self._bounds = self._extent
+
+    def path(self):
+        return QPainterPath(self.shape())
+
+    def boundingRect(self):
+        return self._bounds
+
+    def shape(self):
+        if self._shape is None:
+            self._shape = QPainterPath(self._path)
+            self._shape.closeSubpath()
+        return self._shape
+
+    def paint(self, painter, option, widget=None):
+        scene = self.scene()
+        cache = scene.redaction_cache() if scene is not None else self.cache
+        if cache is None:
+            return
+        exposed = option.exposedRect.intersected(self._extent)
+        if exposed.isEmpty():
+            return
+        painter.save()
+        # Der offene Umriss wird beim Füllen (Clip) implizit geschlossen
+        painter.setClipPath(self._path, Qt.IntersectClip)
+        cache.draw(painter, self.effect, self.strength, exposed)
+        painter.restore()
@@ -0,0 +1,242 @@
+"""
+Auswahl-Overlays für den Snipping Tool Clone
+--------------------------------------------
+Vollbild-Overlays über einem eingefrorenen Bildschirmfoto, in denen der Benutzer
+den aufzunehmenden Bereich auswählt. Die Overlays arbeiten in logischen
+Koordinaten, ausgewählte Bereiche werden in Bildpixeln gemeldet (bei HiDPI
+bzw. gemischten Skalierungen über ScreenMap umgerechnet).
+"""
+from PyQt5.QtCore import Qt, QPointF, QRect, QRectF, pyqtSignal
+from PyQt5.QtGui import QPainter, QPainterPath, QPen, QColor, QImage
+from PyQt5.QtWidgets import QWidget
+
+from capture import ScreenMap
+
+# Breite der Lasso-Linie und Rand, um den ein neues Segment neu gezeichnet wird
+LASSO_WIDTH = 2
+LASSO_PADDING = LASSO_WIDTH + 2
+
+
+def freeform_crop(frame, path):
+    """Schneidet frame auf das Begrenzungsrechteck von path zu und maskiert mit weichen Kanten"""
+    rect = path.boundingRect().toAlignedRect().intersected(frame.rect())
+    result = QImage(rect.size(), QImage.Format_ARGB32_Premultiplied)
+    result.fill(Qt.transparent)
+
+    painter = QPainter(result)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.translate(-rect.topLeft())
+    # Erst die Maske (geglättete Pfadfläche), dann nur der benötigte Ausschnitt des Bildes
+    painter.fillPath(path, QColor(0, 0, 0))
+    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+    painter.drawImage(rect.topLeft(), frame, rect)
+    painter.end()
+    return result
+
+
+class FrameOverlay(QWidget):
+    """Basis der Overlays: bedeckt den Desktopbereich des Bildes und rechnet Koordinaten um"""
+
+    def __init__(self, frame, parent=None):
+        super().__init__(parent)
+        self.frame = frame
+        self.screen_map = ScreenMap(frame)
+        self.setGeometry(self.screen_map.logical_bounds())
+
+    def frame_rect(self, rect):
+        """Rechteck in Overlay-Koordinaten -> Rechteck in Bildpixeln"""
+        return self.screen_map.rect_to_frame(rect.translated(self.geometry().topLeft()))
+
+    def overlay_rect(self, rect):
+        """Rechteck in Bildpixeln -> Rechteck in Overlay-Koordinaten"""
+        return self.screen_map.rect_to_logical(rect).translated(-self.geometry().topLeft())
+
+    def draw_frame(self, painter, rect):
+        """Zeichnet den Ausschnitt des Bildes, der unter rect (Overlay-Koordinaten) liegt"""
+        painter.drawImage(QRectF(rect), self.frame, QRectF(self.frame_rect(rect)))
+
+
+class RegionSelector(FrameOverlay):
+    """Overlay zur Auswahl eines rechteckigen Bereichs im eingefrorenen Bild"""
+
+    selected = pyqtSignal(QRect)
+    cancelled = pyqtSignal()
+
+    def __init__(self, frame, parent=None):
+        super().__init__(frame, parent)
+        self.origin = None
+        self.selection = QRect()
+
+        # Fenstereinstellungen
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setCursor(Qt.CrossCursor)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.draw_frame(painter, self.rect())
+
+        # Abgedunkelter Hintergrund außerhalb der Auswahl
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 100))
+        if not self.selection.isNull():
+            self.draw_frame(painter, self.selection)
+            painter.setPen(QPen(QColor("#0078d7"), 1))
+            painter.drawRect(self.selection.adjusted(0, 0, -1, -1))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.origin = event.pos()
+            self.selection = QRect(self.origin, self.origin)
+            self.update()
+
+    def mouseMoveEvent(self, event):
+        if self.origin is not None:
+            old = self.selection
+            self.selection = QRect(self.origin, event.pos()).normalized()
+            # Nur den geänderten Bereich neu zeichnen
+            self.update(old.united(self.selection).adjusted(-2, -2, 2, 2))
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.origin is not None:
+            self.origin = None
+            self.hide()
+            if self.selection.width() > 1 and self.selection.height() > 1:
+                self.selected.emit(self.frame_rect(self.selection))
+            else:
+                self.cancelled.emit()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.hide()
+            self.cancelled.emit()
+
+
+class FreeformSelector(FrameOverlay):
+    """Overlay zum Zeichnen eines Freiform-Bereichs (Lasso) im eingefrorenen Bild"""
+
+    selected = pyqtSignal(QPainterPath)
+    cancelled = pyqtSignal()
+
+    def __init__(self, frame, parent=None):
+        super().__init__(frame, parent)
+        self.path = None
+        self.last_point = None
+
+        # Fenstereinstellungen
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setCursor(Qt.CrossCursor)
+
+    def paintEvent(self, event):
+        # Nur der angeforderte Bereich: Bild, Abdunklung und Lasso darin
+        rect = event.rect()
+        painter = QPainter(self)
+        painter.setClipRect(rect)
+        self.draw_frame(painter, rect)
+        painter.fillRect(rect, QColor(0, 0, 0, 100))
+        if self.path is not None:
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(QColor("#0078d7"), LASSO_WIDTH, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+            painter.drawPath(self.path)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            point = QPointF(event.pos())
+            self.path = QPainterPath(point)
+            self.last_point = point
+            self.update(QRect(event.pos(), event.pos()).adjusted(-LASSO_PADDING, -LASSO_PADDING,
+                                                                  LASSO_PADDING, LASSO_PADDING))
+
+    def mouseMoveEvent(self, event):
+        if self.path is not None:
+            point = QPointF(event.pos())
+            self.path.lineTo(point)
+            # Nur das neue Segment neu zeichnen
+            dirty = QRect(self.last_point.toPoint(), event.pos()).normalized()
+            self.update(dirty.adjusted(-LASSO_PADDING, -LASSO_PADDING, LASSO_PADDING, LASSO_PADDING))
+            self.last_point = point
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.path is not None:
+            path = self.path
+            self.path = None
+            self.hide()
+            path.closeSubpath()
+            bounds = path.boundingRect()
+            if path.elementCount() > 2 and bounds.width() > 1 and bounds.height() > 1:
+                path = self.screen_map.path_to_frame(path.translated(QPointF(self.geometry().topLeft())))
+                path.closeSubpath()
+                self.selected.emit(path)
+            else:
+                self.cancelled.emit()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.hide()
+            self.cancelled.emit()
+
+
+class WindowSelector(FrameOverlay):
+    """Overlay zur Auswahl eines Fensters; das Fenster unter dem Mauszeiger wird hervorgehoben"""
+
+    selected = pyqtSignal(QRect)
+    cancelled = pyqtSignal()
+
+    def __init__(self, frame, index, parent=None):
+        super().__init__(frame, parent)
+        self.index = index
+        # Hervorgehobenes Fenster in Bildpixeln
+        self.hovered = QRect()
+
+        # Fenstereinstellungen; am Fenstermanager vorbei, damit das Overlay nicht im Index landet
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool
+                            | Qt.X11BypassWindowManagerHint)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMouseTracking(True)
+        self.setCursor(Qt.PointingHandCursor)
+
+    def window_rect(self, pos):
+        """Rechteck des obersten Fensters an pos (Overlay) in Bildpixeln oder ein leeres QRect"""
+        # Der Fensterindex arbeitet in physischen Desktop-Pixeln
+        point = self.screen_map.to_frame(QPointF(pos + self.geometry().topLeft()))
+        origin = self.screen_map.origin
+        hit = self.index.window_at(int(point.x()) + origin.x(), int(point.y()) + origin.y())
+        if hit is None:
+            return QRect()
+        return hit[1].translated(-origin).intersected(self.frame.rect())
+
+    def paintEvent(self, event):
+        rect = event.rect()
+        painter = QPainter(self)
+        painter.setClipRect(rect)
+        self.draw_frame(painter, rect)
+        painter.fillRect(rect, QColor(0, 0, 0, 100))
+        if not self.hovered.isNull():
+            hovered = self.overlay_rect(self.hovered)
+            self.draw_frame(painter, hovered.intersected(rect))
+            painter.setPen(QPen(QColor("#0078d7"), 3))
+            painter.drawRect(hovered.adjusted(1, 1, -2, -2))
+
+    def mouseMoveEvent(self, event):
+        hovered = self.window_rect(event.pos())
+        if hovered != self.hovered:
+            old = self.hovered
+            self.hovered = hovered
+            # Nur altes und neues Fenster neu zeichnen
+            if not old.isNull():
+                self.update(self.overlay_rect(old))
+            if not hovered.isNull():
+                self.update(self.overlay_rect(hovered))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            rect = self.window_rect(event.pos())
+            self.hide()
+            if rect.width() > 1 and rect.height() > 1:
+                self.selected.emit(rect)
+            else:
+                self.cancelled.emit()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.hide()
+            self.cancelled.emit()
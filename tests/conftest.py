@@ -0,0 +1,21 @@
+"""
+Test-Einrichtung für den Snipping Tool Clone
+--------------------------------------------
+Die Module liegen flach im Projektverzeichnis; Tests laufen mit der
+Qt-Plattform offscreen und teilen sich eine QApplication.
+
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
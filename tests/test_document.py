@@ -0,0 +1,100 @@
+"""Tests für das .snip-Annotationsdokument (document.py)"""
+import struct
+from array import array
+
+import pytest
+
+from annotations import (
+    KIND_BLUR, KIND_ELLIPSE, KIND_PIXELATE, KIND_RECTANGLE, KIND_STROKE, AnnotationRecord,
+    annotation_record, item_from_record,
+)
+from document import DOCUMENT_VERSION, DocumentError, read_document, sidecar_path, write_document
+
+# Eine Annotation je Art (Text ist keine eigene Art im Dokument)
+RECORDS = [
+    AnnotationRecord(KIND_STROKE, 0xFFFF0000, 2.0, True, array("f", [1.5, 2.5, 10.0, 20.0, 30.25, 5.0])),
+    AnnotationRecord(KIND_RECTANGLE, 0x80112233, 3.5, False, array("f", [10, 20, 100, 50])),
+    AnnotationRecord(KIND_ELLIPSE, 0xFF00FF00, 1.0, False, array("f", [-5, -5, 40, 30])),
+    AnnotationRecord(KIND_PIXELATE, 0, 12.0, False, array("f", [0, 0, 64, 0, 64, 64, 0, 64])),
+    AnnotationRecord(KIND_BLUR, 0, 6.0, False, array("f", [5, 5, 50, 8, 30, 40])),
+]
+
+
+@pytest.fixture
+def document(tmp_path):
+    image_path = tmp_path / "aufnahme.png"
+    path = sidecar_path(str(image_path))
+    write_document(path, str(image_path), 1920, 1080, RECORDS)
+    return path, str(image_path)
+
+
+def test_round_trip_every_kind(document):
+    path, image_path = document
+    loaded = read_document(path)
+    assert loaded.image_path == image_path
+    assert (loaded.width, loaded.height) == (1920, 1080)
+    assert loaded.records == RECORDS
+
+
+def test_round_trip_through_items(app, tmp_path):
+    # Grafik-Item -> Record -> Datei -> Record -> Item ergibt dieselbe Beschreibung
+    records = [annotation_record(item_from_record(record)) for record in RECORDS]
+    path = str(tmp_path / "items.snip")
+    write_document(path, str(tmp_path / "bild.png"), 640, 480, records)
+    loaded = read_document(path).records
+    assert [annotation_record(item_from_record(record)) for record in loaded] == records
+
+
+def test_empty_document(tmp_path):
+    path = str(tmp_path / "leer.snip")
+    write_document(path, str(tmp_path / "bild.png"), 1, 1, [])
+    assert read_document(path).records == []
+
+
+@pytest.mark.parametrize("keep", [3, 12, 20, 40, -3])
+def test_truncated_file(document, keep):
+    path, _ = document
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:keep])
+    with pytest.raises(DocumentError):
+        read_document(path)
+
+
+def test_corrupt_points(document):
+    path, _ = document
+    with open(path, "r+b") as f:
+        data = bytearray(f.read())
+        data[-8:] = b"\x00" * 8
+        f.seek(0)
+        f.write(data)
+    with pytest.raises(DocumentError):
+        read_document(path)
+
+
+def test_wrong_magic(document):
+    path, _ = document
+    with open(path, "r+b") as f:
+        f.write(b"PNG\x00")
+    with pytest.raises(DocumentError):
+        read_document(path)
+
+
+def test_newer_version_is_rejected(document):
+    path, _ = document
+    with open(path, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<H", DOCUMENT_VERSION + 1))
+    with pytest.raises(DocumentError):
+        read_document(path)
+
+
+def test_older_version_is_read(tmp_path):
+    # Version 1 kannte nur Striche und Formen, das Format ist sonst gleich
+    path = str(tmp_path / "alt.snip")
+    write_document(path, str(tmp_path / "bild.png"), 10, 10, RECORDS[:3])
+    with open(path, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<H", 1))
+    assert read_document(path).records == RECORDS[:3]
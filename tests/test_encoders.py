@@ -0,0 +1,107 @@
+"""Tests für die parallele PNG-Kodierung (encoders.py)"""
+import random
+import struct
+import zlib
+
+import pytest
+from PyQt5.QtGui import QImage
+
+import encoders
+from encoders import adler32_combine, encode_png
+
+
+def make_image(width, height, alpha=False, seed=0):
+    """Bild mit Verläufen und Rauschen, damit Filter und Wörterbuch etwas zu tun haben"""
+    rng = random.Random(seed)
+    data = bytearray()
+    for y in range(height):
+        for x in range(width):
+            noise = rng.randrange(8)
+            a = (x * 255 // max(1, width - 1)) if alpha else 255
+            data += bytes(((x + noise) & 0xFF, (y * 3) & 0xFF, (x ^ y) & 0xFF, a))
+    fmt = QImage.Format_ARGB32 if alpha else QImage.Format_RGB32
+    return QImage(bytes(data), width, height, width * 4, fmt).copy()
+
+
+def idat_chunks(png):
+    """Inhalte aller IDAT-Chunks; prüft dabei die CRC jedes Chunks"""
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    offset, chunks = 8, []
+    while offset < len(png):
+        (length,) = struct.unpack_from(">I", png, offset)
+        tag = png[offset + 4:offset + 8]
+        data = png[offset + 8:offset + 8 + length]
+        (crc,) = struct.unpack_from(">I", png, offset + 8 + length)
+        assert crc == zlib.crc32(data, zlib.crc32(tag))
+        if tag == b"IDAT":
+            chunks.append(data)
+        offset += 12 + length
+    return chunks
+
+
+def assert_decodes_to(png, image):
+    # zlib.decompress prüft auch die kombinierte Adler-32-Summe
+    zlib.decompress(b"".join(idat_chunks(png)))
+    decoded = QImage.fromData(png)
+    assert not decoded.isNull()
+    assert decoded.convertToFormat(QImage.Format_ARGB32) == image.convertToFormat(QImage.Format_ARGB32)
+
+
+@pytest.fixture
+def small_strips(monkeypatch):
+    # Wenige Zeilen je Streifen, Wörterbuch kürzer als die vorigen Streifen
+    monkeypatch.setattr(encoders, "PNG_STRIP_BYTES", 1000)
+    monkeypatch.setattr(encoders, "DEFLATE_WINDOW", 2048)
+
+
+@pytest.mark.parametrize("alpha", [False, True], ids=["rgb", "rgba"])
+@pytest.mark.parametrize("level, adaptive", [(1, False), (6, False), (9, True)], ids=["fast", "default", "adaptive"])
+def test_multi_strip(app, small_strips, alpha, level, adaptive):
+    image = make_image(97, 61, alpha)
+    png = encode_png(image, level=level, adaptive=adaptive)
+    assert len(idat_chunks(png)) > 10
+    # Farbtyp im IHDR: 6 = RGBA, 2 = RGB
+    assert png[25] == (6 if alpha else 2)
+    assert_decodes_to(png, image)
+
+
+def test_opaque_alpha_channel_is_written_as_rgb(app, small_strips):
+    image = make_image(40, 30).convertToFormat(QImage.Format_ARGB32)
+    png = encode_png(image, level=1)
+    assert png[25] == 2
+    assert_decodes_to(png, image)
+
+
+@pytest.mark.parametrize("size", [(1, 1), (50, 1), (64, 48)])
+@pytest.mark.parametrize("adaptive", [False, True], ids=["none", "adaptive"])
+def test_single_strip(app, size, adaptive):
+    image = make_image(*size, alpha=True)
+    png = encode_png(image, level=6, adaptive=adaptive)
+    assert len(idat_chunks(png)) == 1
+    assert_decodes_to(png, image)
+
+
+def test_strip_size_matches_height(app, monkeypatch):
+    # Genau zwei volle Streifen: der letzte endet mit Z_FINISH, keiner bleibt leer
+    image = make_image(33, 20)
+    monkeypatch.setattr(encoders, "PNG_STRIP_BYTES", 10 * (33 * 3 + 1))
+    png = encode_png(image, level=1)
+    assert len(idat_chunks(png)) == 2
+    assert_decodes_to(png, image)
+
+
+@pytest.mark.parametrize("sizes", [(0, 0), (1, 0), (0, 7), (100, 200), (70000, 1), (3, 140000), (65521, 65521)])
+def test_adler32_combine(sizes):
+    rng = random.Random(sum(sizes))
+    first, second = (bytes(rng.randrange(256) for _ in range(size)) for size in sizes)
+    combined = adler32_combine(zlib.adler32(first), zlib.adler32(second), len(second))
+    assert combined == zlib.adler32(first + second)
+
+
+def test_adler32_combine_many_parts():
+    rng = random.Random(1)
+    parts = [bytes(rng.randrange(256) for _ in range(rng.randrange(1, 5000))) for _ in range(20)]
+    checksum = 1
+    for part in parts:
+        checksum = adler32_combine(checksum, zlib.adler32(part), len(part))
+    assert checksum == zlib.adler32(b"".join(parts))
@@ -0,0 +1,95 @@
+"""Tests für Export und Vorab-Kodieren der Zwischenablage (export.py, editor.py)"""
+import time
+
+from PyQt5.QtGui import QColor, QImage, QPen
+from PyQt5.QtWidgets import QApplication
+
+from annotations import StrokeItem
+from documents import DocumentWindow
+from editor import EditorWidget
+from imagestore import ImageStore
+
+
+def make_editor():
+    image = QImage(400, 300, QImage.Format_RGB32)
+    image.fill(0xFFFFFFFF)
+    return EditorWidget(image)
+
+
+def draw_stroke(scene, y):
+    scene.begin_edit()
+    scene.add_annotation(StrokeItem.from_points(QPen(QColor("red"), 3), [(10, y), (390, y)]))
+    scene.end_edit()
+
+
+def wait_for_export(editor, timeout=10):
+    deadline = time.monotonic() + timeout
+    while editor.exporter.is_running():
+        assert time.monotonic() < deadline, "Export nicht beendet"
+        QApplication.processEvents()
+        time.sleep(0.01)
+
+
+def prefetched_image(mime_data):
+    assert "image/png" in mime_data._encoded
+    return QImage.fromData(mime_data._encoded["image/png"], "PNG")
+
+
+def test_prefetch_belongs_to_its_copy(app):
+    editor = make_editor()
+    draw_stroke(editor.scene, 100)
+    editor.copy_to_clipboard()
+    first, _ = editor.clipboard_prefetch
+
+    # Neue Kopie eines geänderten Stands, während das erste PNG noch kodiert wird
+    draw_stroke(editor.scene, 200)
+    editor.copy_to_clipboard()
+    second, version = editor.clipboard_prefetch
+    assert first is not second
+    assert version == editor.composite.version
+    wait_for_export(editor)
+
+    assert "image/png" not in first._encoded
+    image = prefetched_image(second)
+    assert image.pixelColor(200, 200) == QColor("red")
+
+
+def test_prefetch_skips_replaced_clipboard(app):
+    editor = make_editor()
+    draw_stroke(editor.scene, 100)
+    editor.copy_to_clipboard()
+    mime_data, _ = editor.clipboard_prefetch
+
+    # Eine andere Anwendung (oder ein anderer Tab) kopiert inzwischen etwas anderes
+    QApplication.clipboard().setText("anderer Inhalt")
+    wait_for_export(editor)
+
+    assert "image/png" not in mime_data._encoded
+    assert editor.clipboard_prefetch is None
+    assert QApplication.clipboard().text() == "anderer Inhalt"
+
+
+def test_tab_switch_keeps_saving(app, tmp_path):
+    store = ImageStore(directory=str(tmp_path))
+    window = DocumentWindow(store)
+    editors = [make_editor() for _ in range(2)]
+    for editor in editors:
+        window.add_editor(editor, store.add(editor.image))
+    window.tabs.setCurrentIndex(0)
+    saving = editors[0]
+    draw_stroke(saving.scene, 100)
+    saved = []
+    saving.exporter.finished.connect(lambda path, data: saved.append(path))
+
+    # "Speichern unter" läuft noch, als der Tab gewechselt (und freigegeben) wird
+    path = str(tmp_path / "bild.png")
+    saving.exporter.export("PNG", path)
+    window.tabs.setCurrentIndex(1)
+    assert saving.suspended
+    wait_for_export(saving)
+
+    assert saved == [path]
+    image = QImage(path)
+    assert image.pixelColor(200, 100) == QColor("red")
+    window.close_all()
+    store.close()
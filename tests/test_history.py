@@ -0,0 +1,98 @@
+"""Tests für die Aufbewahrungsgrenzen des Verlaufs (history.py)"""
+import os
+import time
+
+import pytest
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from history import HistoryModel, HistoryStore, history_enabled, history_limits
+
+
+def make_image(seed):
+    image = QImage(32, 24, QImage.Format_RGB32)
+    image.fill(0xFF000000 | seed * 0x010203)
+    # Unterschiedliche Muster, damit kein Eintrag als Duplikat gilt
+    for x in range(seed % 32):
+        image.setPixel(x, seed % 24, 0xFFFFFFFF)
+    return image
+
+
+def files(store):
+    objects = [os.path.join(root, name) for root, _, names in os.walk(store.objects_dir) for name in names]
+    return sorted(objects), sorted(os.listdir(store.thumbnails_dir))
+
+
+def test_count_limit_evicts_oldest_with_files(app, tmp_path):
+    store = HistoryStore(str(tmp_path), max_entries=3)
+    entries = [store.store(make_image(seed), "Test") for seed in range(1, 6)]
+    kept = store.entries()
+    assert [entry.hash for entry in kept] == [entry.hash for entry in reversed(entries[2:])]
+    objects, thumbnails = files(store)
+    assert len(objects) == 3 and len(thumbnails) == 3
+    for entry in entries[:2]:
+        assert not os.path.exists(store.object_path(entry.hash))
+        assert not os.path.exists(store.thumbnail_path(entry.hash))
+
+
+def test_byte_limit_keeps_newest(app, tmp_path):
+    store = HistoryStore(str(tmp_path), max_bytes=1)
+    for seed in range(1, 4):
+        newest = store.store(make_image(seed))
+    assert store.entries() == [newest]
+    assert files(store)[0] == [store.object_path(newest.hash)]
+
+
+def test_duplicate_is_not_evicted_early(app, tmp_path):
+    store = HistoryStore(str(tmp_path), max_entries=2)
+    first = store.store(make_image(1))
+    store.store(make_image(2))
+    # Das Duplikat holt den ersten Eintrag nach vorne, gelöscht wird der zweite
+    store.store(make_image(1))
+    store.store(make_image(3))
+    assert [entry.hash for entry in store.entries()][1] == first.hash
+    assert os.path.exists(store.object_path(first.hash))
+
+
+@pytest.mark.parametrize("value, enabled", [(None, True), ("1", True), ("0", False), ("off", False)])
+def test_history_enabled(monkeypatch, value, enabled):
+    if value is None:
+        monkeypatch.delenv("SNIPPING_TOOL_HISTORY", raising=False)
+    else:
+        monkeypatch.setenv("SNIPPING_TOOL_HISTORY", value)
+    assert history_enabled() is enabled
+
+
+def test_history_limits_from_environment(monkeypatch):
+    monkeypatch.setenv("SNIPPING_TOOL_HISTORY_MAX_ENTRIES", "10")
+    monkeypatch.setenv("SNIPPING_TOOL_HISTORY_MAX_MB", "1.5")
+    assert history_limits() == (10, 1536 * 1024)
+
+
+def wait_for_thumbnails(model, timeout=10):
+    deadline = time.monotonic() + timeout
+    while model.pending:
+        assert time.monotonic() < deadline, "Vorschaubild nicht geladen"
+        QApplication.processEvents()
+        time.sleep(0.01)
+
+
+def test_failed_thumbnail_is_retried(app, tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    entry = store.store(make_image(1))
+    model = HistoryModel(store)
+    load_thumbnail = store.load_thumbnail
+
+    def broken(digest):
+        raise OSError("Datenträger nicht lesbar")
+
+    monkeypatch.setattr(store, "load_thumbnail", broken)
+    assert model.thumbnail(entry.hash) is model.placeholder
+    wait_for_thumbnails(model)
+    assert entry.hash not in model.thumbnails
+
+    # Nach dem Fehler wird das Vorschaubild beim nächsten Anzeigen erneut angefordert
+    monkeypatch.setattr(store, "load_thumbnail", load_thumbnail)
+    model.thumbnail(entry.hash)
+    wait_for_thumbnails(model)
+    assert entry.hash in model.thumbnails
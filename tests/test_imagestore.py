@@ -0,0 +1,117 @@
+"""Tests für den Bildspeicher mit Budget und Auslagerung (imagestore.py)"""
+import threading
+
+import pytest
+from PyQt5.QtCore import QPoint, QRunnable
+from PyQt5.QtGui import QColor, QImage
+
+from imagestore import ImageStore, read_spill, write_spill
+from workers import worker_pool
+
+# 100x100 ARGB32: 40 000 Bytes je Bild
+IMAGE_BYTES = 100 * 100 * 4
+
+
+def make_image(seed):
+    image = QImage(100, 100, QImage.Format_ARGB32)
+    for y in range(100):
+        for x in range(100):
+            image.setPixel(x, y, QColor((x * seed) % 256, (y + seed) % 256, (x ^ y) % 256, 200).rgba())
+    image.setOffset(QPoint(-seed, seed))
+    return image
+
+
+@pytest.fixture
+def store(app, tmp_path):
+    # Platz für zwei Bilder
+    store = ImageStore(budget=2 * IMAGE_BYTES + 100, directory=str(tmp_path))
+    yield store
+    store.close()
+
+
+def spill_files(tmp_path):
+    return sorted(tmp_path.glob("spill-*/*.zimg"))
+
+
+def test_spill_file_round_trip(app, tmp_path):
+    image = make_image(3)
+    image.setDevicePixelRatio(2.0)
+    path = str(tmp_path / "bild.zimg")
+    write_spill(path, image)
+    loaded = read_spill(path)
+    assert loaded == image
+    assert loaded.offset() == image.offset() and loaded.devicePixelRatio() == 2.0
+
+
+def test_budget_spills_oldest_unpinned(store, tmp_path):
+    keys = [store.add(make_image(1))]
+    store.pin(keys[0])
+    keys += [store.add(make_image(seed)) for seed in (2, 3, 4)]
+    store.wait()
+
+    # Das älteste Bild ist angeheftet, ausgelagert werden die beiden nächstältesten
+    assert [store.is_resident(key) for key in keys] == [True, False, False, True]
+    assert store.memory_used == 2 * IMAGE_BYTES
+    assert len(spill_files(tmp_path)) == 2
+    assert store.disk_used == sum(path.stat().st_size for path in spill_files(tmp_path))
+
+
+def test_reload_gives_same_pixels(store):
+    images = [make_image(seed) for seed in (1, 2, 3)]
+    keys = [store.add(image) for image in images]
+    store.wait()
+    assert not store.is_resident(keys[0])
+
+    reloaded = store.image(keys[0])
+    assert reloaded == images[0]
+    assert reloaded.offset() == images[0].offset()
+    # Der Zugriff macht das Bild zum jüngsten; nun weicht das nächstälteste
+    store.wait()
+    assert store.is_resident(keys[0]) and not store.is_resident(keys[1])
+    assert store.image(keys[1]) == images[1]
+
+
+def test_release_deletes_spill_file(store, tmp_path):
+    keys = [store.add(make_image(seed)) for seed in (1, 2, 3)]
+    store.retain(keys[0])
+    store.wait()
+    (path,) = spill_files(tmp_path)
+    assert store.disk_used == path.stat().st_size
+
+    store.release(keys[0])
+    assert path.exists() and keys[0] in store
+    store.release(keys[0])
+    assert not path.exists() and keys[0] not in store
+    assert store.disk_used == 0
+    assert store.memory_used == 2 * IMAGE_BYTES
+
+
+def test_release_while_spilling(store, tmp_path):
+    keys = [store.add(make_image(seed)) for seed in (1, 2, 3)]
+    store.release(keys[0])
+    store.wait()
+    assert spill_files(tmp_path) == []
+    assert store.disk_used == 0
+
+
+def test_wait_ignores_unrelated_pool_tasks(store):
+    started = threading.Event()
+    unblock = threading.Event()
+
+    class Blocker(QRunnable):
+        def run(self):
+            started.set()
+            unblock.wait(10)
+
+    blocker = Blocker()
+    worker_pool().start(blocker)
+    try:
+        assert started.wait(5)
+        keys = [store.add(make_image(seed)) for seed in (1, 2, 3)]
+        store.wait()
+        # Die Auslagerung ist übernommen, obwohl der Blocker noch läuft
+        assert not unblock.is_set()
+        assert not store.is_resident(keys[0])
+    finally:
+        unblock.set()
+        worker_pool().waitForDone()
@@ -0,0 +1,40 @@
+"""Tests für das Schwärzen (redaction.py)"""
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem
+
+from redaction import PIXELATE, RedactionCache, RedactionItem
+
+
+def render(item, cache):
+    image = QImage(200, 200, QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    item.cache = cache
+    painter = QPainter(image)
+    option = QStyleOptionGraphicsItem()
+    option.exposedRect = QRectF(image.rect())
+    item.paint(painter, option)
+    painter.end()
+    return image
+
+
+def test_freehand_matches_polygon(app):
+    points = [(20, 20), (180, 30), (170, 170), (40, 150), (30, 90)]
+    drawn = RedactionItem(PIXELATE, 8, points[:1])
+    for x, y in points[1:]:
+        drawn.add_point(QPointF(x, y))
+    built = RedactionItem(PIXELATE, 8, points)
+
+    assert drawn.points == points
+    assert drawn.shape() == built.shape()
+    assert drawn.path().boundingRect() == QRectF(20, 20, 160, 150)
+    # Der Umriss ist geschlossen, auch ohne dass der letzte Punkt den ersten wiederholt
+    assert drawn.shape().contains(QPointF(27, 60))
+    assert drawn.boundingRect().contains(built.boundingRect())
+
+    source = QImage(200, 200, QImage.Format_RGB32)
+    for y in range(200):
+        for x in range(200):
+            source.setPixel(x, y, 0xFF000000 | (x * 1237 + y * 4513) & 0xFFFFFF)
+    cache = RedactionCache(source)
+    assert render(drawn, cache) == render(built, cache)
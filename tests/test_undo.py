@@ -0,0 +1,73 @@
+"""Tests für Rückgängig/Wiederholen im Editor (editor.py, undo.py)"""
+import pytest
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QColor, QImage, QPen
+
+from annotations import StrokeItem, annotation_record
+from editor import EditorWidget
+
+
+def make_editor():
+    image = QImage(400, 300, QImage.Format_RGB32)
+    image.fill(0xFFFFFFFF)
+    return EditorWidget(image)
+
+
+def draw_stroke(scene, color="red", points=((10, 150), (390, 150))):
+    scene.begin_edit()
+    scene.add_annotation(StrokeItem.from_points(QPen(QColor(color), 3), list(points)))
+    scene.end_edit()
+
+
+def records(scene):
+    return sorted((annotation_id, annotation_record(item)) for annotation_id, item in scene.annotations.items())
+
+
+def test_undo_redo_ignored_while_erasing(app):
+    editor = make_editor()
+    scene = editor.scene
+    draw_stroke(scene)
+    before = records(scene)
+
+    # Radieren läuft (Maustaste gedrückt): Rückgängig/Wiederholen ändern nichts
+    scene.begin_edit()
+    scene.erase_segment(QPointF(200, 140), QPointF(200, 160))
+    during = records(scene)
+    assert len(during) == 2
+    scene.undo()
+    scene.redo()
+    assert records(scene) == during
+    scene.end_edit()
+
+    # Danach nimmt Rückgängig das Radieren als Ganzes zurück, Wiederholen stellt es her
+    scene.undo()
+    assert records(scene) == before
+    scene.redo()
+    assert records(scene) == during
+    scene.undo()
+    scene.undo()
+    assert records(scene) == []
+
+
+@pytest.mark.parametrize("flattened", [False, True])
+def test_undo_restores_stacking_order(app, flattened):
+    editor = make_editor()
+    scene = editor.scene
+    draw_stroke(scene)
+    if flattened:
+        scene.flatten_age = 0
+        scene.flatten_annotations()
+        assert len(scene.annotation_layer) == 1
+    # Neuerer blauer Strich kreuzt den roten bei (200, 150)
+    draw_stroke(scene, "blue", [(200, 10), (200, 290)])
+    assert editor.composite.image().pixelColor(200, 150) == QColor("blue")
+
+    scene.begin_edit()
+    scene.erase_segment(QPointF(100, 140), QPointF(100, 160))
+    scene.end_edit()
+    scene.undo()
+
+    # Der wiederhergestellte rote Strich liegt wieder unter dem blauen
+    assert editor.composite.image().pixelColor(200, 150) == QColor("blue")
+    assert editor.composite.image().pixelColor(300, 150) == QColor("red")
+    assert len(scene.annotation_layer) == (1 if flattened else 0)
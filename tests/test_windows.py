@@ -0,0 +1,268 @@
+"""Tests für den Fensterindex (windows.py)"""
+import os
+import shutil
+import subprocess
+import time
+from types import SimpleNamespace
+
+import pytest
+from PyQt5.QtCore import QRect
+
+import windows
+from windows import WindowIndex, X11WindowSource
+
+# Konstanten des X-Protokolls, damit die Ereignisverarbeitung ohne python-xlib testbar ist
+X_CONSTANTS = SimpleNamespace(NONE=0, DestroyNotify=17, UnmapNotify=18, MapNotify=19,
+                              ConfigureNotify=22, CirculateNotify=26, PlaceOnTop=0, PlaceOnBottom=1)
+
+
+@pytest.fixture
+def index():
+    # Kleine Zellen, damit Fenster über mehrere Zellen reichen
+    index = WindowIndex(cell_size=64)
+    index.rebuild([
+        (1, QRect(0, 0, 500, 400)),
+        (2, QRect(100, 100, 300, 200)),
+        (3, QRect(350, 50, 300, 300)),
+    ])
+    return index
+
+
+def hit(index, x, y, **kwargs):
+    result = index.window_at(x, y, **kwargs)
+    return result[0] if result else None
+
+
+def test_rebuild_keeps_stacking_order(index):
+    assert index.order == [1, 2, 3]
+    assert len(index) == 3 and 2 in index
+    assert index.window_at(10, 10) == (1, QRect(0, 0, 500, 400))
+
+
+def test_topmost_window_wins_on_overlap(index):
+    assert hit(index, 150, 150) == 2
+    assert hit(index, 380, 150) == 3
+    assert hit(index, 380, 150, ignored={3}) == 2
+    assert hit(index, 600, 300) == 3
+    assert hit(index, 700, 700) is None
+    # Rechte/untere Kante gehören nicht mehr zum Fenster
+    assert hit(index, 500, 390) is None
+
+
+def test_rebuild_replaces_content(index):
+    index.rebuild([(3, QRect(0, 0, 10, 10)), (1, QRect(0, 0, 10, 10))])
+    assert hit(index, 5, 5) == 1
+    assert 2 not in index and hit(index, 150, 150) is None
+
+
+def test_configure_moves_and_restacks(index):
+    index.configure(3, QRect(0, 0, 50, 50))
+    assert hit(index, 10, 10) == 3 and hit(index, 600, 300) is None
+    # Über Fenster 1, also unter Fenster 2
+    index.configure(3, QRect(100, 100, 50, 50), above=1)
+    assert index.order == [1, 3, 2]
+    assert hit(index, 120, 120) == 2
+    # 0 (X.NONE): ganz unten
+    index.configure(2, QRect(100, 100, 300, 200), above=0)
+    assert index.order == [2, 1, 3]
+    assert hit(index, 200, 200) == 1
+
+
+def test_configure_above_untracked_sibling_keeps_position(index):
+    # 99 ist nicht erfasst (override-redirect oder noch nicht gesehen)
+    assert index.configure(3, QRect(0, 0, 50, 50), above=99) is False
+    assert index.order == [1, 2, 3]
+    assert hit(index, 10, 10) == 3
+    assert index.configure(2, QRect(100, 100, 300, 200), above=99) is False
+    assert hit(index, 150, 150) == 2
+
+
+def test_reorder(index):
+    index.reorder([7, 3, 1, 8, 2])
+    assert index.order == [3, 1, 2]
+    assert hit(index, 380, 150) == 2
+    # Nicht gemeldete Fenster bleiben unten
+    index.reorder([2, 1])
+    assert index.order == [3, 2, 1]
+
+
+def test_add_restack_remove(index):
+    index.add(4, QRect(140, 140, 20, 20))
+    assert hit(index, 150, 150) == 4
+    index.restack(4, on_top=False)
+    assert hit(index, 150, 150) == 2
+    index.restack(1, on_top=True)
+    assert hit(index, 150, 150) == 1
+    index.remove(1)
+    index.remove(1)
+    assert hit(index, 150, 150) == 2 and hit(index, 10, 10) is None
+
+
+class FakeDisplay:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+
+def window(window_id):
+    return SimpleNamespace(id=window_id)
+
+
+def process(index, *events, mapped=None, stack=()):
+    # stack: Kinder des Wurzelfensters von unten nach oben, wie query_tree sie liefert
+    root = SimpleNamespace(query_tree=lambda: SimpleNamespace(children=[window(i) for i in stack]))
+    source = SimpleNamespace(display=FakeDisplay(events), index=index, root=root,
+                             _geometry=lambda w: mapped.get(w.id) if mapped else None)
+    X11WindowSource.process_events(source)
+
+
+@pytest.fixture
+def xconstants(monkeypatch):
+    monkeypatch.setattr(windows, "X", X_CONSTANTS)
+    return X_CONSTANTS
+
+
+def test_events_configure_with_and_without_sibling(index, xconstants):
+    X = xconstants
+    process(index, SimpleNamespace(type=X.ConfigureNotify, window=window(1), x=0, y=0, width=500,
+                                   height=400, border_width=0, above_sibling=window(3)))
+    assert index.order == [2, 3, 1]
+    # Ganz unten meldet der Server X.NONE (int 0) statt eines Fensters
+    process(index, SimpleNamespace(type=X.ConfigureNotify, window=window(1), x=10, y=10, width=100,
+                                   height=100, border_width=2, above_sibling=X.NONE))
+    assert index.order == [1, 2, 3]
+    assert index.rects[1] == QRect(10, 10, 104, 104)
+
+
+def test_events_configure_above_untracked_sibling_rescans(index, xconstants):
+    X = xconstants
+    # Fenster 1 wird über das nicht erfasste override-redirect-Fenster 50 gehoben
+    process(index, SimpleNamespace(type=X.ConfigureNotify, window=window(1), x=0, y=0, width=500,
+                                   height=400, border_width=0, above_sibling=window(50)),
+            stack=[2, 3, 50, 1])
+    assert index.order == [2, 3, 1]
+    assert hit(index, 150, 150) == 1 and hit(index, 380, 150) == 1
+
+
+def test_events_map_unmap_circulate(index, xconstants):
+    X = xconstants
+    process(index,
+            SimpleNamespace(type=X.MapNotify, window=window(5), override=False),
+            SimpleNamespace(type=X.MapNotify, window=window(6), override=True),
+            mapped={5: QRect(140, 140, 20, 20), 6: QRect(0, 0, 1000, 1000)})
+    assert hit(index, 150, 150) == 5 and 6 not in index
+
+    process(index, SimpleNamespace(type=X.CirculateNotify, window=window(5), place=X.PlaceOnBottom))
+    assert hit(index, 150, 150) == 2
+    process(index, SimpleNamespace(type=X.CirculateNotify, window=window(1), place=X.PlaceOnTop))
+    assert hit(index, 380, 150) == 1
+
+    process(index,
+            SimpleNamespace(type=X.UnmapNotify, window=window(1)),
+            SimpleNamespace(type=X.DestroyNotify, window=window(2)))
+    assert index.order == [5, 3]
+    assert hit(index, 150, 150) == 5
+
+
+@pytest.fixture
+def xvfb():
+    """Eigener Xvfb-Server; übersprungen, wenn Xvfb oder python-xlib fehlen"""
+    if shutil.which("Xvfb") is None:
+        pytest.skip("Xvfb ist nicht installiert")
+    if windows.X is None:
+        pytest.skip("python-xlib ist nicht installiert")
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24",
+                               "-nolisten", "tcp"], pass_fds=(write_fd,),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        server.kill()
+        pytest.skip("Xvfb ist nicht gestartet")
+    yield f":{number}"
+    server.terminate()
+    server.wait()
+
+
+class XClient:
+    """Zweite X-Verbindung, die synthetische Top-Level-Fenster anlegt"""
+
+    def __init__(self, name):
+        from Xlib import display as xdisplay
+        self.display = xdisplay.Display(name)
+        self.screen = self.display.screen()
+
+    def window(self, x, y, width, height, override=False):
+        X = windows.X
+        window = self.screen.root.create_window(x, y, width, height, 0, self.screen.root_depth,
+                                                X.InputOutput, X.CopyFromParent, override_redirect=override)
+        window.map()
+        self.display.sync()
+        return window
+
+    def sync(self):
+        self.display.sync()
+
+
+def settle(source, condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        source.process_events()
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_xvfb_synthetic_windows(app, xvfb, monkeypatch):
+    monkeypatch.setenv("DISPLAY", xvfb)
+    X = windows.X
+    client = XClient(xvfb)
+    bottom = client.window(0, 0, 400, 300)
+    source = X11WindowSource()
+    try:
+        index = source.index
+        assert index.order == [bottom.id]
+
+        top = client.window(100, 100, 400, 300)
+        assert settle(source, lambda: top.id in index)
+        assert hit(index, 150, 150) == top.id and hit(index, 50, 50) == bottom.id
+
+        # Override-redirect-Fenster werden nicht erfasst
+        menu = client.window(120, 120, 50, 50, override=True)
+        client.sync()
+        settle(source, lambda: False, timeout=0.2)
+        assert menu.id not in index
+
+        # Anheben über das nicht erfasste Fenster: Geschwister ist unbekannt, die Reihenfolge wird abgefragt
+        bottom.configure(stack_mode=X.Above)
+        client.sync()
+        assert settle(source, lambda: index.order == [top.id, bottom.id])
+        assert hit(index, 150, 150) == bottom.id
+
+        # Ganz nach unten: above_sibling ist X.NONE
+        bottom.configure(stack_mode=X.Below)
+        client.sync()
+        assert settle(source, lambda: index.order == [bottom.id, top.id])
+
+        top.configure(x=600, y=500)
+        client.sync()
+        assert settle(source, lambda: hit(index, 650, 550) == top.id)
+        assert hit(index, 150, 150) == bottom.id
+
+        top.unmap()
+        client.sync()
+        assert settle(source, lambda: top.id not in index)
+        bottom.destroy()
+        client.sync()
+        assert settle(source, lambda: len(index) == 0)
+    finally:
+        source.close()
+        client.display.close()
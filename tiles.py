@@ -0,0 +1,155 @@
+"""
+Gekachelte Bilddarstellung für den Snipping Tool Clone
+------------------------------------------------------
+Sehr große Aufnahmen (z. B. 7680x2160 über mehrere Monitore) werden nicht als
+ein einziges QPixmap gezeichnet. TiledImageItem zerlegt das Bild in Kacheln und
+hält eine im Hintergrund berechnete Bildpyramide (jede Stufe halbe Auflösung).
+Gezeichnet werden nur sichtbare Kacheln der zur Zoomstufe passenden Stufe; die
+Kacheln liegen in einem LRU-Cache mit Speicherbudget.
+"""
+import itertools
+import math
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QObject, QRect, QRectF, QRunnable, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtWidgets import QGraphicsObject
+
+from workers import worker_pool
+
+# Kantenlänge einer Kachel in Pixeln
+TILE_SIZE = 512
+
+# Speicherbudget des Kachel-Caches in Bytes
+TILE_CACHE_BUDGET = 256 * 1024 * 1024
+
+# Kleinste Stufe der Pyramide (längste Kante in Pixeln)
+MIN_LEVEL_SIZE = 256
+
+
+class TileCache:
+    """LRU-Cache für Kachel-Pixmaps mit Speicherbudget"""
+
+    def __init__(self, budget=TILE_CACHE_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self._tiles = OrderedDict()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get(self, key):
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        self.used += pixmap.width() * pixmap.height() * 4
+        self._tiles[key] = pixmap
+        # Älteste Kacheln verdrängen, die gerade eingefügte bleibt immer erhalten
+        while self.used > self.budget and len(self._tiles) > 1:
+            _, old = self._tiles.popitem(last=False)
+            self.used -= old.width() * old.height() * 4
+
+    def clear(self):
+        self._tiles.clear()
+        self.used = 0
+
+
+class _PyramidSignals(QObject):
+    level_ready = pyqtSignal(int, QImage)
+
+
+class PyramidBuilder(QRunnable):
+    """Berechnet die verkleinerten Stufen eines Bildes in einem Worker-Thread"""
+
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+        self.cancelled = False
+        self.signals = _PyramidSignals()
+
+    def run(self):
+        level = 0
+        current = self.image
+        while max(current.width(), current.height()) > MIN_LEVEL_SIZE and not self.cancelled:
+            current = current.scaled(max(1, current.width() // 2), max(1, current.height() // 2),
+                                     Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            level += 1
+            self.signals.level_ready.emit(level, current)
+
+
+class TiledImageItem(QGraphicsObject):
+    """Zeigt ein großes Bild gekachelt und abhängig von der Zoomstufe an"""
+
+    _ids = itertools.count()
+
+    def __init__(self, image, cache=None, parent=None):
+        super().__init__(parent)
+        self.key = next(self._ids)
+        self.image = image
+        self.levels = {0: image}
+        self.cache = cache if cache is not None else TileCache()
+        self.setFlag(self.ItemUsesExtendedStyleOption)
+
+        # Pyramide im Hintergrund aufbauen; der Thread-Pool gibt den Builder nach
+        # dem Lauf selbst frei, auch wenn das Item vorher gelöscht wurde
+        self._builder = PyramidBuilder(image)
+        self._builder.signals.level_ready.connect(self._add_level)
+        worker_pool().start(self._builder)
+
+    def _add_level(self, level, image):
+        self.levels[level] = image
+        self.update()
+
+    def cancel(self):
+        """Bricht den Aufbau der Pyramide ab"""
+        self._builder.cancelled = True
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.image.width(), self.image.height())
+
+    def level_for_scale(self, scale):
+        """Gröbste vorhandene Stufe, deren Auflösung für den Maßstab noch ausreicht"""
+        if scale <= 0:
+            return 0
+        wanted = max(0, int(math.floor(math.log2(1 / scale))))
+        while wanted > 0 and wanted not in self.levels:
+            wanted -= 1
+        return wanted
+
+    def tile(self, level, tx, ty):
+        """Kachel (tx, ty) der Stufe als QPixmap, aus dem Cache oder neu erzeugt"""
+        key = (self.key, level, tx, ty)
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            source = self.levels[level]
+            rect = QRect(tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE).intersected(source.rect())
+            pixmap = QPixmap.fromImage(source.copy(rect))
+            self.cache.put(key, pixmap)
+        return pixmap
+
+    def paint(self, painter, option, widget=None):
+        # Kachelkanten sollen ohne Kantenglättung bündig aneinanderliegen
+        painter.setRenderHint(QPainter.Antialiasing, False)
+
+        # Maßstab in Gerätepixeln, damit HiDPI-Ansichten die volle Auflösung bekommen
+        scale = painter.worldTransform().m11() * painter.device().devicePixelRatioF()
+        level = self.level_for_scale(scale)
+        source = self.levels[level]
+        factor_x = self.image.width() / source.width()
+        factor_y = self.image.height() / source.height()
+        span_x, span_y = TILE_SIZE * factor_x, TILE_SIZE * factor_y
+
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        first_x, last_x = int(exposed.left() // span_x), int(math.ceil(exposed.right() / span_x))
+        first_y, last_y = int(exposed.top() // span_y), int(math.ceil(exposed.bottom() / span_y))
+
+        for ty in range(first_y, min(last_y, math.ceil(source.height() / TILE_SIZE))):
+            for tx in range(first_x, min(last_x, math.ceil(source.width() / TILE_SIZE))):
+                pixmap = self.tile(level, tx, ty)
+                target = QRectF(tx * span_x, ty * span_y, pixmap.width() * factor_x, pixmap.height() * factor_y)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
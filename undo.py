@@ -0,0 +1,82 @@
+"""
+Rückgängig/Wiederholen für den Snipping Tool Clone
+--------------------------------------------------
+Jede Bearbeitung (Strich, Form, Radiervorgang) wird als AnnotationEdit mit den
+entfernten und hinzugefügten Annotationen als AnnotationRecord gespeichert,
+also als Punkt-Arrays und IDs statt als Bildkopien. Rückgängig machen und
+Wiederholen kosten damit nur so viel wie die Änderung selbst. Der Verlauf hat
+eine Speichergrenze; bei Überschreitung fallen die ältesten Einträge weg.
+"""
+from collections import deque
+
+from annotations import item_from_record, record_size
+
+# Speichergrenze des Verlaufs in Bytes
+UNDO_MEMORY_LIMIT = 32 * 1024 * 1024
+
+
+class AnnotationEdit:
+    """Eine Bearbeitung: entfernte und hinzugefügte Annotationen als {ID: Record}"""
+
+    def __init__(self, removed, added):
+        self.removed = removed
+        self.added = added
+        self.size = sum(record_size(r) for r in removed.values()) + \
+            sum(record_size(r) for r in added.values())
+
+    def undo(self, scene):
+        self._apply(scene, self.added, self.removed)
+
+    def redo(self, scene):
+        self._apply(scene, self.removed, self.added)
+
+    @staticmethod
+    def _apply(scene, remove, add):
+        for annotation_id in remove:
+            scene.remove_annotation(scene.annotations[annotation_id])
+        for annotation_id, record in add.items():
+            scene.add_annotation(item_from_record(record), annotation_id)
+
+
+class UndoStack:
+    """Verlauf mit Speichergrenze (Rückgängig- und Wiederholen-Einträge zusammen)"""
+
+    def __init__(self, memory_limit=UNDO_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self._undo = deque()
+        self._redo = []
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def push(self, edit):
+        self.memory_used -= sum(e.size for e in self._redo)
+        self._redo.clear()
+        self._undo.append(edit)
+        self.memory_used += edit.size
+        self._trim()
+
+    def _trim(self):
+        # Der neueste Eintrag bleibt auch dann erhalten, wenn er allein zu groß ist
+        while self.memory_used > self.memory_limit and len(self._undo) > 1:
+            self.memory_used -= self._undo.popleft().size
+
+    def undo(self, scene):
+        if not self._undo:
+            return False
+        edit = self._undo.pop()
+        edit.undo(scene)
+        self._redo.append(edit)
+        return True
+
+    def redo(self, scene):
+        if not self._redo:
+            return False
+        edit = self._redo.pop()
+        edit.redo(scene)
+        self._undo.append(edit)
+        return True
@@ -0,0 +1,211 @@
+"""
+Fensterauswahl für den Snipping Tool Clone
+------------------------------------------
+WindowIndex hält die Geometrie der sichtbaren Top-Level-Fenster in
+Stapelreihenfolge und findet über ein Raster das oberste Fenster unter einem
+Punkt. X11WindowSource füllt den Index einmalig aus dem X-Server (python-xlib,
+optional) und hält ihn danach allein über Ereignisse des Wurzelfensters
+(SubstructureNotify) aktuell, ohne den Fensterbaum erneut abzufragen.
+"""
+import os
+from collections import defaultdict
+
+from PyQt5.QtCore import QObject, QRect, QSocketNotifier
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    from Xlib import error as xerror
+except ImportError:
+    X = None
+
+# Kantenlänge der Rasterzellen in Pixeln
+WINDOW_INDEX_CELL_SIZE = 256
+
+
+class WindowSourceError(Exception):
+    """Fehler beim Zugriff auf die Fensterliste"""
+
+
+class WindowIndex:
+    """Z-geordnete Fensterrechtecke mit Rasterindex (unten -> oben)"""
+
+    def __init__(self, cell_size=WINDOW_INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.rects = {}
+        self.order = []
+        self.z = {}
+        self._cells = defaultdict(set)
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, window_id):
+        return window_id in self.rects
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left() // size, rect.right() // size + 1):
+            for cy in range(rect.top() // size, rect.bottom() // size + 1):
+                yield cx, cy
+
+    def _renumber(self):
+        self.z = {window_id: position for position, window_id in enumerate(self.order)}
+
+    def rebuild(self, windows):
+        """Ersetzt den Inhalt durch [(ID, QRect)] in Stapelreihenfolge von unten nach oben"""
+        self.rects = {}
+        self.order = []
+        self._cells = defaultdict(set)
+        for window_id, rect in windows:
+            self._place(window_id, rect)
+            self.order.append(window_id)
+        self._renumber()
+
+    def _place(self, window_id, rect):
+        self.rects[window_id] = rect
+        for cell in self._cell_range(rect):
+            self._cells[cell].add(window_id)
+
+    def _unplace(self, window_id):
+        rect = self.rects.pop(window_id)
+        for cell in self._cell_range(rect):
+            self._cells[cell].discard(window_id)
+
+    def add(self, window_id, rect):
+        """Neues oder wieder sichtbares Fenster, oben auf dem Stapel"""
+        self.remove(window_id)
+        self._place(window_id, rect)
+        self.order.append(window_id)
+        self.z[window_id] = len(self.order) - 1
+
+    def configure(self, window_id, rect, above=None):
+        """Neue Geometrie; above ist das Geschwisterfenster darunter (0: ganz unten)
+
+        Liefert False, wenn above kein erfasstes Fenster ist (z. B. override-redirect);
+        die Position im Stapel bleibt dann unverändert.
+        """
+        if window_id not in self.rects:
+            return True
+        if self.rects[window_id] != rect:
+            self._unplace(window_id)
+            self._place(window_id, rect)
+        if above is None or above == window_id:
+            return True
+        if above != 0 and above not in self.z:
+            return False
+        self.order.remove(window_id)
+        self.order.insert(self.order.index(above) + 1 if above else 0, window_id)
+        self._renumber()
+        return True
+
+    def reorder(self, window_ids):
+        """Übernimmt die Stapelreihenfolge [ID] von unten nach oben; fremde IDs werden übergangen"""
+        listed = [window_id for window_id in window_ids if window_id in self.rects]
+        # Nicht mehr gemeldete Fenster (Zerstörung noch nicht verarbeitet) bleiben unten
+        missing = set(self.rects) - set(listed)
+        self.order = [window_id for window_id in self.order if window_id in missing] + listed
+        self._renumber()
+
+    def restack(self, window_id, on_top):
+        if window_id in self.rects:
+            self.order.remove(window_id)
+            if on_top:
+                self.order.append(window_id)
+            else:
+                self.order.insert(0, window_id)
+            self._renumber()
+
+    def remove(self, window_id):
+        if window_id in self.rects:
+            self._unplace(window_id)
+            self.order.remove(window_id)
+            self._renumber()
+
+    def window_at(self, x, y, ignored=()):
+        """(ID, QRect) des obersten Fensters an (x, y) oder None"""
+        size = self.cell_size
+        best = None
+        for window_id in self._cells.get((x // size, y // size), ()):
+            if window_id in ignored or not self.rects[window_id].contains(x, y):
+                continue
+            if best is None or self.z[window_id] > self.z[best]:
+                best = window_id
+        return (best, self.rects[best]) if best is not None else None
+
+
+class X11WindowSource(QObject):
+    """Hält einen WindowIndex über X11-Ereignisse des Wurzelfensters aktuell"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        if X is None:
+            raise WindowSourceError("python-xlib ist nicht installiert")
+        try:
+            self.display = xdisplay.Display()
+            self.root = self.display.screen().root
+            self.index = WindowIndex()
+            # Struktur-Ereignisse aller Kinder des Wurzelfensters abonnieren, dann einmal abfragen
+            self.root.change_attributes(event_mask=X.SubstructureNotifyMask)
+            self.rebuild()
+        except (xerror.DisplayError, xerror.ConnectionClosedError, xerror.XError) as e:
+            raise WindowSourceError(f"Fensterliste nicht verfügbar: {e}") from e
+        self.notifier = QSocketNotifier(self.display.fileno(), QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self.process_events)
+
+    @classmethod
+    def available(cls):
+        return X is not None and bool(os.environ.get("DISPLAY"))
+
+    def _geometry(self, window):
+        """QRect eines sichtbaren, vom Fenstermanager verwalteten Fensters oder None"""
+        try:
+            attributes = window.get_attributes()
+            if (attributes.map_state != X.IsViewable or attributes.override_redirect
+                    or attributes.win_class != X.InputOutput):
+                return None
+            geometry = window.get_geometry()
+        except xerror.XError:
+            # Fenster ist inzwischen verschwunden
+            return None
+        border = 2 * geometry.border_width
+        return QRect(geometry.x, geometry.y, geometry.width + border, geometry.height + border)
+
+    def rebuild(self):
+        # query_tree liefert die Kinder in Stapelreihenfolge von unten nach oben
+        windows = []
+        for window in self.root.query_tree().children:
+            rect = self._geometry(window)
+            if rect is not None:
+                windows.append((window.id, rect))
+        self.index.rebuild(windows)
+
+    def process_events(self):
+        restack = False
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type == X.ConfigureNotify:
+                border = 2 * event.border_width
+                # above_sibling ist ein Window oder X.NONE (int 0), wenn das Fenster ganz unten liegt
+                above = getattr(event.above_sibling, "id", X.NONE)
+                if not self.index.configure(event.window.id, QRect(event.x, event.y, event.width + border,
+                                                                   event.height + border), above):
+                    restack = True
+            elif event.type == X.MapNotify and not event.override:
+                rect = self._geometry(event.window)
+                if rect is not None:
+                    self.index.add(event.window.id, rect)
+            elif event.type in (X.UnmapNotify, X.DestroyNotify):
+                self.index.remove(event.window.id)
+            elif event.type == X.CirculateNotify:
+                self.index.restack(event.window.id, event.place == X.PlaceOnTop)
+        if restack:
+            # Über einem nicht erfassten Fenster eingeordnet: Reihenfolge einmal beim Server abfragen
+            try:
+                self.index.reorder([window.id for window in self.root.query_tree().children])
+            except xerror.XError:
+                pass
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        self.display.close()
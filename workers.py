@@ -0,0 +1,22 @@
+"""
+Worker-Threads für den Snipping Tool Clone
+------------------------------------------
+Python-Aufgaben (QRunnable) laufen in worker_pool() statt im globalen
+QThreadPool. Qt verteilt große Bildkonvertierungen und Skalierungen auf den
+globalen Pool und wartet auf die Teile; PyQt gibt das GIL dabei nicht frei.
+Belegen Python-Aufgaben alle Threads des globalen Pools, warten diese auf das
+GIL und die Konvertierung auf sie – das Programm hängt (z. B. bei schnell
+wiederholten Aufnahmen). Im globalen Pool laufen daher nur Qts eigene Teile.
+"""
+from PyQt5.QtCore import QThread, QThreadPool
+
+_pool = None
+
+
+def worker_pool():
+    """Gemeinsamer Pool für alle Python-Aufgaben (QRunnable) des Programms"""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(max(2, QThread.idealThreadCount()))
+    return _pool